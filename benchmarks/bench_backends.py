@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: decoder backends across codecs.
+
+Encodes the same synthetic video with each codec PyAV can write here
+(H.264 with B-frames in MP4 and MPEG-TS, HEVC, VP9, AV1, MPEG-4 Part 2),
+then extracts the last sharp frame with every available backend. Reports
+per backend and codec: extraction time, frames decoded, full-decode
+throughput, and whether the picked frame and its score agree with OpenCV's.
+'pyav-1t' is PyAV with a single decoder thread, registered here, to show
+what threaded decoding adds on this machine.
+
+Usage:
+    python benchmarks/bench_backends.py [--size 1280x720] [--frames 300] [--gop 120] [--depth 30]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Quieten the encoders and FFmpeg's warnings about decoders it can't use
+os.environ.setdefault("SVT_LOG", "1")
+os.environ.setdefault("OPENCV_FFMPEG_LOGLEVEL", "-8")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import av, write_video  # noqa: E402
+from lastframe.backends import PyAVCapture, available_backends, register_backend  # noqa: E402
+from lastframe.core import VideoSession, extract_last_frame, iter_range  # noqa: E402
+
+# (name, file name, write_video arguments)
+CODECS = [
+    ("h264", "h264.mp4", dict(codec="libx264", bframes=3)),
+    ("h264-ts", "h264.ts", dict(codec="libx264", bframes=3)),
+    ("hevc", "hevc.mp4", dict(codec="libx265", bframes=3)),
+    ("vp9", "vp9.webm", dict(codec="libvpx-vp9")),
+    ("av1", "av1.mkv", dict(codec="libsvtav1")),
+    ("mpeg4", "mpeg4.mp4", dict(codec="mpeg4")),
+]
+
+
+def extract(path, backend, depth, repeat):
+    """(best seconds, ExtractionResult, frames decoded) of extract_last_frame."""
+    best = None
+    for _ in range(repeat):
+        with VideoSession(path, backend) as session:
+            t0 = time.perf_counter()
+            result = extract_last_frame(session, max_depth=depth)
+            seconds = time.perf_counter() - t0
+            decoded = session.decode_stats['grabbed']
+        best = seconds if best is None else min(best, seconds)
+    return best, result, decoded
+
+
+def throughput(path, backend):
+    """Frames per second decoding and converting the whole video."""
+    with VideoSession(path, backend) as session:
+        if not session.open():
+            return None
+        t0 = time.perf_counter()
+        frames = sum(1 for _ in iter_range(session.cap, 0, None))
+        seconds = time.perf_counter() - t0
+    return frames / seconds if frames else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--gop", type=int, default=120)
+    parser.add_argument("--depth", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if av is None:
+        sys.exit("this benchmark needs PyAV to write its videos (pip install av)")
+
+    register_backend("pyav-1t", lambda source, stream=False: PyAVCapture(source, stream, threads=1))
+    backends = ["opencv"] + [name for name in available_backends() if name != "opencv"]
+    width, height = (int(v) for v in args.size.split("x"))
+
+    print(f"{args.size}, {args.frames} frames, keyframe every {args.gop}, "
+          f"max depth {args.depth}, {os.cpu_count()} CPUs")
+    print(f"{'codec':<8} {'backend':<8} {'extract ms':>10} {'decoded':>8} {'decode fps':>10} {'frame':>6} "
+          f"{'agrees':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for codec, name, options in CODECS:
+            path = write_video(
+                Path(tmp) / name, frames=args.frames, width=width, height=height, gop=args.gop,
+                blurry_tail=2, **options
+            )
+            reference = None
+            for backend in backends:
+                seconds, result, decoded = extract(path, backend, args.depth, args.repeat)
+                fps = throughput(path, backend)
+                picked = (result.frame_num, result.blur_score)
+                if backend == "opencv":
+                    reference = picked
+                if result.frame is None:
+                    agrees = "-"
+                elif reference[0] is None:
+                    agrees = "only"
+                else:
+                    agrees = "yes" if picked == reference else "NO"
+                print(f"{codec:<8} {backend:<8} {seconds * 1000:>10.1f} {decoded:>8} "
+                      f"{fps or 0:>10.0f} {str(result.frame_num):>6} {agrees:>7}")
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: OpenCV frame estimates vs. the MP4 sample index for the tail.
+
+Each sample video is decoded front to back once to learn what every frame
+really looks like. Then the tail window is decoded the old way (frame
+count and frame numbers from OpenCV) and the indexed way (frame count,
+keyframes and timestamps from the MP4 sample tables). `got` is how many
+of the `window` frames came back and `exact` whether every returned frame
+is really the frame its number says.
+
+The variable frame rate samples need PyAV and are skipped without it.
+
+Usage:
+    python benchmarks/bench_container_index.py [--window 10] [--repeat 5]
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import av, write_video, write_vfr_video  # noqa: E402
+from lastframe.core import decode_tail  # noqa: E402
+from lastframe.mp4 import read_index  # noqa: E402
+
+
+def samples(tmp, width, height):
+    tmp = Path(tmp)
+    yield "cfr, gop 250", write_video(tmp / "cfr.mp4", frames=600, width=width, height=height, gop=250)
+    yield "cfr, tail at keyframe", write_video(
+        tmp / "cfr_key.mp4", frames=508, width=width, height=height, gop=250
+    )
+    if av is None:
+        return
+    yield "vfr 10 -> 60 fps", write_vfr_video(
+        tmp / "vfr_up.mp4", [(150, 10), (150, 60)], width, height, gop=250
+    )
+    yield "vfr 60 -> 10 fps", write_vfr_video(
+        tmp / "vfr_down.mp4", [(150, 60), (150, 10)], width, height, gop=250
+    )
+
+
+def thumbnail(frame):
+    return cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (64, 36), interpolation=cv2.INTER_AREA)
+
+
+def reference(path):
+    """Thumbnails of every frame, in order."""
+    cap = cv2.VideoCapture(str(path))
+    thumbs = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        thumbs.append(thumbnail(frame))
+    cap.release()
+    return thumbs
+
+
+def run(path, window, indexed):
+    cap = cv2.VideoCapture(str(path))
+    t0 = time.perf_counter()
+    if indexed:
+        index = read_index(path)
+        frames, _ = decode_tail(cap, index.frame_count, window=window, index=index)
+    else:
+        frames, _ = decode_tail(cap, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), window=window)
+    elapsed = time.perf_counter() - t0
+    cap.release()
+    return elapsed, frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--window", type=int, default=10)
+    parser.add_argument("--size", default="640x360")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split("x"))
+
+    print(f"{'sample':<22} {'frames':>6} {'opencv':>6} {'index':>6}   "
+          f"{'old ms':>7} {'got':>4} {'exact':>5}   {'new ms':>7} {'got':>4} {'exact':>5}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, path in samples(tmp, width, height):
+            thumbs = reference(path)
+            cap = cv2.VideoCapture(str(path))
+            opencv_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            cap.release()
+
+            row = f"{name:<22} {len(thumbs):>6} {opencv_count:>6} {read_index(path).frame_count:>6}  "
+            for indexed in (False, True):
+                times = []
+                for _ in range(args.repeat):
+                    elapsed, frames = run(path, args.window, indexed)
+                    times.append(elapsed)
+
+                exact = all(
+                    n < len(thumbs) and cv2.absdiff(thumbnail(frame), thumbs[n]).max() <= 2
+                    for frame, n in frames
+                )
+                exact = ('yes' if exact else 'no') if frames else '-'
+                row += f" {statistics.median(times) * 1000:>7.1f} {len(frames):>4} {exact:>5}  "
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
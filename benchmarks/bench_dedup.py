@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: a batch with repeated videos, with and without dedup.
+
+Generates --distinct videos and puts --copies extra copies of each under
+other names, then runs process_batch over the folder with dedup off and
+on. Reports wall time, frames decoded and the time dedup says it saved,
+plus what fingerprinting one file costs.
+
+Usage:
+    python benchmarks/bench_dedup.py [--distinct 4] [--copies 3] [--size 1280x720]
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import write_video  # noqa: E402
+from lastframe.cli import process_batch  # noqa: E402
+from lastframe.dedup import fingerprint  # noqa: E402
+
+
+def run(input_dir, output_dir, dedup):
+    """(seconds, frames decoded, seconds saved) for one batch."""
+    decoded = []
+    saved = []
+
+    def emit(video_file, success, result):
+        if success:
+            decoded.append(result['frames_decoded'])
+            saved.append(result.get('saved_seconds', 0.0))
+
+    t0 = time.perf_counter()
+    process_batch(input_dir, output_dir, jobs=1, emit=emit, dedup=dedup)
+    return time.perf_counter() - t0, sum(decoded), sum(saved)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--distinct", type=int, default=4)
+    parser.add_argument("--copies", type=int, default=3)
+    parser.add_argument("--size", default="1280x720")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split("x"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir = Path(tmp) / "in"
+        input_dir.mkdir()
+        for i in range(args.distinct):
+            video = write_video(input_dir / f"v{i}.mp4", frames=150 + i, width=width, height=height)
+            for copy in range(args.copies):
+                shutil.copyfile(video, input_dir / f"v{i}_copy{copy}.mp4")
+
+        total = args.distinct * (args.copies + 1)
+        print(f"{total} videos, {args.distinct} distinct, {args.size}")
+        print(f"{'dedup':<6} {'s':>8} {'frames decoded':>15} {'saved s':>8}")
+        for dedup in (False, True):
+            seconds, decoded, saved = run(input_dir, Path(tmp) / f"out-{dedup}", dedup)
+            print(f"{'on' if dedup else 'off':<6} {seconds:>8.2f} {decoded:>15} {saved:>8.2f}")
+
+        video = input_dir / "v0.mp4"
+        t0 = time.perf_counter()
+        for _ in range(20):
+            fingerprint(video)
+        print(f"\nfingerprint: {(time.perf_counter() - t0) / 20 * 1000:.2f} ms per "
+              f"{video.stat().st_size / 1e6:.1f} MB file")
+
+
+if __name__ == "__main__":
+    main()
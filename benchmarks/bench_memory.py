@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory of windowed vs. streaming extraction, and of the Laplacian.
+
+Extracts the last frame of a generated video with a large search window,
+once holding the whole window (the default) and once with streaming=True.
+Reports wall time, the session's peak_frame_bytes, the peak of numpy
+allocations traced by tracemalloc (frames, scoring buffers) and whether
+both modes picked the same frame. A second table compares scoring one
+frame with a float64 Laplacian against the 16-bit one calculate_blur_score
+uses now.
+
+Usage:
+    python benchmarks/bench_memory.py [--size 3840x2160] [--window 30]
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import make_frame, write_video  # noqa: E402
+from lastframe.core import VideoSession, calculate_blur_score, extract_last_frame  # noqa: E402
+
+
+def traced(fn, *args, **kwargs):
+    """(result, seconds, peak traced bytes) of one call."""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def extract(path, window, streaming):
+    with VideoSession(path) as session:
+        result = extract_last_frame(
+            session, search_window=window, max_depth=window * 2, streaming=streaming
+        )
+        return result.frame_num, session.peak_frame_bytes
+
+
+def laplacian_64f(frame):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.Laplacian(gray, cv2.CV_64F).var()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", default="3840x2160")
+    parser.add_argument("--frames", type=int, default=90)
+    parser.add_argument("--window", type=int, default=30)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split("x"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_video(Path(tmp) / "big.mp4", frames=args.frames, width=width, height=height)
+
+        print(f"{args.size}, window {args.window}")
+        print(f"{'mode':<10} {'ms':>8} {'frames MB':>10} {'traced MB':>10} {'frame':>6}")
+        picked = []
+        for streaming in (False, True):
+            (frame_num, peak_frames), elapsed, peak = traced(extract, path, args.window, streaming)
+            picked.append(frame_num)
+            print(f"{'streaming' if streaming else 'window':<10} {elapsed * 1000:>8.1f} "
+                  f"{peak_frames / 1e6:>10.1f} {peak / 1e6:>10.1f} {frame_num:>6}")
+        print(f"same frame: {'yes' if picked[0] == picked[1] else 'NO'}")
+
+    frame = make_frame(0, width, height)
+    print()
+    print(f"{'laplacian':<10} {'ms':>8} {'traced MB':>10} {'score':>12}")
+    for name, fn in (("float64", laplacian_64f), ("int16", calculate_blur_score)):
+        times = []
+        for _ in range(5):
+            score, elapsed, peak = traced(fn, frame)
+            times.append(elapsed)
+        print(f"{name:<10} {min(times) * 1000:>8.1f} {peak / 1e6:>10.1f} {score:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
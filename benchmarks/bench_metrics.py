@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sharpness metrics and the pyramid fast-scoring path.
+
+Builds sets of candidate frames blurred by different amounts and scores
+them with every registered metric, at full resolution and with each
+pyramid mode. Reports time per candidate set and how often the chosen
+frame agrees with the ground truth (the least blurred frame) and with
+full-resolution Laplacian variance, the historical default.
+
+Usage:
+    python benchmarks/bench_metrics.py [--sizes 1280x720,3840x2160] [--sets 20]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import make_frame  # noqa: E402
+from lastframe.core import PYRAMID_MODES, SHARPNESS_METRICS, score_frames  # noqa: E402
+
+SIGMAS = [0, 0.6, 1.2, 2.0, 4.0]
+
+
+def candidate_sets(width, height, count, size, seed):
+    """Yield (frames, sharpest_index) with distinct blur levels per set."""
+    rng = random.Random(seed)
+    noise_rng = np.random.default_rng(seed)
+    base = make_frame(7, width, height)
+
+    for _ in range(count):
+        sigmas = rng.sample(SIGMAS, size)
+        frames = []
+        for i, sigma in enumerate(sigmas):
+            frame = base if sigma == 0 else cv2.GaussianBlur(base, (0, 0), sigma)
+            # A little sensor/compression noise so "sharp" isn't trivial
+            noise = noise_rng.normal(0, 2, frame.shape)
+            frame = np.clip(frame + noise, 0, 255).astype(np.uint8)
+            frames.append((frame, i))
+        yield frames, sigmas.index(min(sigmas))
+
+
+def pick(scored):
+    return max(range(len(scored)), key=lambda i: scored[i][2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1280x720,1920x1080,3840x2160")
+    parser.add_argument("--sets", type=int, default=20)
+    parser.add_argument("--candidates", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    modes = [None] + sorted(PYRAMID_MODES)
+
+    for size in args.sizes.split(","):
+        width, height = (int(v) for v in size.split("x"))
+        sets = list(candidate_sets(width, height, args.sets, args.candidates, args.seed))
+        reference = [pick(score_frames(frames, "laplacian")) for frames, _ in sets]
+
+        print(f"\n{size}, {args.sets} sets of {args.candidates} candidates")
+        print(f"{'metric':<10} {'pyramid':<10} {'ms/set':>8} {'truth':>7} {'vs lap':>7}")
+
+        for metric in sorted(SHARPNESS_METRICS):
+            for mode in modes:
+                elapsed = 0.0
+                truth = agree = 0
+                for (frames, sharpest), ref in zip(sets, reference):
+                    t0 = time.perf_counter()
+                    chosen = pick(score_frames(frames, metric, mode))
+                    elapsed += time.perf_counter() - t0
+                    truth += chosen == sharpest
+                    agree += chosen == ref
+
+                print(f"{metric:<10} {mode or 'full':<10} "
+                      f"{elapsed * 1000 / len(sets):>8.1f} "
+                      f"{truth / len(sets):>7.0%} {agree / len(sets):>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark: one decode per target vs. all targets in one planned pass.
+
+The separate way runs every target on its own, opening the video and
+decoding the frames that target needs each time, which is what a caller
+looping over extract_targets([target]) would do. The planned way hands all
+targets to extract_targets at once, so overlapping ranges are decoded once
+and close ranges are read through instead of seeked to. Reported are the
+wall time, seeks and frames grabbed for each.
+
+Usage:
+    python benchmarks/bench_planner.py [--targets last,first,at=50%,top=3:5s] [--repeat 5]
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import write_video  # noqa: E402
+from lastframe.core import VideoSession  # noqa: E402
+from lastframe.planner import extract_targets, parse_targets  # noqa: E402
+
+
+def samples(tmp, width, height):
+    tmp = Path(tmp)
+    yield "short, gop 30", write_video(tmp / "short.mp4", frames=150, width=width, height=height, gop=30)
+    yield "long, gop 250", write_video(tmp / "long.mp4", frames=900, width=width, height=height, gop=250)
+
+
+def run(path, targets, planned):
+    """(seconds, seeks, frames grabbed) for one way of extracting the targets."""
+    seeks = grabbed = 0
+    t0 = time.perf_counter()
+    for group in ([targets] if planned else [[target] for target in targets]):
+        with VideoSession(path) as session:
+            extract_targets(session, group)
+            seeks += session.decode_stats['seeks']
+            grabbed += session.decode_stats['grabbed']
+    return time.perf_counter() - t0, seeks, grabbed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--targets", default="last,first,at=50%,top=3:5s")
+    parser.add_argument("--size", default="640x360")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split("x"))
+    targets = parse_targets(args.targets)
+
+    print(f"targets: {args.targets}")
+    print(f"{'sample':<16} {'separate ms':>11} {'seeks':>5} {'grabbed':>7}   "
+          f"{'planned ms':>10} {'seeks':>5} {'grabbed':>7}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, path in samples(tmp, width, height):
+            columns = []
+            for planned in (False, True):
+                runs = [run(path, targets, planned) for _ in range(args.repeat)]
+                ms = statistics.median(r[0] for r in runs) * 1000
+                _, seeks, grabbed = runs[-1]
+                columns.append(f"{ms:>{10 if planned else 11}.1f} {seeks:>5} {grabbed:>7}")
+            print(f"{name:<16} " + "   ".join(columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the cheap pre-filter on videos that end in a fade to black.
+
+Writes a video whose last --fade frames fade out and --black frames are
+black, and extracts with enough --max-depth to search past them, with and
+without the pre-filter. Reports wall time, frames scored in full, frames
+rejected from the thumbnail and which frame was picked, plus what one
+thumbnail check costs next to one Laplacian score at that size.
+
+Usage:
+    python benchmarks/bench_prefilter.py [--size 1280x720] [--fade 30] [--black 60] [--depth 120]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import make_frame, write_video  # noqa: E402
+from lastframe.core import (  # noqa: E402
+    Prefilter, VideoSession, _thumbnail, calculate_blur_score, extract_last_frame,
+)
+
+
+def run(path, depth, prefilter, streaming):
+    """(seconds, ExtractionResult, prefilter counts or None) for one extraction."""
+    with VideoSession(path) as session:
+        t0 = time.perf_counter()
+        result = extract_last_frame(session, max_depth=depth, streaming=streaming, prefilter=prefilter)
+        return time.perf_counter() - t0, result, session.prefilter_counts
+
+
+def per_frame_ms(fn, frame, repeat=20):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(frame)
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--fade", type=int, default=30)
+    parser.add_argument("--black", type=int, default=60)
+    parser.add_argument("--depth", type=int, default=120)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split("x"))
+    frame = make_frame(0, width, height)
+    screen = Prefilter()
+    print(f"per frame at {args.size}: thumbnail check "
+          f"{per_frame_ms(lambda f: screen.classify(_thumbnail(f)), frame):.2f} ms, "
+          f"laplacian {per_frame_ms(calculate_blur_score, frame):.2f} ms\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_video(
+            Path(tmp) / "fade.mp4", frames=args.frames, width=width, height=height,
+            fade_tail=args.fade, black_tail=args.black
+        )
+        print(f"{args.frames} frames, {args.fade} fading and {args.black} black at the end, "
+              f"max depth {args.depth}")
+        print(f"{'prefilter':<10} {'streaming':<10} {'s':>7} {'scored':>7} {'rejected':>9} {'picked':>7}")
+        for streaming in (False, True):
+            for prefilter in (None, {}):
+                seconds, result, counts = run(path, args.depth, prefilter, streaming)
+                scored = counts['scored'] if counts else len(result.candidates)
+                rejected = sum(n for reason, n in counts.items() if reason != 'scored') if counts else 0
+                print(f"{'on' if counts else 'off':<10} {'on' if streaming else 'off':<10} "
+                      f"{seconds:>7.2f} {scored:>7} {rejected:>9} {result.frame_num:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Simulator: batch makespan and tail latency under each scheduling policy.
+
+No video is decoded. Synthetic job durations are handed to --workers
+simulated workers in the order each policy in lastframe.schedule picks,
+each job going to the first worker that is free, exactly like the batch
+process pool. Policies only see an estimate of each duration, off by a
+random factor (--error, the sigma of a log-normal), the way the metadata
+pre-pass can't know the real decode time.
+
+Reported per policy: makespan (when the last video finishes), how far that
+is above the lower bound max(total / workers, longest job), and the
+median, p99 and mean time at which videos finish.
+
+Usage:
+    python benchmarks/bench_schedule.py [--workers 8] [--jobs 500] [--error 0.3]
+"""
+import argparse
+import heapq
+import random
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lastframe.schedule import SCHEDULE_POLICIES, by_discovery  # noqa: E402
+
+
+def scenarios(rng, count):
+    """(name, durations in discovery order) of the synthetic batches."""
+    # Mostly phone clips and the occasional long master, in filename order
+    mixed = [rng.lognormvariate(0, 0.8) * (40 if rng.random() < 0.02 else 1) for _ in range(count)]
+    yield "mixed", mixed
+
+    # Heavy tail: Pareto-distributed durations
+    yield "pareto", [rng.paretovariate(1.3) for _ in range(count)]
+
+    # Uniform clips, and one 40 GB file that sorts last
+    uniform = [rng.uniform(0.5, 1.5) for _ in range(count - 1)]
+    yield "huge last", uniform + [sum(uniform) / 20]
+
+
+def simulate(durations, order, workers):
+    """Finish time of every job when started in `order` on `workers` workers."""
+    free = [0.0] * workers
+    finished = []
+    for job in order:
+        start = heapq.heappop(free)
+        end = start + durations[job]
+        finished.append(end)
+        heapq.heappush(free, end)
+    return finished
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--error", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{args.jobs} jobs on {args.workers} workers, estimate error sigma {args.error}")
+    print(f"{'batch':<10} {'policy':<15} {'makespan':>9} {'vs bound':>9} {'p50':>8} {'p99':>8} {'mean':>8}")
+
+    for name, durations in scenarios(rng, args.jobs):
+        bound = max(sum(durations) / args.workers, max(durations))
+        estimates = [d * rng.lognormvariate(0, args.error) for d in durations]
+        entries = list(zip(estimates, range(len(durations))))
+
+        for policy, order_fn in SCHEDULE_POLICIES.items():
+            order = (order_fn or by_discovery)(entries)
+            finished = simulate(durations, order, args.workers)
+            makespan = max(finished)
+            cuts = statistics.quantiles(finished, n=100, method='inclusive')
+            print(f"{name:<10} {policy:<15} {makespan:>9.1f} {makespan / bound - 1:>8.1%} "
+                  f"{cuts[49]:>8.1f} {cuts[98]:>8.1f} {statistics.mean(finished):>8.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
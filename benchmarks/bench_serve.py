@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Load test: `lastframe serve` vs. running the lastframe command per request.
+
+Sends --requests extractions of a generated video, --concurrency at a time,
+first to a `lastframe serve` started with --jobs warm workers and then as
+one `python -m lastframe video out.jpg -q` subprocess each. Reports latency
+percentiles, throughput and how many requests were turned away (429) or
+failed. Raise --concurrency above --jobs plus the server's --queue to see
+backpressure at work.
+
+Usage:
+    python benchmarks/bench_serve.py [--requests 100] [--concurrency 8] [--jobs 2] [--queue 16]
+"""
+import argparse
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from corpus import write_video  # noqa: E402
+
+
+def start_server(jobs, queue):
+    """Start `lastframe serve` on a free port; returns (process, base URL) once it is warm."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "lastframe", "serve", "--port", "0", "-j", str(jobs),
+         "--queue", str(queue), "--format", "jsonl"],
+        cwd=ROOT, stdout=subprocess.PIPE, text=True
+    )
+    # In jsonl mode the URL is printed once every worker is warm
+    url = process.stdout.readline().strip()
+    if not url:
+        process.kill()
+        raise SystemExit("lastframe serve did not start")
+    return process, url
+
+
+def http_request(url):
+    """(seconds, status) of one GET /extract."""
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return time.perf_counter() - t0, status
+
+
+def subprocess_request(video, output):
+    """(seconds, status) of one lastframe command, 200 for exit code 0."""
+    t0 = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-m", "lastframe", str(video), str(output), "-q"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    return time.perf_counter() - t0, 200 if result.returncode == 0 else 500
+
+
+def run_load(fn, args_list, concurrency):
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        outcomes = list(executor.map(lambda args: fn(*args), args_list))
+    return outcomes, time.perf_counter() - t0
+
+
+def report(name, outcomes, wall):
+    ok = sorted(seconds for seconds, status in outcomes if status == 200)
+    rejected = sum(1 for _, status in outcomes if status == 429)
+    failed = len(outcomes) - len(ok) - rejected
+    if len(ok) >= 2:
+        cuts = statistics.quantiles(ok, n=100, method='inclusive')
+        p50, p99 = cuts[49], cuts[98]
+    else:
+        p50 = p99 = ok[0] if ok else 0.0
+    print(f"{name:<12} {len(ok):>5} {rejected:>5} {failed:>6} {p50 * 1000:>9.1f} {p99 * 1000:>9.1f} "
+          f"{(max(ok) if ok else 0) * 1000:>9.1f} {len(ok) / wall:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=2)
+    parser.add_argument("--queue", type=int, default=16)
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--skip-subprocess", action="store_true")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split("x"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video = write_video(Path(tmp) / "clip.mp4", frames=150, width=width, height=height, gop=30)
+
+        print(f"{args.requests} requests, {args.concurrency} at a time, {args.size}")
+        print(f"{'mode':<12} {'ok':>5} {'429':>5} {'failed':>6} {'p50 ms':>9} {'p99 ms':>9} "
+              f"{'max ms':>9} {'req/s':>8}")
+
+        process, base = start_server(args.jobs, args.queue)
+        try:
+            url = f"{base}/extract?" + urllib.parse.urlencode({'path': str(video)})
+            outcomes, wall = run_load(http_request, [(url,)] * args.requests, args.concurrency)
+            report(f"serve -j {args.jobs}", outcomes, wall)
+        finally:
+            process.send_signal(signal.SIGINT)
+            process.wait()
+
+        if not args.skip_subprocess:
+            jobs = [(video, Path(tmp) / f"out{i}.jpg") for i in range(args.requests)]
+            outcomes, wall = run_load(subprocess_request, jobs, args.concurrency)
+            report("subprocess", outcomes, wall)
+
+
+if __name__ == "__main__":
+    main()
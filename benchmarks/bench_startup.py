@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: process start-up time of the CLI and the library.
+
+Each scenario runs in a fresh interpreter, as it would from a shell or a
+cron job, and the wall time is measured from the outside. A bare
+`python -c pass` run is included so interpreter start-up can be told
+apart from lastframe's own imports. The last column shows whether the
+scenario had to load OpenCV, the largest import by far.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from corpus import write_video  # noqa: E402
+
+
+def scenarios(video, output):
+    return [
+        ("python (baseline)", ["-c", "pass"]),
+        ("lastframe --help", ["-m", "lastframe", "--help"]),
+        ("lastframe (no input)", ["-m", "lastframe"]),
+        ("lastframe video.mp4", ["-m", "lastframe", str(video), str(output)]),
+        ("import lastframe.core", ["-c", "import lastframe.core"]),
+        ("library extract", [
+            "-c",
+            "from lastframe.core import extract_last_frame; "
+            f"extract_last_frame({str(video)!r})"
+        ]),
+    ]
+
+
+def run(args, env, importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + args
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True)
+    return time.perf_counter() - t0, proc.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--size", default="1280x720")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split("x"))
+    env = dict(os.environ, PYTHONPATH=str(ROOT), COLUMNS="100")
+
+    print(f"{'scenario':<24} {'median ms':>10} {'min ms':>8} {'cv2':>5}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video = write_video(Path(tmp) / "clip.mp4", frames=30, width=width, height=height)
+        output = Path(tmp) / "clip_lastframe.jpg"
+
+        for name, cmd in scenarios(video, output):
+            # One untimed run warms the OS file cache
+            _, stderr = run(cmd, env, importtime=True)
+            loads_cv2 = any(line.split("|")[-1].strip() == "cv2" for line in stderr.splitlines())
+
+            times = [run(cmd, env)[0] for _ in range(args.repeat)]
+
+            print(f"{name:<24} {statistics.median(times) * 1000:>10.1f} "
+                  f"{min(times) * 1000:>8.1f} {'yes' if loads_cv2 else 'no':>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark: extracting from a pipe, for streams of growing length.
+
+Writes MPEG-TS streams of --lengths frames and feeds each through an OS
+pipe into extract_stream_frame, the way `ffmpeg ... | lastframe -` does.
+Reports throughput, the peak memory of decoded frames (which should not
+grow with the stream) and how long after the last byte was written the
+result was ready (scoring runs as frames arrive, so only the final pick
+is left once the stream ends).
+
+Usage:
+    python benchmarks/bench_stream.py [--lengths 150,600,2400] [--size 1280x720] [--depth 9]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import write_video  # noqa: E402
+from lastframe.stream import StreamSession, extract_stream_frame  # noqa: E402
+
+
+def run(path, window, depth):
+    """(seconds, frames, peak bytes, seconds from end of stream to result)."""
+    read_fd, write_fd = os.pipe()
+    ended = []
+
+    def feed():
+        with open(path, 'rb') as f, os.fdopen(write_fd, 'wb') as out:
+            while True:
+                chunk = f.read(1 << 20)
+                if not chunk:
+                    break
+                out.write(chunk)
+        ended.append(time.perf_counter())
+
+    feeder = threading.Thread(target=feed)
+    t0 = time.perf_counter()
+    feeder.start()
+    # FFmpeg's pipe: protocol reads straight from the descriptor
+    with StreamSession(f"pipe:{read_fd}") as session:
+        extract_stream_frame(session, search_window=window, max_depth=depth)
+        done = time.perf_counter()
+        frames = session.decode_stats['grabbed']
+        peak = session.peak_frame_bytes
+    feeder.join()
+    os.close(read_fd)
+    return done - t0, frames, peak, done - ended[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lengths", default="150,600,2400")
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--window", type=int, default=3)
+    parser.add_argument("--depth", type=int, default=9)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split("x"))
+
+    print(f"{args.size}, window {args.window}, depth {args.depth}")
+    print(f"{'frames':>7} {'s':>7} {'fps':>7} {'peak MB':>8} {'ready after EOF ms':>19}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for length in (int(n) for n in args.lengths.split(",")):
+            path = write_video(
+                Path(tmp) / f"s{length}.ts", frames=length, width=width, height=height, gop=60,
+                blurry_tail=2
+            )
+            seconds, frames, peak, ready = run(path, args.window, args.depth)
+            print(f"{frames:>7} {seconds:>7.2f} {frames / seconds:>7.0f} {peak / 1e6:>8.1f} {ready * 1000:>19.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: one seek per candidate vs. single-seek tail decoding.
+
+For each GOP length a synthetic video is generated and the last frames are
+decoded both ways. OpenCV doesn't expose how many frames the decoder really
+decoded, so decode counts are modelled from the known keyframe interval: a
+seek to frame t decodes everything from the keyframe before t up to t.
+
+Usage:
+    python benchmarks/bench_tail_decode.py [--gops 1,12,60,250] [--frames 600]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import write_video  # noqa: E402
+from lastframe.core import TAIL_LEAD_IN, TAIL_WINDOW, decode_tail  # noqa: E402
+
+
+def legacy_tail(cap, total_frames, window=TAIL_WINDOW):
+    """The old approach: one seek and one read per candidate frame."""
+    frames = []
+    for i in range(min(window, total_frames)):
+        frame_num = total_frames - 1 - i
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+        ret, frame = cap.read()
+        if ret:
+            frames.append((frame, frame_num))
+    return frames
+
+
+def modelled_decodes_legacy(total_frames, gop, window=TAIL_WINDOW):
+    return sum(
+        (total_frames - 1 - i) % gop + 1
+        for i in range(min(window, total_frames))
+    )
+
+
+def modelled_decodes_tail(total_frames, gop, window=TAIL_WINDOW, lead_in=TAIL_LEAD_IN):
+    start = max(0, total_frames - window - lead_in)
+    return start % gop + (total_frames - start)
+
+
+def time_it(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--gops", default="1,12,60,250")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split("x"))
+    gops = [int(g) for g in args.gops.split(",")]
+
+    print(f"{'gop':>6} {'decodes old':>12} {'decodes new':>12} "
+          f"{'old ms':>9} {'new ms':>9} {'speedup':>8} {'same':>5}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for gop in gops:
+            path = write_video(
+                Path(tmp) / f"gop{gop}.mp4", frames=args.frames,
+                width=width, height=height, gop=gop
+            )
+
+            def run_legacy():
+                cap = cv2.VideoCapture(str(path))
+                total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                frames = legacy_tail(cap, total)
+                cap.release()
+                return frames
+
+            def run_tail():
+                cap = cv2.VideoCapture(str(path))
+                total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                frames, _ = decode_tail(cap, total)
+                cap.release()
+                return frames
+
+            old_t, old_frames = time_it(run_legacy, args.repeat)
+            new_t, new_frames = time_it(run_tail, args.repeat)
+
+            same = (
+                [n for _, n in old_frames] == [n for _, n in new_frames]
+                and all((a == b).all() for (a, _), (b, _) in zip(old_frames, new_frames))
+            )
+
+            print(f"{gop:>6} {modelled_decodes_legacy(args.frames, gop):>12} "
+                  f"{modelled_decodes_tail(args.frames, gop):>12} "
+                  f"{old_t * 1000:>9.1f} {new_t * 1000:>9.1f} "
+                  f"{old_t / new_t:>7.2f}x {'yes' if same else 'no':>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Synthetic test videos for the lastframe benchmarks.
+
+Videos are generated locally so benchmark runs are reproducible and don't
+depend on sample files being checked in. When PyAV is installed it is used
+for codecs that need an explicit GOP length, otherwise cv2.VideoWriter is
+used with whatever GOP the encoder picks.
+"""
+from fractions import Fraction
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+try:
+    import av
+except ImportError:
+    av = None
+
+
+def make_frame(index, width, height):
+    """Render a deterministic, detailed frame so blur scores are meaningful."""
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+
+    # Checkerboard background gives plenty of edges
+    tile = max(8, width // 32)
+    ys, xs = np.indices((height, width))
+    board = ((xs // tile + ys // tile + index) % 2).astype(np.uint8) * 180
+    frame[:, :, 0] = board
+    frame[:, :, 1] = (xs * 255 // max(1, width - 1)).astype(np.uint8)
+    frame[:, :, 2] = (ys * 255 // max(1, height - 1)).astype(np.uint8)
+
+    cv2.putText(
+        frame, f"{index:05d}", (width // 10, height // 2),
+        cv2.FONT_HERSHEY_SIMPLEX, max(1.0, width / 320), (255, 255, 255),
+        max(2, width // 160)
+    )
+    return frame
+
+
+def write_video(path, frames=120, width=640, height=360, fps=30, gop=None,
+                fourcc="mp4v", blurry_tail=0, fade_tail=0, black_tail=0, codec="libx264",
+                bframes=0):
+    """
+    Write a synthetic test video.
+
+    Args:
+        path: Output file path
+        frames: Number of frames to write
+        width, height: Frame size
+        fps: Frame rate
+        gop: Keyframe interval. Needs PyAV to be honoured reliably.
+        fourcc: Codec for cv2.VideoWriter when PyAV isn't used
+        codec: PyAV encoder when gop is given, e.g. libx264, libx265,
+            libvpx-vp9 or libsvtav1
+        bframes: B-frames between reference frames (libx264 and libx265)
+        blurry_tail: Number of frames at the end that are heavily blurred
+        fade_tail: Number of frames, before the black tail, that fade the
+            picture out to black
+        black_tail: Number of black frames at the very end
+
+    Returns:
+        Path: The written file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    def frame_at(i):
+        frame = make_frame(i, width, height)
+        if i >= frames - blurry_tail:
+            frame = cv2.GaussianBlur(frame, (0, 0), 8)
+        fade_start = frames - black_tail - fade_tail
+        if i >= frames - black_tail:
+            frame = np.zeros_like(frame)
+        elif i >= fade_start:
+            frame = cv2.convertScaleAbs(frame, alpha=1 - (i - fade_start + 1) / (fade_tail + 1))
+        return frame
+
+    if gop is not None and av is not None:
+        container = av.open(str(path), "w")
+        stream = container.add_stream(codec, rate=fps)
+        stream.width = width
+        stream.height = height
+        stream.pix_fmt = "yuv420p"
+        stream.codec_context.gop_size = gop
+        if codec == "libx264":
+            stream.options = {"sc_threshold": "0", "bf": str(bframes), "preset": "ultrafast"}
+        elif codec == "libx265":
+            stream.options = {"preset": "ultrafast", "x265-params": (
+                f"keyint={gop}:min-keyint={gop}:scenecut=0:bframes={bframes}:log-level=error"
+            )}
+        elif codec == "libvpx-vp9":
+            stream.options = {"deadline": "realtime", "cpu-used": "8"}
+        elif codec == "libsvtav1":
+            stream.options = {"preset": "12"}
+
+        for i in range(frames):
+            video_frame = av.VideoFrame.from_ndarray(frame_at(i), format="bgr24")
+            for packet in stream.encode(video_frame):
+                container.mux(packet)
+
+        for packet in stream.encode():
+            container.mux(packet)
+        container.close()
+        return path
+
+    params = []
+    if gop is not None and hasattr(cv2, "VIDEOWRITER_PROP_KEY_INTERVAL"):
+        params = [cv2.VIDEOWRITER_PROP_KEY_INTERVAL, gop]
+
+    writer = cv2.VideoWriter(
+        str(path), cv2.CAP_FFMPEG, cv2.VideoWriter_fourcc(*fourcc), fps,
+        (width, height), params
+    )
+    if not writer.isOpened():
+        raise RuntimeError(f"cv2.VideoWriter could not open {path} with {fourcc}")
+
+    for i in range(frames):
+        writer.write(frame_at(i))
+    writer.release()
+    return path
+
+
+def write_vfr_video(path, segments, width=640, height=360, gop=250):
+    """
+    Write a variable frame rate H.264 MP4. Needs PyAV.
+
+    Args:
+        path: Output file path
+        segments: (frames, fps) pairs, played one after another
+        width, height: Frame size
+        gop: Keyframe interval
+
+    Returns:
+        Path: The written file
+    """
+    if av is None:
+        raise RuntimeError("variable frame rate videos need PyAV (pip install av)")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # A fine time base so every segment's frame duration is a whole number
+    time_base = Fraction(1, 90000)
+    container = av.open(str(path), "w")
+    stream = container.add_stream("libx264", rate=max(fps for _, fps in segments))
+    stream.width = width
+    stream.height = height
+    stream.pix_fmt = "yuv420p"
+    stream.codec_context.time_base = time_base
+    stream.codec_context.gop_size = gop
+    stream.options = {"sc_threshold": "0", "bf": "0", "preset": "ultrafast"}
+
+    index = 0
+    pts = 0
+    for frames, fps in segments:
+        for _ in range(frames):
+            video_frame = av.VideoFrame.from_ndarray(make_frame(index, width, height), format="bgr24")
+            video_frame.pts = pts
+            video_frame.time_base = time_base
+            for packet in stream.encode(video_frame):
+                container.mux(packet)
+            index += 1
+            pts += round(90000 / fps)
+
+    for packet in stream.encode():
+        container.mux(packet)
+    container.close()
+    return path
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: the single-file and batch paths over a synthetic corpus.
+
+The other scripts in this directory each look at one feature. This one
+runs the paths every change goes through, over a fixed set of generated
+videos, and saves the numbers as JSON so two runs can be compared:
+
+    python benchmarks/suite.py run --output before.json
+    ... change extract_last_frame or process_batch ...
+    python benchmarks/suite.py run --output after.json --baseline before.json
+    python benchmarks/suite.py compare before.json after.json
+
+The corpus (CASES) varies resolution from 480p to 4K, codec and container,
+keyframe interval, frame count and the length of the blurred tail. Videos
+are written with cv2.VideoWriter; cases that need a GOP length of their own
+are written with PyAV (cv2.VideoWriter's FFmpeg writer ignores the GOP
+length asked for) and are skipped when it isn't installed. The keyframe
+interval actually in each file is recorded next to the one asked for. --corpus keeps the videos in a folder to reuse on later runs.
+
+For every case, process_single_video (decode, score, encode and write the
+image, like `lastframe video.mp4`) is timed --repeat times after one
+untimed run under tracemalloc. Recorded: best and median seconds, frames
+decoded, container opens, the session's peak_frame_bytes, the peak of
+traced allocations, and the frame picked (marked ! when it is from the
+blurred tail). Then process_batch runs over the whole corpus once for
+every --jobs count: seconds, videos per second, frames decoded, the
+largest peak_frame_bytes of any video and, with one job (which runs in
+this process), the traced peak.
+
+compare (and run --baseline) reports a regression when a time grows by
+more than --tolerance and --min-seconds, when frames decoded, container
+opens or peak_frame_bytes grow at all, when the traced peak grows by more
+than --memory-tolerance, or when a case picks a different frame. It exits
+with status 1 if there is one, so it can gate CI. Times are only
+comparable between runs on the same machine; compare warns when the
+environments differ.
+
+Usage:
+    python benchmarks/suite.py run [--quick] [--output results.json] [--corpus DIR]
+                                   [--repeat 5] [--jobs 1,4] [--baseline before.json]
+    python benchmarks/suite.py compare before.json after.json [--tolerance 0.15]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Quieten FFmpeg's warnings about decoders it can't use
+os.environ.setdefault("OPENCV_FFMPEG_LOGLEVEL", "-8")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import av, write_video  # noqa: E402
+from lastframe import __version__  # noqa: E402
+from lastframe.cli import process_batch, process_single_video  # noqa: E402
+from lastframe.mp4 import read_index  # noqa: E402
+
+# Version of the results layout, bumped when keys change meaning
+SCHEMA = 1
+
+SIZES = {"480p": (854, 480), "720p": (1280, 720), "1080p": (1920, 1080), "2160p": (3840, 2160)}
+
+# Containers and how each codec is written: a cv2.VideoWriter FourCC, or a
+# PyAV encoder for cases with a GOP length
+CODECS = {
+    "mp4v": dict(fourcc="mp4v"),
+    "mjpg": dict(fourcc="MJPG"),
+    "xvid": dict(fourcc="XVID"),
+    "vp8": dict(fourcc="VP80"),
+    "h264": dict(codec="libx264"),
+}
+
+# (name, size, codec, extension, gop, frames, blurry tail, in --quick)
+# gop None keeps the writer's own: every 12 frames for MPEG-4 and Xvid, every
+# frame for MJPEG
+CASES = [
+    ("480p-mp4v", "480p", "mp4v", ".mp4", None, 300, 5, True),
+    ("720p-mp4v", "720p", "mp4v", ".mp4", None, 300, 5, False),
+    ("1080p-mp4v", "1080p", "mp4v", ".mp4", None, 150, 5, True),
+    ("2160p-mp4v", "2160p", "mp4v", ".mp4", None, 60, 3, False),
+    ("720p-mjpg", "720p", "mjpg", ".avi", None, 300, 5, True),
+    ("720p-xvid", "720p", "xvid", ".avi", None, 300, 5, False),
+    ("720p-vp8", "720p", "vp8", ".webm", None, 300, 5, False),
+    ("720p-h264-gop30", "720p", "h264", ".mp4", 30, 300, 5, True),
+    ("720p-h264-gop250", "720p", "h264", ".mp4", 250, 600, 5, False),
+    ("720p-h264-ts", "720p", "h264", ".ts", 120, 300, 5, False),
+    ("480p-mp4v-long", "480p", "mp4v", ".mp4", None, 3000, 5, False),
+    ("720p-mp4v-deep-blur", "720p", "mp4v", ".mp4", None, 300, 45, True),
+]
+
+# The default Laplacian threshold of 100 is tuned for camera footage; the
+# synthetic frames score about 200 at 480p down to 45 at 4K, and their
+# blurred tail below 2
+EXTRACT_OPTIONS = {"blur_threshold": 20.0, "max_depth": 60}
+
+# How results are compared: lower is better for all of them.
+# 'time' and 'memory' get a relative tolerance, 'exact' must not grow at all
+CASE_METRICS = {
+    "seconds": "time",
+    "frames_decoded": "exact",
+    "container_opens": "exact",
+    "peak_frame_bytes": "exact",
+    "peak_traced_bytes": "memory",
+}
+BATCH_METRICS = {
+    "seconds": "time",
+    "frames_decoded": "exact",
+    "peak_frame_bytes": "exact",
+    "peak_traced_bytes": "memory",
+}
+
+DEFAULT_TOLERANCE = 0.15
+DEFAULT_MEMORY_TOLERANCE = 0.10
+# Time differences smaller than this are noise whatever the ratio
+DEFAULT_MIN_SECONDS = 0.005
+
+
+def case_file(corpus_dir, case):
+    """Path of a case's video; the name holds every parameter, so a changed case is rewritten."""
+    name, size, codec, ext, gop, frames, blurry_tail, _ = case
+    return Path(corpus_dir) / f"{size}-{codec}-g{gop or 'default'}-n{frames}-b{blurry_tail}{ext}"
+
+
+def keyframe_interval(path):
+    """Most common distance between keyframes, from the MP4 index or PyAV, or None."""
+    keyframes = None
+    index = read_index(path)
+    if index is not None:
+        keyframes = [int(k) for k in index.keyframes]
+    elif av is not None:
+        with av.open(str(path)) as container:
+            packets = (p for p in container.demux(video=0) if p.size)
+            keyframes = [n for n, packet in enumerate(packets) if packet.is_keyframe]
+    if not keyframes or len(keyframes) < 2:
+        return None
+    gaps = np.diff(keyframes)
+    values, counts = np.unique(gaps, return_counts=True)
+    return int(values[np.argmax(counts)])
+
+
+def build_corpus(corpus_dir, cases):
+    """Write the videos that aren't in corpus_dir yet. Returns (case, path) pairs."""
+    built = []
+    for case in cases:
+        name, size, codec, ext, gop, frames, blurry_tail, _ = case
+        path = case_file(corpus_dir, case)
+        if not path.exists():
+            width, height = SIZES[size]
+            options = dict(CODECS[codec])
+            if gop is not None:
+                options["gop"] = gop
+            # Write next to the final name, so an interrupted run leaves no half video
+            partial = path.with_name(f"partial-{path.name}")
+            write_video(partial, frames=frames, width=width, height=height,
+                        blurry_tail=blurry_tail, **options)
+            partial.replace(path)
+        built.append((case, path))
+    return built
+
+
+def traced(fn, *args, **kwargs):
+    """(result, peak traced bytes) of one call."""
+    tracemalloc.start()
+    try:
+        result = fn(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def run_case(case, path, output_dir, repeat):
+    """Measurements of process_single_video on one video."""
+    name, size, codec, ext, gop, frames, blurry_tail, _ = case
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output = output_dir / f"{name}.jpg"
+
+    (success, result), peak_traced = traced(process_single_video, path, output, EXTRACT_OPTIONS)
+    record = {
+        "file": path.name,
+        "size": size,
+        "codec": codec,
+        "container": ext.lstrip("."),
+        "gop": gop,
+        "keyframe_interval": keyframe_interval(path),
+        "frames": frames,
+        "blurry_tail": blurry_tail,
+        "last_sharp_frame": frames - blurry_tail - 1,
+        "file_bytes": path.stat().st_size,
+    }
+    if not success:
+        record["error"] = result
+        return record
+
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        process_single_video(path, output, EXTRACT_OPTIONS)
+        times.append(time.perf_counter() - t0)
+
+    record.update({
+        "seconds": min(times),
+        "seconds_median": statistics.median(times),
+        "frames_decoded": result["frames_decoded"],
+        "container_opens": result["container_opens"],
+        "peak_frame_bytes": result["peak_frame_bytes"],
+        "peak_traced_bytes": peak_traced,
+        "frame_num": result["frame_num"],
+        "blur_score": round(result["blur_score"], 3),
+    })
+    return record
+
+
+def run_batch(input_dir, output_dir, jobs):
+    """Measurements of process_batch over every video in input_dir."""
+    outcomes = []
+
+    def emit(video_file, success, result):
+        outcomes.append((success, result))
+
+    def batch():
+        t0 = time.perf_counter()
+        process_batch(input_dir, output_dir, jobs=jobs, extract_options=EXTRACT_OPTIONS, emit=emit)
+        return time.perf_counter() - t0
+
+    if jobs == 1:
+        # One job decodes in this process, so tracemalloc sees its frames
+        seconds, peak_traced = traced(batch)
+    else:
+        seconds, peak_traced = batch(), None
+
+    done = [result for success, result in outcomes if success]
+    return {
+        "jobs": jobs,
+        "videos": len(outcomes),
+        "failed": len(outcomes) - len(done),
+        "seconds": seconds,
+        "videos_per_second": len(outcomes) / seconds if seconds else None,
+        "frames_decoded": sum(result["frames_decoded"] for result in done),
+        "peak_frame_bytes": max((result["peak_frame_bytes"] for result in done), default=0),
+        "peak_traced_bytes": peak_traced,
+    }
+
+
+def environment():
+    return {
+        "lastframe": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "pyav": av.__version__ if av is not None else None,
+    }
+
+
+def run(args):
+    jobs_counts = sorted({int(n) for n in args.jobs.split(",")})
+    cases = [case for case in CASES if case[7] or not args.quick]
+    skipped = [case[0] for case in cases if case[2] == "h264" and av is None]
+    cases = [case for case in cases if case[0] not in skipped]
+    if skipped:
+        print(f"skipping {', '.join(skipped)}: writing a GOP length needs PyAV (pip install av)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        corpus_dir = Path(args.corpus) if args.corpus else tmp / "corpus"
+        t0 = time.perf_counter()
+        built = build_corpus(corpus_dir, cases)
+        print(f"corpus: {len(built)} videos in {corpus_dir} ({time.perf_counter() - t0:.1f}s)\n")
+
+        print(f"{'case':<20} {'gop':>5} {'ms':>8} {'median':>8} {'decoded':>8} {'frames MB':>10} "
+              f"{'traced MB':>10} {'frame':>6}")
+        results = {}
+        for case, path in built:
+            record = run_case(case, path, tmp / "out", args.repeat)
+            results[case[0]] = record
+            if "error" in record:
+                print(f"{case[0]:<20} failed: {record['error']}")
+                continue
+            # The sharpest frame of the window is picked, which needn't be the
+            # last sharp one, but it must not be from the blurred tail
+            frame = str(record["frame_num"])
+            if record["frame_num"] > record["last_sharp_frame"]:
+                frame += "!"
+            print(f"{case[0]:<20} {record['keyframe_interval'] or '-':>5} {record['seconds'] * 1000:>8.1f} "
+                  f"{record['seconds_median'] * 1000:>8.1f} {record['frames_decoded']:>8} "
+                  f"{record['peak_frame_bytes'] / 1e6:>10.1f} {record['peak_traced_bytes'] / 1e6:>10.1f} "
+                  f"{frame:>6}")
+
+        # The batch sees only this run's cases, not older videos left in --corpus
+        batch_dir = tmp / "batch"
+        batch_dir.mkdir()
+        for case, path in built:
+            (batch_dir / path.name).symlink_to(path.resolve())
+
+        print(f"\n{'batch':<20} {'s':>8} {'videos/s':>9} {'decoded':>8} {'frames MB':>10} {'traced MB':>10}")
+        batches = {}
+        for jobs in jobs_counts:
+            record = run_batch(batch_dir, tmp / f"batch-out-{jobs}", jobs)
+            batches[f"jobs={jobs}"] = record
+            traced_mb = f"{record['peak_traced_bytes'] / 1e6:.1f}" if record["peak_traced_bytes"] else "-"
+            print(f"{f'{jobs} jobs':<20} {record['seconds']:>8.2f} {record['videos_per_second']:>9.2f} "
+                  f"{record['frames_decoded']:>8} {record['peak_frame_bytes'] / 1e6:>10.1f} {traced_mb:>10}"
+                  + (f"  {record['failed']} failed" if record["failed"] else ""))
+
+    report = {
+        "schema": SCHEMA,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": environment(),
+        "settings": {
+            "quick": args.quick,
+            "repeat": args.repeat,
+            "jobs": jobs_counts,
+            "extract_options": EXTRACT_OPTIONS,
+            "skipped": skipped,
+        },
+        "cases": results,
+        "batch": batches,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nresults written to {args.output}")
+
+    if args.baseline:
+        print()
+        baseline = json.loads(Path(args.baseline).read_text())
+        return report_comparison(baseline, report, args)
+    return 0
+
+
+def compare_metrics(kind_by_metric, old, new, args):
+    """(metric, old, new, verdict) for the metrics both records have; verdict is 'worse', 'better' or None."""
+    rows = []
+    for metric, kind in kind_by_metric.items():
+        before, after = old.get(metric), new.get(metric)
+        if before is None or after is None:
+            continue
+        if kind == "exact":
+            worse, better = after > before, after < before
+        else:
+            tolerance = args.tolerance if kind == "time" else args.memory_tolerance
+            floor = args.min_seconds if kind == "time" else 0
+            worse = after > before * (1 + tolerance) and after - before > floor
+            better = after < before * (1 - tolerance) and before - after > floor
+        rows.append((metric, before, after, "worse" if worse else "better" if better else None))
+    return rows
+
+
+def compare(baseline, current, args):
+    """
+    Compare two results files.
+
+    Returns:
+        (regressions, improvements, notes): lines describing each
+    """
+    regressions, improvements, notes = [], [], []
+
+    if baseline.get("schema") != current.get("schema"):
+        notes.append(f"results layout differs (schema {baseline.get('schema')} vs {current.get('schema')})")
+    for key in ("platform", "cpus", "python", "opencv", "pyav"):
+        before, after = baseline["environment"].get(key), current["environment"].get(key)
+        if before != after:
+            notes.append(f"environment differs, times may not be comparable: {key} {before} -> {after}")
+    if baseline["settings"].get("extract_options") != current["settings"].get("extract_options"):
+        notes.append("extract options differ")
+
+    def describe(label, metric, before, after):
+        change = f" ({(after - before) / before:+.0%})" if before else ""
+        if isinstance(before, float):
+            return f"{label} {metric}: {before:.4g} -> {after:.4g}{change}"
+        return f"{label} {metric}: {before} -> {after}{change}"
+
+    pairs = [(name, CASE_METRICS, baseline["cases"].get(name), record)
+             for name, record in current["cases"].items()]
+    pairs += [(f"batch {name}", BATCH_METRICS, baseline["batch"].get(name), record)
+              for name, record in current["batch"].items()]
+    for label, metrics, old, new in pairs:
+        if old is None:
+            notes.append(f"{label}: not in the baseline")
+            continue
+        if old.get("videos") != new.get("videos"):
+            notes.append(f"{label}: ran over {new['videos']} videos, {old['videos']} in the baseline; not compared")
+            continue
+        if "error" in new and "error" not in old:
+            regressions.append(f"{label}: now fails ({new['error']})")
+            continue
+        if new.get("failed", 0) > old.get("failed", 0):
+            regressions.append(f"{label}: {new['failed']} videos failed, {old['failed']} before")
+        for metric, before, after, verdict in compare_metrics(metrics, old, new, args):
+            if verdict == "worse":
+                regressions.append(describe(label, metric, before, after))
+            elif verdict == "better":
+                improvements.append(describe(label, metric, before, after))
+        # A speed-up that picks another frame isn't one
+        if old.get("frame_num") != new.get("frame_num"):
+            regressions.append(f"{label}: picked frame {new.get('frame_num')}, was {old.get('frame_num')}")
+
+    for name in baseline["cases"]:
+        if name not in current["cases"]:
+            notes.append(f"{name}: in the baseline but not run")
+    return regressions, improvements, notes
+
+
+def report_comparison(baseline, current, args):
+    regressions, improvements, notes = compare(baseline, current, args)
+    for line in notes:
+        print(f"note: {line}")
+    for line in improvements:
+        print(f"better: {line}")
+    for line in regressions:
+        print(f"REGRESSION: {line}")
+    if regressions:
+        print(f"\n{len(regressions)} regressions (time tolerance {args.tolerance:.0%}, "
+              f"memory {args.memory_tolerance:.0%})")
+        return 1
+    print(f"no regressions ({len(improvements)} improvements)")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    tolerances = argparse.ArgumentParser(add_help=False)
+    tolerances.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                            help="relative slow-down counted as a regression")
+    tolerances.add_argument("--memory-tolerance", type=float, default=DEFAULT_MEMORY_TOLERANCE,
+                            help="relative growth of the traced peak counted as a regression")
+    tolerances.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS,
+                            help="time differences below this are never regressions")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", parents=[tolerances], help="run the suite")
+    run_parser.add_argument("--quick", action="store_true", help="only the cases marked quick")
+    run_parser.add_argument("--output", help="write the results to this JSON file")
+    run_parser.add_argument("--corpus", help="keep the generated videos in this folder and reuse them")
+    run_parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    run_parser.add_argument("--jobs", default=",".join(sorted({"1", str(os.cpu_count() or 1)})),
+                            help="comma-separated worker counts for the batch runs")
+    run_parser.add_argument("--baseline", help="compare with this results file afterwards")
+
+    compare_parser = commands.add_parser("compare", parents=[tolerances], help="compare two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        sys.exit(run(args))
+    baseline = json.loads(Path(args.baseline).read_text())
+    current = json.loads(Path(args.results).read_text())
+    sys.exit(report_comparison(baseline, current, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -27,7 +27,9 @@ def build_executable():
         "--onefile",
         "--clean",
         "--noconfirm",
-        "lastframe/cli.py"
+        # cli.py uses relative imports, so build from the package entry point
+        "--paths=.",
+        "lastframe/__main__.py"
     ]
 
     print(f"Running: {' '.join(cmd)}")
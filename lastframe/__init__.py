@@ -1,2 +1,21 @@
 """lastframe - Extract the last non-blurry frame from videos"""
 __version__ = "1.1.0"
+
+# The library API, loaded on first use so `import lastframe` (and the CLI,
+# which imports this package first) doesn't pay for OpenCV up front
+_CORE_API = {'ExtractionResult', 'VideoSession', 'calculate_blur_score', 'extract_last_frame', 'get_video_info'}
+_PLANNER_API = {'extract_targets'}
+_STREAM_API = {'extract_stream_frame'}
+
+
+def __getattr__(name):
+    if name in _CORE_API:
+        from . import core
+        return getattr(core, name)
+    if name in _PLANNER_API:
+        from . import planner
+        return getattr(planner, name)
+    if name in _STREAM_API:
+        from . import stream
+        return getattr(stream, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
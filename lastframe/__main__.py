@@ -0,0 +1,9 @@
+"""Entry point for `python -m lastframe` and the standalone build."""
+from lastframe.cli import main
+
+if __name__ == "__main__":
+    import multiprocessing
+
+    # Needed for the process pool in PyInstaller builds
+    multiprocessing.freeze_support()
+    main()
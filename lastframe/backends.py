@@ -0,0 +1,324 @@
+"""
+Decoder backends: what opens a video and decodes its frames.
+
+Extraction talks to a video only through the part of the cv2.VideoCapture
+interface it needs, so anything that offers the same calls can decode:
+
+    isOpened(), release()
+    grab()            Decode the next frame
+    retrieve()        (ok, frame) for the frame just grabbed, as BGR uint8
+    read()            grab() and retrieve() in one
+    get(prop)         CAP_PROP_FRAME_COUNT, CAP_PROP_FPS, CAP_PROP_FRAME_WIDTH,
+                      CAP_PROP_FRAME_HEIGHT, CAP_PROP_FOURCC, CAP_PROP_POS_FRAMES
+                      (number of the next frame) and CAP_PROP_POS_MSEC
+                      (timestamp of the frame just grabbed)
+    set(prop, value)  CAP_PROP_POS_FRAMES: the next grab() returns that frame
+
+A backend is a function from a source (a path, or 'pipe:N' for a stream)
+to such a capture:
+
+    opencv   cv2.VideoCapture itself (the default)
+    pyav     PyAV 12 or newer (pip install av), only offered when it is installed.
+             Seeks by timestamp straight to the keyframe before the target,
+             skips decoding the non-reference frames between that keyframe
+             and the target, and decodes with frame and slice threads.
+
+register_backend adds one.
+"""
+import re
+
+import cv2
+
+DEFAULT_BACKEND = 'opencv'
+
+# Oldest PyAV release the pyav backend is tested with
+PYAV_MIN_VERSION = (12, 0)
+
+# FourCC reported for PyAV decoders (by decoder name): OpenCV reports the
+# codec's, not the container's tag, so video info and CODEC_COST match
+# across backends
+PYAV_FOURCC = {
+    'h264': 'h264', 'hevc': 'hevc', 'vp9': 'vp90', 'vp8': 'vp80', 'mpeg4': 'fmp4',
+    'mjpeg': 'mjpg', 'av1': 'av01', 'libdav1d': 'av01', 'libaom-av1': 'av01',
+}
+
+# Decoders that check skip_frame on every frame, so non-reference frames can
+# be skipped up to a seek target. Others (libdav1d) only read it when opened
+PYAV_SKIP_NONREF = {'h264', 'hevc', 'mpeg4', 'vp8', 'vp9'}
+
+# When a seek lands after the frame asked for (containers without an index
+# seek approximately), seek again this many seconds earlier, doubling each
+# time; past the start, the container is reopened to read from its first byte
+PYAV_SEEK_BACKOFF = 1.0
+
+
+def _open_opencv(source, stream=False):
+    # Other OpenCV backends would try to read a pipe or FIFO too
+    if stream:
+        return cv2.VideoCapture(str(source), cv2.CAP_FFMPEG)
+    return cv2.VideoCapture(str(source))
+
+
+class PyAVCapture:
+    """
+    A video decoded with PyAV, behind the cv2.VideoCapture calls extraction uses.
+
+    Args:
+        source: Path, or an FFmpeg URL such as 'pipe:0'
+        stream: Accepted for the backend interface; PyAV reads pipes as is
+        threads: Decoder threads, 0 to let FFmpeg pick one per CPU
+    """
+
+    def __init__(self, source, stream=False, threads=0):
+        self._source = str(source)
+        self._threads = threads
+        self.container = None
+        self.stream = None
+        if not self._open():
+            return
+
+        self._time_base = float(self.stream.time_base)
+        self._start = self.stream.start_time or 0
+        rate = self.stream.average_rate or self.stream.guessed_rate
+        self._fps = float(rate) if rate else 0.0
+        self._codec = self.stream.codec_context.codec.name
+        self._skip_nonref = self._codec in PYAV_SKIP_NONREF
+
+        self._frames = None
+        self._frame = None
+        self._next = 0
+        # Set by a seek: the frame to decode up to, and until its first frame
+        # is decoded, where the seek went and how much further back to retry
+        self._target = None
+        self._target_pts = None
+        self._seek_seconds = None
+        self._backoff = PYAV_SEEK_BACKOFF
+        # Set after a rewind, when decoding starts at the first packet
+        self._from_start = False
+
+    def _open(self):
+        import av
+
+        self._error = av.FFmpegError
+        try:
+            self.container = av.open(self._source)
+            self.stream = self.container.streams.video[0]
+        except (OSError, IndexError, av.FFmpegError):
+            self.release()
+            return False
+        self.stream.thread_type = 'AUTO'
+        self.stream.thread_count = self._threads
+        return True
+
+    def isOpened(self):
+        return self.container is not None
+
+    def release(self):
+        if self.container is not None:
+            self.container.close()
+        self.container = None
+        self.stream = None
+        self._frames = None
+        self._frame = None
+
+    def _frame_number(self, frame):
+        """Frame number of a decoded frame, from its timestamp."""
+        if frame.pts is None or not self._fps:
+            return self._next
+        return max(0, round((frame.pts - self._start) * self._time_base * self._fps))
+
+    def _decode(self):
+        """Decoded frames from the current position."""
+        context = self.stream.codec_context
+        # Seeks without a keyframe index (MPEG-TS) can land mid-GOP, where
+        # nothing decodes until the next keyframe
+        keyframe = self._target is None or self._from_start
+        self._from_start = False
+        try:
+            for packet in self.container.demux(self.stream):
+                if not keyframe:
+                    if not packet.is_keyframe:
+                        continue
+                    keyframe = True
+                # Nothing references a non-reference frame, so one before the
+                # seek target never needs decoding
+                if self._skip_nonref:
+                    skip = self._target_pts is not None and packet.pts is not None and packet.pts < self._target_pts
+                    context.skip_frame = 'NONREF' if skip else 'DEFAULT'
+                try:
+                    frames = packet.decode()
+                except self._error:
+                    # A damaged packet: go on with the next, as OpenCV does
+                    continue
+                yield from frames
+        except self._error:
+            return
+
+    def _seek(self, seconds):
+        """Seek to the keyframe at or before `seconds` from the start."""
+        self._seek_seconds = max(0.0, seconds)
+        self.container.seek(
+            self._start + int(self._seek_seconds / self._time_base),
+            stream=self.stream, backward=True, any_frame=False
+        )
+        self._frames = None
+
+    def _seek_earlier(self):
+        """Start again before the last seek, which landed past the target."""
+        if self._seek_seconds > 0:
+            self._seek(self._seek_seconds - self._backoff)
+            self._backoff *= 2
+            return True
+        # A seek to the start time can still land after the first keyframe
+        # (with B-frames the first frame shown isn't the first decoded), so
+        # read from the first byte, where every packet can be decoded
+        self.release()
+        if not self._open():
+            return False
+        self._seek_seconds = None
+        self._from_start = True
+        return True
+
+    def grab(self):
+        if self.container is None:
+            return False
+        while True:
+            if self._frames is None:
+                self._frames = self._decode()
+            frame = next(self._frames, None)
+            if frame is None:
+                if self._target is not None and self._seek_seconds is not None:
+                    # Landed after the last keyframe: start further back
+                    if self._seek_earlier():
+                        continue
+                self._frame = None
+                return False
+            if self._target is None:
+                frame_num = self._next
+                break
+
+            frame_num = self._frame_number(frame)
+            if frame_num > self._target and self._seek_seconds is not None:
+                # Landed past the target: start further back
+                if self._seek_earlier():
+                    continue
+                self._frame = None
+                return False
+            # Only the first frame after a seek can land past the target
+            self._seek_seconds = None
+            if frame_num >= self._target:
+                self._target = self._target_pts = None
+                break
+
+        self._frame = frame
+        self._next = frame_num + 1
+        return True
+
+    def retrieve(self):
+        if self._frame is None:
+            return False, None
+        return True, self._frame.to_ndarray(format='bgr24')
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def get(self, prop):
+        if self.stream is None:
+            return 0.0
+        context = self.stream.codec_context
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            if self.stream.frames:
+                return float(self.stream.frames)
+            if self.stream.duration:
+                seconds = self.stream.duration * self._time_base
+            else:
+                seconds = (self.container.duration or 0) / 1e6
+            return float(round(seconds * self._fps))
+        if prop == cv2.CAP_PROP_FPS:
+            return self._fps
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(context.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(context.height)
+        if prop == cv2.CAP_PROP_FOURCC:
+            tag = PYAV_FOURCC.get(self._codec, '')
+            return float(int.from_bytes(tag.encode('ascii'), 'little'))
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._next)
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            if self._frame is None or self._frame.pts is None:
+                return 0.0
+            return (self._frame.pts - self._start) * self._time_base * 1000
+        return 0.0
+
+    def set(self, prop, value):
+        if self.container is None or prop != cv2.CAP_PROP_POS_FRAMES:
+            return False
+        target = max(0, int(value))
+        seconds = target / self._fps if self._fps else 0.0
+        self._seek(seconds)
+        self._backoff = PYAV_SEEK_BACKOFF
+        self._target = target
+        # Half a frame early, so rounding never skips the target itself
+        self._target_pts = self._start + int((target - 0.5) / self._fps / self._time_base) if self._fps else None
+        self._next = target
+        self._frame = None
+        return True
+
+
+def _pyav_installed():
+    # Only imported here: importlib.metadata pulls in email and zipfile
+    import importlib.metadata
+
+    try:
+        version = importlib.metadata.version('av')
+    except importlib.metadata.PackageNotFoundError:
+        return False
+    return tuple(int(part) for part in re.findall(r'\d+', version)[:2]) >= PYAV_MIN_VERSION
+
+
+# Decoder backends by name: a function (source, stream=False) -> capture,
+# and a check that it can be used here
+DECODER_BACKENDS = {
+    'opencv': (_open_opencv, lambda: True),
+    'pyav': (PyAVCapture, _pyav_installed),
+}
+
+
+def register_backend(name, open_capture, available=lambda: True):
+    """
+    Register a decoder backend.
+
+    Args:
+        name: Name used with --backend and backend=...
+        open_capture: Function taking a source (path or 'pipe:N') and
+            stream=True for pipes, returning a capture with the
+            cv2.VideoCapture calls listed in this module's docstring
+        available: Function telling whether the backend can be used here
+    """
+    DECODER_BACKENDS[name] = (open_capture, available)
+
+
+def available_backends():
+    """Names of the backends that can be used here."""
+    return sorted(name for name, (_, available) in DECODER_BACKENDS.items() if available())
+
+
+def get_backend(name=None):
+    """Look up a decoder backend (None for the default). Returns its open function."""
+    name = name or DEFAULT_BACKEND
+    try:
+        open_capture, available = DECODER_BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown decoder backend '{name}' "
+            f"(available: {', '.join(available_backends())})"
+        )
+    if not available():
+        raise ValueError(
+            f"Decoder backend '{name}' isn't installed or is too old "
+            f"(for pyav: pip install \"av>={'.'.join(map(str, PYAV_MIN_VERSION))}\")"
+        )
+    return open_capture
@@ -0,0 +1,174 @@
+"""
+Persistent result cache for batch runs.
+
+Re-running lastframe over an archive that hasn't changed shouldn't open a
+single video. Results are stored in a small SQLite index next to the
+output, keyed by the video's path, size, modification time and the
+extraction settings. A lookup is one stat() plus one primary-key query.
+
+Results are written as each video finishes, so a batch that crashes or is
+interrupted picks up where it left off on the next run.
+"""
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+CACHE_FILENAME = ".lastframe-cache.sqlite"
+
+# Entries kept in the index; the least recently used are dropped beyond this
+DEFAULT_MAX_ENTRIES = 100000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    settings TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    frame_num INTEGER NOT NULL,
+    blur_score REAL,
+    status TEXT NOT NULL,
+    video_info TEXT,
+    last_used REAL NOT NULL
+)
+"""
+
+
+def settings_key(settings):
+    """Serialize extraction settings into a stable string for the cache key."""
+    return json.dumps(settings or {}, sort_keys=True, default=str)
+
+
+class ResultCache:
+    """
+    SQLite index of successfully processed videos.
+
+    Args:
+        directory: Directory the index file lives in (usually the output directory)
+        settings: Extraction settings; entries made with other settings are misses
+        max_entries: Maximum number of entries kept when the cache is closed
+    """
+
+    def __init__(self, directory, settings=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = Path(directory) / CACHE_FILENAME
+        self.settings = settings_key(settings)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def _key(video_path):
+        """Return (path, size, mtime_ns) for a video, or None if it's gone."""
+        path = os.path.abspath(str(video_path))
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return path, st.st_size, st.st_mtime_ns
+
+    def lookup(self, video_path, output_path):
+        """
+        Return the cached result for an unchanged video, or None.
+
+        A hit needs the same size, mtime, settings and output path, and the
+        output image must still exist.
+        """
+        key = self._key(video_path)
+        if key is None:
+            self.misses += 1
+            return None
+
+        path, size, mtime_ns = key
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, settings, output_path, frame_num, blur_score, "
+            "status, video_info FROM results WHERE path = ?",
+            (path,)
+        ).fetchone()
+
+        if (
+            row is None
+            or row[0] != size
+            or row[1] != mtime_ns
+            or row[2] != self.settings
+            or row[3] != str(output_path)
+            or not os.path.exists(row[3])
+        ):
+            self.misses += 1
+            return None
+
+        self._conn.execute(
+            "UPDATE results SET last_used = ? WHERE path = ?", (time.time(), path)
+        )
+        self.hits += 1
+
+        return {
+            'output_file': Path(row[3]),
+            'frame_num': row[4],
+            'blur_score': row[5],
+            'status': row[6],
+            'video_info': json.loads(row[7]) if row[7] else None,
+            'container_opens': 0,
+            'frames_decoded': 0,
+            'cached': True
+        }
+
+    def store(self, video_path, result):
+        """Record a successful result from process_single_video."""
+        key = self._key(video_path)
+        if key is None:
+            return
+
+        path, size, mtime_ns = key
+        blur_score = result.get('blur_score')
+
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results (path, size, mtime_ns, settings, output_path, "
+            "frame_num, blur_score, status, video_info, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                path, size, mtime_ns, self.settings, str(result['output_file']),
+                int(result['frame_num']),
+                float(blur_score) if blur_score is not None else None,
+                result['status'],
+                json.dumps(result.get('video_info')),
+                time.time()
+            )
+        )
+        # Commit right away so an interrupted batch can resume from here
+        self._conn.commit()
+
+    def clear(self):
+        """Drop every entry, forcing all videos to be processed again."""
+        self._conn.execute("DELETE FROM results")
+        self._conn.commit()
+
+    def prune(self):
+        """Drop the least recently used entries beyond max_entries."""
+        self._conn.execute(
+            "DELETE FROM results WHERE path IN ("
+            "SELECT path FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        self._conn.commit()
+
+    def close(self):
+        """Prune and close the index."""
+        if self._conn is None:
+            return
+        self.prune()
+        self._conn.close()
+        self._conn = None
@@ -4,262 +4,1054 @@ lastframe - Extract the last non-blurry frame from videos
 """
 import sys
 import os
-import glob
+import argparse
+import time
+from fnmatch import fnmatch
 from pathlib import Path
-import cv2
-import numpy as np
 from rich.console import Console
 from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 from rich.text import Text
-from rich.table import Table
 
-console = Console()
+from .cache import DEFAULT_MAX_ENTRIES
+from .dedup import duplicate_path, fingerprint, frame_hash, link_output, near_duplicates
+from .output import (
+    DEFAULT_OUTPUT_OPTIONS, IMAGE_FORMATS, batch_output_path, default_output_path,
+    list_output_path, output_format, parse_sizes, primary_output_path, target_output_path,
+    write_atomic
+)
+from .schedule import DEFAULT_POLICY, SCHEDULE_POLICIES, get_policy, schedule_jobs
+from .summary import build_summary, write_summary
 
-VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv', '.wmv', '.m4v', '.mpg', '.mpeg', '.3gp'}
+# OpenCV, numpy, the process pool and the larger rich widgets are imported
+# where they are used, so --help and argument errors don't wait for them.
+# The extraction code itself lives in core, which doesn't need rich at all.
 
-def calculate_blur_score(frame):
-    """
-    Calculate blur score using Laplacian variance.
-    Higher score = sharper image. Lower score = more blurry.
-    """
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
-    return laplacian_var
-
-def get_video_info(video_path):
-    """Get basic video information."""
-    cap = cv2.VideoCapture(str(video_path))
-    if not cap.isOpened():
-        return None
+console = Console()
 
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+# Names that moved to lastframe.core, still importable from here
+_CORE_NAMES = {
+    'TAIL_WINDOW', 'TAIL_LEAD_IN', 'calculate_blur_score', 'tenengrad_score', 'fft_score',
+    'FFT_LOW_FREQ_RADIUS', 'SHARPNESS_METRICS', 'DEFAULT_METRIC', 'register_metric',
+    'get_metric', 'PYRAMID_SIZE', 'PYRAMID_MARGIN', 'PYRAMID_MODES', 'score_frames',
+    'VideoSession', 'get_video_info', 'decode_range', 'decode_tail', 'ExtractionResult',
+    'select_frame', 'extract_last_frame', 'encode_frame', 'resize_frame', 'encode_renditions',
+}
+
+def __getattr__(name):
+    if name in _CORE_NAMES:
+        from . import core
+        return getattr(core, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    cap.release()
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv', '.wmv', '.m4v', '.mpg', '.mpeg', '.3gp'}
 
-    return {
-        'total_frames': total_frames,
-        'fps': fps,
-        'width': width,
-        'height': height
-    }
+def _matches_any(relative_path, patterns):
+    """True if a slash-separated relative path matches one of the globs."""
+    name = relative_path.rsplit('/', 1)[-1]
+    return any(fnmatch(relative_path, p) or fnmatch(name, p) for p in patterns)
 
-def extract_last_frame(video_path, blur_threshold=100):
+def iter_videos(directory_path, recursive=False, include=None, exclude=None):
     """
-    Extract the last non-blurry frame from a video.
+    Yield video files under a directory as they are found.
+
+    Each directory is read once with os.scandir and its entries are sorted
+    by name, so the order is stable between runs while matches still come
+    out before the rest of the tree has been scanned.
 
     Args:
-        video_path: Path to the video file
-        blur_threshold: Minimum blur score to consider a frame sharp
+        directory_path: Directory to scan
+        recursive: Also scan subdirectories
+        include: Glob patterns a video must match (relative path or name)
+        exclude: Glob patterns to skip; matching directories aren't entered
 
-    Returns:
-        tuple: (frame, frame_number, blur_score, status_message)
+    Yields:
+        Path: Video files
     """
-    cap = cv2.VideoCapture(str(video_path))
+    root = Path(directory_path)
+    include = list(include or [])
+    exclude = list(exclude or [])
+
+    # Directories still to scan, as (path, path relative to root)
+    stack = [(root, '')]
 
-    if not cap.isOpened():
-        return None, None, None, "Failed to open video file"
+    while stack:
+        directory, relative = stack.pop()
 
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
 
-    # Check last 3 frames
-    candidates = []
-    frames_to_check = min(3, total_frames)
+        subdirs = []
+        for entry in entries:
+            entry_relative = f"{relative}{entry.name}"
 
-    for i in range(frames_to_check):
-        frame_num = total_frames - 1 - i
-        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
-        ret, frame = cap.read()
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
 
-        if ret:
-            blur_score = calculate_blur_score(frame)
-            candidates.append((frame, frame_num, blur_score))
+            if is_dir:
+                if recursive and not _matches_any(entry_relative, exclude):
+                    subdirs.append((Path(entry.path), f"{entry_relative}/"))
+                continue
 
-    cap.release()
+            if os.path.splitext(entry.name)[1].lower() not in VIDEO_EXTENSIONS:
+                continue
+            if include and not _matches_any(entry_relative, include):
+                continue
+            if exclude and _matches_any(entry_relative, exclude):
+                continue
 
-    if not candidates:
-        return None, None, None, "No frames could be extracted"
+            yield Path(entry.path)
 
-    # Sort by blur score (highest first)
-    candidates.sort(key=lambda x: x[2], reverse=True)
+        # Pushed in reverse so subdirectories are visited in name order
+        stack.extend(reversed(subdirs))
 
-    # Get the sharpest frame
-    best_frame, best_frame_num, best_blur_score = candidates[0]
+def iter_list(list_path, include=None, exclude=None):
+    """
+    Yield the videos named in a manifest, one path per line.
 
-    # Determine which frame we used
-    frame_position = total_frames - 1 - best_frame_num
+    list_path '-' reads standard input, so another program can feed videos
+    while they are being processed. Blank lines and lines starting with #
+    are skipped. Paths aren't filtered by extension, only by include and
+    exclude globs.
+    """
+    include = list(include or [])
+    exclude = list(exclude or [])
 
-    if frame_position == 0:
-        status = f"last frame (sharp ✨ score: {best_blur_score:.1f})"
-    elif best_blur_score < blur_threshold:
-        # All frames are blurry, use last by default
-        best_frame, best_frame_num, best_blur_score = candidates[-1]
-        status = f"last frame (all frames blurry ⚠️  score: {best_blur_score:.1f})"
-    elif frame_position == 1:
-        status = f"2nd last frame (last was blurry 🔍 score: {best_blur_score:.1f})"
-    elif frame_position == 2:
-        status = f"3rd last frame (last 2 were blurry 🔍 score: {best_blur_score:.1f})"
-    else:
-        status = f"frame #{best_frame_num + 1} (score: {best_blur_score:.1f})"
+    f = sys.stdin if list_path == '-' else open(list_path, encoding='utf-8')
+    try:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            relative = Path(line).as_posix()
+            if include and not _matches_any(relative, include):
+                continue
+            if exclude and _matches_any(relative, exclude):
+                continue
+
+            yield Path(line)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def in_shard(key, shard):
+    """
+    True if an input belongs to shard (index, count), 1-based.
+
+    Uses a hash of the key rather than Python's salted hash(), so every node
+    and every re-run assigns each input to the same shard without talking
+    to each other.
+    """
+    import hashlib
 
-    return best_frame, best_frame_num, best_blur_score, status
+    index, count = shard
+    digest = hashlib.sha1(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count == index - 1
 
-def find_videos_in_directory(directory_path):
+def find_videos_in_directory(directory_path, recursive=False, include=None, exclude=None):
     """Find all video files in a directory."""
-    video_files = []
     directory = Path(directory_path)
 
     if not directory.exists():
         return []
 
-    for ext in VIDEO_EXTENSIONS:
-        video_files.extend(directory.glob(f"*{ext}"))
-        video_files.extend(directory.glob(f"*{ext.upper()}"))
+    return list(iter_videos(directory, recursive, include, exclude))
+
+def analyze_video(video_path, extract_options=None, stream=None):
+    """
+    Open a video, probe it and pick the frame to save.
+
+    This is the decode half of process_single_video. Returns (True, result)
+    with the chosen 'frame' in the result dict, or (False, error_message).
+
+    With 'targets' in extract_options every target is extracted in one
+    decode pass. The first target's frame is the chosen frame; the others
+    come back as 'target_frames' and all of them are described in 'targets'.
 
-    return sorted(video_files)
+    With stream, a dict of StreamSession options (follow, settle), the video
+    is decoded front to back as a stream instead (see lastframe.stream), and
+    video_path may be '-' for standard input.
+    """
+    from .core import VideoSession, extract_last_frame
 
-def process_single_video(video_path, output_path=None):
-    """Process a single video file."""
     video_path = Path(video_path)
+    extract_options = dict(extract_options or {})
+    targets = extract_options.pop('targets', None)
+    backend = extract_options.pop('backend', None)
 
-    # Get video info
-    try:
-        video_info = get_video_info(video_path)
-    except Exception as e:
-        return False, f"Failed to analyze: {str(e)}"
+    if stream is not None:
+        from .stream import StreamSession, extract_stream_frame
+
+        if targets:
+            return False, "--targets needs a seekable file, not a stream"
+
+        # A stream is read once, front to back; its length is only known at the end
+        with StreamSession(video_path, backend=backend, **stream) as session:
+            try:
+                extraction = extract_stream_frame(session, **extract_options)
+            except Exception as e:
+                return False, f"Frame extraction failed: {str(e)}"
+            frame, frame_num, blur_score, status = extraction
+
+            video_info = session.info
+            container_opens = session.opens
+            frames_decoded = session.decode_stats['grabbed']
+            peak_frame_bytes = session.peak_frame_bytes
+            prefilter_counts = session.prefilter_counts
+            stage_seconds = session.stage_seconds()
+    else:
+        # Open the video once for both probing and extraction
+        with VideoSession(video_path, backend) as session:
+            # Get video info
+            try:
+                video_info = session.info
+            except Exception as e:
+                return False, f"Failed to analyze: {str(e)}"
 
-    if not video_info:
-        return False, "Cannot open video file"
+            if not video_info:
+                return False, "Cannot open video file"
 
-    if video_info['total_frames'] == 0:
-        return False, "Empty video file"
+            if video_info['total_frames'] == 0:
+                return False, "Empty video file"
 
-    # Extract frame
-    try:
-        frame, frame_num, blur_score, status = extract_last_frame(video_path)
-    except Exception as e:
-        return False, f"Frame extraction failed: {str(e)}"
+            # Extract frame
+            try:
+                if targets:
+                    from .planner import extract_targets
+                    planned = extract_targets(session, targets, **extract_options)
+                    extraction = planned[0][1][0]
+                else:
+                    extraction = extract_last_frame(session, **extract_options)
+            except Exception as e:
+                return False, f"Frame extraction failed: {str(e)}"
+            frame, frame_num, blur_score, status = extraction
+
+            container_opens = session.opens
+            frames_decoded = session.decode_stats['grabbed']
+            peak_frame_bytes = session.peak_frame_bytes
+            prefilter_counts = session.prefilter_counts
+            stage_seconds = session.stage_seconds()
 
     if frame is None:
         return False, status
 
+    result = {
+        'frame': frame,
+        'status': status,
+        'video_info': video_info,
+        'frame_num': frame_num,
+        'blur_score': float(blur_score),
+        'candidate_scores': [[n, float(score)] for n, score in extraction.candidates],
+        'container_opens': container_opens,
+        'frames_decoded': frames_decoded,
+        'peak_frame_bytes': peak_frame_bytes,
+        'frame_hash': frame_hash(frame),
+        'stage_seconds': stage_seconds
+    }
+    if prefilter_counts is not None:
+        result['prefilter'] = dict(prefilter_counts)
+
+    if targets:
+        from .planner import target_label
+
+        result['targets'] = []
+        result['target_frames'] = []
+        for target, target_results in planned:
+            for rank, target_result in enumerate(target_results, 1):
+                found = target_result.frame is not None
+                label = target_label(target, rank)
+                # Repeated targets (last,last or two top=K) need distinct names
+                taken = {entry['label'] for entry in result['targets']}
+                if label in taken:
+                    label = next(f"{label}-{n}" for n in range(2, len(taken) + 2) if f"{label}-{n}" not in taken)
+                # The first target's frame is saved under the plain output name
+                if found and target_result is not extraction:
+                    result['target_frames'].append((len(result['targets']), label, target_result.frame))
+                result['targets'].append({
+                    'target': target['spec'],
+                    'label': label,
+                    'frame_num': target_result.frame_num,
+                    'blur_score': float(target_result.blur_score) if found else None,
+                    'status': target_result.status,
+                    'output': None,
+                })
+
+    return True, result
+
+def _encode_outputs(result, output_file, output_options=None):
+    """
+    Encode the chosen frame, the frames of any other targets and the
+    contact sheet. Pops the frames from result and records each target's
+    output name in result['targets']. Returns a list of (path, encoded_bytes)
+    with the chosen frame's renditions first.
+    """
+    from .core import encode_frame, encode_renditions
+
+    output_options = output_options or {}
+    frame = result.pop('frame')
+    target_frames = result.pop('target_frames', [])
+
+    renditions = encode_renditions(frame, output_file, output_options)
+    if result.get('targets'):
+        result['targets'][0]['output'] = str(renditions[0][0])
+
+    for entry, label, target_frame in target_frames:
+        target_renditions = encode_renditions(
+            target_frame, target_output_path(output_file, label), output_options
+        )
+        result['targets'][entry]['output'] = str(target_renditions[0][0])
+        renditions.extend(target_renditions)
+
+    if output_options.get('contact_sheet') and result.get('targets'):
+        from .planner import contact_sheet
+
+        frames = [frame] + [target_frame for _, _, target_frame in target_frames]
+        found = [entry for entry in result['targets'] if entry['frame_num'] is not None]
+        tiles = [
+            (f"{entry['label']}  #{entry['frame_num']}  {entry['blur_score']:.0f}", tile)
+            for entry, tile in zip(found, frames)
+        ]
+        sheet_file = target_output_path(output_file, 'sheet')
+        renditions.append((
+            sheet_file,
+            encode_frame(contact_sheet(tiles), output_format(output_options, sheet_file), output_options)
+        ))
+
+    return renditions
+
+def process_single_video(video_path, output_path=None, extract_options=None, output_options=None,
+                         stream=None):
+    """
+    Process a single video file.
+
+    extract_options are passed on to extract_last_frame as keyword arguments;
+    output_options pick the image format and sizes (see DEFAULT_OUTPUT_OPTIONS).
+    stream reads the video as a stream (see analyze_video).
+    """
+    video_path = Path(video_path)
+
+    success, result = analyze_video(video_path, extract_options, stream)
+    if not success:
+        return False, result
+
     # Determine output path
     if output_path:
         output_file = Path(output_path)
     else:
-        output_filename = video_path.stem + "_lastframe.jpg"
-        output_file = video_path.parent / output_filename
+        output_file = default_output_path(video_path, output_options)
 
     # Save frame
     try:
-        success = cv2.imwrite(
-            str(output_file),
-            frame,
-            [cv2.IMWRITE_JPEG_QUALITY, 100]
-        )
-        if not success:
+        start = time.perf_counter()
+        try:
+            renditions = _encode_outputs(result, output_file, output_options)
+        except IOError:
             return False, "Failed to save image"
+        encoded = time.perf_counter()
+
+        result['bytes_written'] = sum(write_atomic(path, data) for path, data in renditions)
+        result['stage_seconds']['encode'] = encoded - start
+        result['stage_seconds']['write'] = time.perf_counter() - encoded
     except Exception as e:
         return False, f"Save failed: {str(e)}"
 
-    return True, {
-        'output_file': output_file,
-        'status': status,
-        'video_info': video_info,
-        'frame_num': frame_num
+    result['output_file'] = renditions[0][0]
+    result['output_files'] = [path for path, _ in renditions]
+    return True, result
+
+def default_jobs():
+    """Number of worker processes to use when --jobs isn't given."""
+    if hasattr(os, 'sched_getaffinity'):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+def _init_worker():
+    """Set up a batch worker process."""
+    import signal
+    import cv2
+
+    # Each worker decodes one video at a time; letting OpenCV spin up its
+    # own thread pool in every process would oversubscribe the CPU.
+    cv2.setNumThreads(1)
+
+    # Ctrl+C is handled by the parent, which lets running videos finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _process_pool(jobs, timeout=None):
+    """
+    Worker processes for batch and watch mode. With a timeout, a video that
+    takes longer is killed and fails instead of holding its worker.
+    """
+    if timeout:
+        from .workers import KillablePool
+        return KillablePool(jobs, timeout, initializer=_init_worker)
+
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker)
+
+def _future_outcome(future):
+    """(success, result) of a finished process_single_video future."""
+    try:
+        return future.result()
+    except Exception as e:
+        from .workers import TaskTimeout
+        if isinstance(e, TaskTimeout):
+            return False, str(e)
+        return False, f"Worker failed: {str(e)}"
+
+def _memory_cost(video_file, extract_options=None):
+    """
+    Estimated peak bytes of extracting from a video, for --memory-budget.
+
+    Probes the video's size in this process. A video that can't be probed
+    costs nothing, since its worker will fail it straight away.
+    """
+    from .core import TAIL_WINDOW, estimate_peak_bytes, get_video_info
+
+    extract_options = extract_options or {}
+    try:
+        info = get_video_info(video_file, extract_options.get('backend'))
+    except Exception:
+        info = None
+    if not info:
+        return 0
+    return estimate_peak_bytes(
+        info['width'], info['height'],
+        extract_options.get('search_window') or TAIL_WINDOW,
+        extract_options.get('streaming', False)
+    )
+
+def _run_killable(fn, timeout, *args):
+    """Run fn(*args), which returns (success, result), in a worker killed after `timeout` seconds."""
+    with _process_pool(1, timeout) as pool:
+        return _future_outcome(pool.submit(fn, *args))
+
+def _batch_detail(video_file, success, result):
+    """Build the summary entry for one processed video."""
+    if success:
+        return {
+            'file': video_file.name,
+            'status': 'success',
+            'output': result['output_file'].name
+        }
+
+    return {
+        'file': video_file.name,
+        'status': 'failed',
+        'error': result
     }
 
-def process_batch(input_dir, output_dir=None):
-    """Process all videos in a directory."""
-    input_path = Path(input_dir)
+def _duplicate_result(video_file, output_file, leader_file, leader_output, result):
+    """
+    Result for a video with the same content as leader_file, whose
+    extraction (saved under leader_output) gave `result`: every image is
+    hardlinked, or copied, under this video's output name instead.
+    """
+    start = time.perf_counter()
+    saved = {}
+    try:
+        for path in result.get('output_files') or [result['output_file']]:
+            saved[str(path)] = duplicate_path(path, leader_output, output_file)
+            link_output(path, saved[str(path)])
+    except OSError as e:
+        return False, f"Save failed: {str(e)}"
 
-    if not input_path.exists():
-        show_error(
-            "Directory not found",
-            f"The input directory doesn't exist: {input_dir}",
-            "Check the path and try again."
-        )
-        sys.exit(1)
+    duplicate = dict(result)
+    duplicate.update({
+        'output_file': saved[str(result['output_file'])],
+        'output_files': list(saved.values()),
+        'duplicate_of': str(leader_file),
+        # Everything but writing the images was done once for both
+        'saved_seconds': sum(
+            seconds for name, seconds in result['stage_seconds'].items() if name != 'write'
+        ),
+        'container_opens': 0,
+        'frames_decoded': 0,
+        'peak_frame_bytes': 0,
+        'bytes_written': 0,
+        'stage_seconds': {'write': time.perf_counter() - start},
+    })
+    if result.get('targets'):
+        duplicate['targets'] = [
+            dict(entry, output=entry['output'] and str(
+                duplicate_path(entry['output'], leader_output, output_file)
+            ))
+            for entry in result['targets']
+        ]
+    return True, duplicate
+
+# Threads encoding and writing images while the next video is decoded
+ENCODE_THREADS = 2
+WRITE_THREADS = 2
+
+def _run_pipelined(jobs_iter, progress, task, extract_options=None, output_options=None):
+    """
+    Process videos in-process with decoding, encoding and writing overlapped.
 
-    if not input_path.is_dir():
-        show_error(
-            "Not a directory",
-            f"The path is not a directory: {input_dir}",
-            "For batch mode, provide a directory path."
-        )
-        sys.exit(1)
+    One thread decodes and scores videos while encoding (cv2.imencode) and
+    writing run on their own thread pools, all connected by bounded queues.
+    Yields (index, success, result) like _run_batch.
+    """
+    from .pipeline import Pipeline, Stage
 
-    # Find all videos
-    video_files = find_videos_in_directory(input_path)
+    def extract(item):
+        progress.update(task, description=f"[cyan]Processing {item['video_file'].name}...")
+        success, result = analyze_video(item['video_file'], extract_options)
+        if success:
+            item['result'] = result
+        else:
+            item['error'] = result
 
-    if not video_files:
-        show_error(
-            "No videos found",
-            f"No video files found in: {input_dir}",
-            f"Supported formats: {', '.join(sorted(VIDEO_EXTENSIONS))}"
-        )
+    def encode(item):
+        result = item['result']
+        start = time.perf_counter()
+        try:
+            item['renditions'] = _encode_outputs(result, item['output_file'], output_options)
+        except IOError:
+            item['error'] = "Failed to save image"
+        result['stage_seconds']['encode'] = time.perf_counter() - start
+
+    def write(item):
+        result = item['result']
+        start = time.perf_counter()
+        try:
+            renditions = item.pop('renditions')
+            result['bytes_written'] = sum(write_atomic(path, data) for path, data in renditions)
+        except Exception as e:
+            item['error'] = f"Save failed: {str(e)}"
+            return
+        result['stage_seconds']['write'] = time.perf_counter() - start
+        result['output_file'] = renditions[0][0]
+        result['output_files'] = [path for path, _ in renditions]
+
+    pipeline = Pipeline([
+        Stage('extract', extract),
+        Stage('encode', encode, workers=ENCODE_THREADS),
+        Stage('write', write, workers=WRITE_THREADS),
+    ])
+
+    items = (
+        {'index': index, 'video_file': video_file, 'output_file': output_file}
+        for index, video_file, output_file in jobs_iter
+    )
+
+    for item in pipeline.run(items):
+        if item.get('error'):
+            yield item['index'], False, item['error']
+        else:
+            yield item['index'], True, item['result']
+
+def _run_batch(jobs_iter, jobs, progress, task, extract_options=None, output_options=None,
+               timeout=None, memory_budget=None):
+    """
+    Run process_single_video over (index, video_file, output_file) jobs.
+
+    jobs_iter may be a generator that is still discovering videos; work
+    starts on the first job straight away. Yields (index, success, result)
+    as videos finish, in completion order rather than input order. With
+    one job, decoding and image writing are pipelined on threads; with more,
+    or with a per-video timeout, the videos are spread over a process pool.
+    With memory_budget (bytes), a video only goes to the pool once its
+    estimated memory fits next to the videos already there.
+    """
+    if jobs <= 1 and not timeout:
+        yield from _run_pipelined(jobs_iter, progress, task, extract_options, output_options)
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, as_completed, wait
+
+    progress.update(task, description=f"[cyan]Processing videos ({jobs} workers)...")
+
+    def collect(future):
+        success, result = _future_outcome(future)
+        index, cost = pending.pop(future)
+        budget.release(cost)
+        return index, success, result
+
+    # Enough queued work to keep every worker busy, without holding a future
+    # for every file of a huge tree while discovery is still running
+    max_pending = jobs * 4
+    pending = {}
+
+    from .workers import MemoryBudget
+    budget = MemoryBudget(memory_budget or 0)
+
+    with _process_pool(jobs, timeout) as executor:
+        for index, video_file, output_file in jobs_iter:
+            cost = _memory_cost(video_file, extract_options) if memory_budget else 0
+            while not budget.fits(cost):
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield collect(future)
+
+            budget.acquire(cost)
+            future = executor.submit(
+                process_single_video, video_file, output_file, extract_options, output_options
+            )
+            pending[future] = index, cost
+
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            else:
+                done = [f for f in pending if f.done()]
+
+            for future in done:
+                yield collect(future)
+
+        for future in as_completed(list(pending)):
+            yield collect(future)
+
+def _open_cache(output_path, settings, refresh, max_entries):
+    """Open the result cache, or return None (with a warning) if we can't."""
+    import sqlite3
+    from .cache import ResultCache
+
+    try:
+        cache = ResultCache(output_path, settings, max_entries)
+        if refresh:
+            cache.clear()
+        return cache
+    except (sqlite3.Error, OSError) as e:
+        console.print(f"[yellow]⚠️  Result cache disabled:[/yellow] [dim]{str(e)}[/dim]")
+        return None
+
+class _NoProgress:
+    """Stands in for a rich Progress when nothing is drawn."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def add_task(self, *args, **kwargs):
+        return None
+
+    def update(self, *args, **kwargs):
+        pass
+
+    def advance(self, *args, **kwargs):
+        pass
+
+def video_record(video_path, success, result):
+    """
+    Describe the outcome for one video as a flat, JSON-serializable dict.
+
+    Every key is always present (None when it doesn't apply), so consumers
+    can rely on the shape of each record.
+    """
+    record = {
+        'input': str(video_path),
+        'ok': success,
+        'cached': False,
+        'output': None,
+        'outputs': [],
+        'frame_num': None,
+        'blur_score': None,
+        'candidate_scores': None,
+        'status': None,
+        'video_info': None,
+        'timings': None,
+        'frames_decoded': None,
+        'peak_frame_bytes': None,
+        'bytes_written': None,
+        'targets': None,
+        'frame_hash': None,
+        'duplicate_of': None,
+        'prefilter': None,
+        'error': None,
+    }
+
+    if not success:
+        record['error'] = result
+        return record
+
+    output_files = result.get('output_files') or [result['output_file']]
+    record.update({
+        'cached': bool(result.get('cached')),
+        'output': str(result['output_file']),
+        'outputs': [str(path) for path in output_files],
+        'frame_num': result['frame_num'],
+        'blur_score': result['blur_score'],
+        'candidate_scores': result.get('candidate_scores'),
+        'status': result['status'],
+        'video_info': result.get('video_info'),
+        'timings': result.get('stage_seconds'),
+        'frames_decoded': result.get('frames_decoded'),
+        'peak_frame_bytes': result.get('peak_frame_bytes'),
+        'bytes_written': result.get('bytes_written'),
+        'targets': result.get('targets'),
+        'frame_hash': result.get('frame_hash'),
+        'duplicate_of': result.get('duplicate_of'),
+        'prefilter': result.get('prefilter'),
+    })
+    return record
+
+def _write_line(line):
+    """Write a line to stdout and flush it so readers see it straight away."""
+    try:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`): stop quietly like other Unix tools
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
         sys.exit(1)
 
-    # Setup output directory
+def emit_jsonl(video_path, success, result):
+    """--format jsonl: write one JSON record per video to stdout right away."""
+    import json
+
+    _write_line(json.dumps(video_record(video_path, success, result), ensure_ascii=False))
+
+def emit_path(video_path, success, result):
+    """--quiet: print the saved image path, or the error on stderr."""
+    if success:
+        _write_line(str(result['output_file']))
+    else:
+        sys.stderr.write(f"lastframe: {video_path}: {result}\n")
+
+# Near-duplicate groups listed after a batch; the rest are in --summary-json
+NEAR_DUPLICATE_GROUPS_SHOWN = 10
+
+def process_batch(input_dir, output_dir=None, jobs=1, extract_options=None,
+                  use_cache=False, refresh_cache=False, cache_max_entries=DEFAULT_MAX_ENTRIES,
+                  recursive=False, include=None, exclude=None, output_options=None,
+                  profiler=None, emit=None, from_list=None, shard=None, summary_path=None,
+                  timeout=None, memory_budget=None, dedup=False, schedule=None):
+    """
+    Process all videos in a directory.
+
+    extract_options are passed on to extract_last_frame for every video and
+    output_options control the saved images (see DEFAULT_OUTPUT_OPTIONS).
+    With use_cache, results are kept in an index next to the output and
+    unchanged videos are skipped on later runs; refresh_cache empties the
+    index first. recursive, include and exclude control discovery (see
+    iter_videos); videos are processed while the scan is still running.
+    Every outcome is also recorded in profiler, if one is given.
+
+    With emit, nothing is rendered: emit(video_file, success, result) is
+    called as each video finishes instead (see emit_jsonl and emit_path).
+
+    With from_list, videos are read from a manifest (see iter_list) instead
+    of input_dir. shard (index, count) keeps only this node's share of the
+    inputs (see in_shard), and summary_path receives a summary that can be
+    merged with the other shards' (see lastframe.summary).
+
+    With timeout, a video still running after that many seconds is killed
+    and counted as failed, so one broken file can't stall the batch. With
+    memory_budget (bytes), videos are decoded at the same time only while
+    their estimated memory fits in it (see estimate_peak_bytes).
+
+    With dedup, videos with the same content fingerprint are extracted once
+    and the other copies get links to its images (see lastframe.dedup);
+    frames that look alike are reported as near-duplicates.
+
+    schedule names the policy deciding which video goes to a worker next
+    (see lastframe.schedule). The default, 'discovery', starts videos as
+    they are found; every other policy probes all videos before starting any.
+    """
+    if schedule is None:
+        schedule = DEFAULT_POLICY
+    order = get_policy(schedule)
+
+    if from_list is not None:
+        input_path = None
+        if from_list != '-' and not Path(from_list).is_file():
+            show_error(
+                "List not found",
+                f"The video list doesn't exist: {from_list}",
+                "Provide a file with one video path per line, or - to read from stdin."
+            )
+            sys.exit(1)
+    else:
+        input_path = Path(input_dir)
+
+        if not input_path.exists():
+            show_error(
+                "Directory not found",
+                f"The input directory doesn't exist: {input_dir}",
+                "Check the path and try again."
+            )
+            sys.exit(1)
+
+        if not input_path.is_dir():
+            show_error(
+                "Not a directory",
+                f"The path is not a directory: {input_dir}",
+                "For batch mode, provide a directory path."
+            )
+            sys.exit(1)
+
+    # Setup output directory. A list has no input directory, so without an
+    # output directory images go next to each video and there is no cache.
     if output_dir:
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
     else:
         output_path = input_path
 
-    # Show header
-    console.print()
-    console.print("[bold magenta]lastframe[/bold magenta] [dim]v1.1.0[/dim] [yellow]• batch mode[/yellow]")
-    console.print()
-    console.print(f"[cyan]📁 Input:[/cyan]  {input_path}")
-    console.print(f"[cyan]📤 Output:[/cyan] {output_path}")
-    console.print(f"[cyan]🎬 Videos:[/cyan] {len(video_files)} found")
-    console.print()
+    if emit is None:
+        from rich.progress import (
+            Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn, MofNCompleteColumn
+        )
+        from .pipeline import StageStats
 
-    # Process videos
-    results = {'success': 0, 'failed': 0, 'details': []}
-
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console
-    ) as progress:
-        task = progress.add_task("[cyan]Processing videos...", total=len(video_files))
-
-        for video_file in video_files:
-            progress.update(task, description=f"[cyan]Processing {video_file.name}...")
-
-            # Determine output path
-            if output_dir:
-                output_file = output_path / f"{video_file.stem}_lastframe.jpg"
-            else:
-                output_file = None
+        # Show header
+        console.print()
+        console.print("[bold magenta]lastframe[/bold magenta] [dim]v1.1.0[/dim] [yellow]• batch mode[/yellow]")
+        console.print()
+        if from_list is not None:
+            console.print(f"[cyan]📄 List:[/cyan]   {'stdin' if from_list == '-' else from_list}")
+        else:
+            console.print(f"[cyan]📁 Input:[/cyan]  {input_path}{' (recursive)' if recursive else ''}")
+        console.print(f"[cyan]📤 Output:[/cyan] {output_path or 'next to each video'}")
+        console.print(f"[cyan]🧵 Workers:[/cyan] {jobs}")
+        if timeout:
+            console.print(f"[cyan]⏱  Timeout:[/cyan] {timeout:g}s per video")
+        if memory_budget:
+            console.print(f"[cyan]🧠 Memory:[/cyan] {memory_budget / 1e6:.0f} MB budget")
+        if dedup:
+            console.print("[cyan]⧉  Dedup:[/cyan]  identical videos are extracted once")
+        if order is not None:
+            console.print(f"[cyan]📋 Schedule:[/cyan] {schedule}")
+        if shard:
+            console.print(f"[cyan]🧩 Shard:[/cyan]  {shard[0]} of {shard[1]}")
+        console.print()
 
-            # Process video
-            success, result = process_single_video(video_file, output_file)
+        progress_display = Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            TaskProgressColumn(),
+            console=console
+        )
+        stage_stats = {name: StageStats(name) for name in ('extract', 'encode', 'write')}
+    else:
+        progress_display = _NoProgress()
+        stage_stats = None
 
+    # Process videos
+    results = {
+        'success': 0,
+        'failed': 0,
+        'cached': 0,
+        'deduplicated': 0,
+        'dedup_saved_seconds': 0.0,
+        'container_opens': 0,
+        'frames_decoded': 0,
+        'frames_prefiltered': 0,
+        'near_duplicates': [],
+        'details': []
+    }
+    video_files = []
+    failed_videos = []
+    # Inputs found, including those belonging to other shards
+    inputs_seen = 0
+
+    # Content fingerprint -> the first video with it, its outcome once
+    # known and the copies waiting for that outcome
+    originals = {}
+    # Index of each video handed to a worker -> its fingerprint
+    fingerprints = {}
+    # (video, frame hash) of every extracted frame
+    frame_hashes = []
+
+    cache = None
+    if use_cache and output_path:
+        cache_settings = {'extract': extract_options, 'output': output_options}
+        cache = _open_cache(output_path, cache_settings, refresh_cache, cache_max_entries)
+
+    with progress_display as progress:
+        task = progress.add_task("[cyan]Scanning for videos...", total=0)
+
+        def finish(index, video_file, success, result):
+            """Count and report one video, whichever way it was handled."""
             if success:
                 results['success'] += 1
-                results['details'].append({
-                    'file': video_file.name,
-                    'status': 'success',
-                    'output': result['output_file'].name
-                })
+                if result.get('cached'):
+                    results['cached'] += 1
+                elif result.get('duplicate_of'):
+                    results['deduplicated'] += 1
+                    results['dedup_saved_seconds'] += result['saved_seconds']
+                    if cache:
+                        cache.store(video_file, result)
+                else:
+                    frame_hashes.append((video_file, result['frame_hash']))
+                    results['container_opens'] += result['container_opens']
+                    results['frames_decoded'] += result['frames_decoded']
+                    if result.get('prefilter'):
+                        results['frames_prefiltered'] += sum(
+                            count for reason, count in result['prefilter'].items() if reason != 'scored'
+                        )
+                    if stage_stats:
+                        stage_seconds = result['stage_seconds']
+                        stage_stats['extract'].add(sum(
+                            seconds for name, seconds in stage_seconds.items()
+                            if name not in ('encode', 'write')
+                        ))
+                        stage_stats['encode'].add(stage_seconds['encode'])
+                        stage_stats['write'].add(stage_seconds['write'], result['bytes_written'])
+                    if cache:
+                        cache.store(video_file, result)
             else:
                 results['failed'] += 1
-                results['details'].append({
-                    'file': video_file.name,
-                    'status': 'failed',
-                    'error': result
-                })
+                failed_videos.append((video_file, result))
+
+            if profiler:
+                profiler.record(video_file, success, result)
+
+            if emit:
+                emit(video_file, success, result)
+            else:
+                # Keep details in input order regardless of which worker finished first
+                results['details'][index] = _batch_detail(video_file, success, result)
 
             progress.advance(task)
 
+        def finish_copy(index, video_file, output_file, original):
+            """Finish a copy of an already extracted video from its outcome."""
+            success, result = original['outcome']
+            if success:
+                success, result = _duplicate_result(
+                    video_file, output_file, original['video_file'], original['output_file'], result
+                )
+            else:
+                result = f"{result} (same content as {original['video_file'].name})"
+            finish(index, video_file, success, result)
+
+        def discover():
+            """Feed newly found videos to the workers, answering cache hits directly."""
+            nonlocal inputs_seen
+            created_dirs = set()
+
+            if from_list is not None:
+                source = iter_list(from_list, include, exclude)
+            else:
+                source = iter_videos(input_path, recursive, include, exclude)
+
+            for video_file in source:
+                inputs_seen += 1
+                if shard:
+                    key = (
+                        video_file.as_posix() if input_path is None
+                        else video_file.relative_to(input_path).as_posix()
+                    )
+                    if not in_shard(key, shard):
+                        continue
+
+                index = len(video_files)
+                video_files.append(video_file)
+                if emit is None:
+                    results['details'].append(None)
+                progress.update(task, total=len(video_files))
+
+                if input_path is None:
+                    # Listed videos may not exist; don't hand those to a worker
+                    if not video_file.is_file():
+                        finish(index, video_file, False, "File not found")
+                        continue
+                    output_file = list_output_path(video_file, output_dir, output_options)
+                else:
+                    output_file = batch_output_path(video_file, input_path, output_dir, output_options)
+
+                if output_dir and output_file.parent not in created_dirs:
+                    output_file.parent.mkdir(parents=True, exist_ok=True)
+                    created_dirs.add(output_file.parent)
+
+                # Unchanged videos come straight from the cache without being opened
+                cached = (
+                    cache.lookup(video_file, primary_output_path(output_file, output_options))
+                    if cache else None
+                )
+                if cached:
+                    finish(index, video_file, True, cached)
+                    continue
+
+                # Copies of a video already found wait for its result rather
+                # than being decoded again
+                key = fingerprint(video_file) if dedup else None
+                if key is not None:
+                    original = originals.get(key)
+                    if original is None:
+                        originals[key] = {
+                            'video_file': video_file, 'output_file': output_file,
+                            'outcome': None, 'copies': []
+                        }
+                        fingerprints[index] = key
+                    elif original['outcome'] is None:
+                        original['copies'].append((index, video_file, output_file))
+                        continue
+                    else:
+                        finish_copy(index, video_file, output_file, original)
+                        continue
+
+                yield index, video_file, output_file
+
+        try:
+            jobs_iter = discover()
+            if order is not None:
+                # The policy needs every video's cost before the first starts
+                found = list(jobs_iter)
+                progress.update(task, description=f"[cyan]Estimating the cost of {len(found)} videos...")
+                jobs_iter = schedule_jobs(found, order, extract_options)
+
+            for index, success, result in _run_batch(
+                jobs_iter, jobs, progress, task, extract_options, output_options, timeout,
+                memory_budget
+            ):
+                finish(index, video_files[index], success, result)
+
+                if index in fingerprints:
+                    original = originals[fingerprints.pop(index)]
+                    original['outcome'] = success, result
+                    for copy in original.pop('copies'):
+                        finish_copy(*copy, original)
+        finally:
+            if cache:
+                cache.close()
+
+    results['total'] = len(video_files)
+    if dedup:
+        results['near_duplicates'] = [
+            [str(video) for video in group] for group in near_duplicates(frame_hashes)
+        ]
+    if summary_path:
+        write_summary(summary_path, build_summary(results, shard, inputs_seen, failed_videos))
+
+    if not inputs_seen:
+        if from_list is not None:
+            show_error(
+                "No videos listed",
+                f"The video list is empty: {'stdin' if from_list == '-' else from_list}",
+                "Put one video path per line."
+            )
+        else:
+            show_error(
+                "No videos found",
+                f"No video files found in: {input_dir}",
+                f"Supported formats: {', '.join(sorted(VIDEO_EXTENSIONS))}"
+            )
+        sys.exit(1)
+
+    if emit:
+        return results['success'], results['failed']
+
+    if not video_files:
+        console.print(
+            f"[yellow]No videos in shard {shard[0]}/{shard[1]}[/yellow] "
+            f"[dim]({inputs_seen} inputs, all in other shards)[/dim]"
+        )
+        console.print()
+        return 0, 0
+
+    from rich.table import Table
+
     # Show results
     console.print()
     console.print("[bold green]✓[/bold green] Batch processing complete!")
@@ -271,13 +1063,44 @@ def process_batch(input_dir, output_dir=None):
     table.add_column("Count", justify="right")
 
     table.add_row("[green]✓ Success[/green]", f"[bold]{results['success']}[/bold]")
+    if results['cached'] > 0:
+        table.add_row("[blue]↺ Cached[/blue]", f"{results['cached']}")
+    if results['deduplicated'] > 0:
+        table.add_row("[blue]⧉ Duplicates[/blue]", f"{results['deduplicated']}")
     if results['failed'] > 0:
         table.add_row("[red]✗ Failed[/red]", f"[bold]{results['failed']}[/bold]")
-    table.add_row("Total", f"{len(video_files)}")
+    table.add_row("Total", f"{results['total']}")
 
     console.print(table)
+    console.print(
+        f"[dim]📂 {results['container_opens']} container opens • "
+        f"{results['frames_decoded']} frames decoded "
+        f"for {results['success'] - results['cached'] - results['deduplicated']} extracted videos"
+        + (f", {results['frames_prefiltered']} rejected by the prefilter before scoring"
+           if results['frames_prefiltered'] else "")
+        + "[/dim]"
+    )
+    if results['deduplicated'] > 0:
+        console.print(
+            f"[dim]⧉  {results['deduplicated']} identical copies linked instead of decoded • "
+            f"{results['dedup_saved_seconds']:.1f}s of extraction saved[/dim]"
+        )
+    if stage_stats['extract'].items:
+        console.print("[dim]⏱  " + " • ".join(
+            f"{stats.name} {stats.items_per_second:.1f}/s"
+            for stats in stage_stats.values()
+        ) + f" • {stage_stats['write'].bytes / 1e6:.1f} MB written[/dim]")
     console.print()
 
+    if results['near_duplicates']:
+        console.print("[yellow]Near-duplicates[/yellow] [dim](different files, frames that look alike):[/dim]")
+        for group in results['near_duplicates'][:NEAR_DUPLICATE_GROUPS_SHOWN]:
+            console.print("  [blue]≈[/blue] " + ", ".join(Path(video).name for video in group))
+        hidden = len(results['near_duplicates']) - NEAR_DUPLICATE_GROUPS_SHOWN
+        if hidden > 0:
+            console.print(f"  [dim]… and {hidden} more groups (see --summary-json)[/dim]")
+        console.print()
+
     # Show failures if any
     if results['failed'] > 0:
         console.print("[yellow]Failed videos:[/yellow]")
@@ -306,6 +1129,11 @@ def show_help():
     help_text.append("→ video_lastframe.jpg\n", style="dim cyan")
     help_text.append("    lastframe video.mp4 output.jpg   ", style="dim")
     help_text.append("→ output.jpg\n\n", style="dim cyan")
+    help_text.append("  Stream mode (pipes, FIFOs, growing files):\n", style="white")
+    help_text.append("    ... | lastframe - frame.jpg      ", style="dim")
+    help_text.append("→ frame.jpg\n", style="dim cyan")
+    help_text.append("    lastframe live.ts --follow       ", style="dim")
+    help_text.append("→ live_lastframe.jpg\n\n", style="dim cyan")
 
     help_text.append("  Batch mode (directory):\n", style="white")
     help_text.append("    lastframe ./videos               ", style="dim")
@@ -313,15 +1141,121 @@ def show_help():
     help_text.append("    lastframe ./videos ./output      ", style="dim")
     help_text.append("→ ./output/*_lastframe.jpg\n\n", style="dim cyan")
 
+    help_text.append("  Watch mode (keeps running):\n", style="white")
+    help_text.append("    lastframe watch ./incoming       ", style="dim")
+    help_text.append("→ frames for videos as they arrive\n\n", style="dim cyan")
+
+    help_text.append("  Serve mode (local HTTP service, warm workers):\n", style="white")
+    help_text.append("    lastframe serve -j 4             ", style="dim")
+    help_text.append("→ GET /extract?path=video.mp4, POST a video\n\n", style="dim cyan")
+
+    help_text.append("  List mode (paths from a file or stdin):\n", style="white")
+    help_text.append("    lastframe --from-list videos.txt ./output\n", style="dim")
+    help_text.append("    find /data -name '*.mp4' | lastframe --from-list -\n\n", style="dim")
+
     help_text.append("FEATURES\n", style="bold cyan")
     help_text.append("  • Smart blur detection - automatically picks the sharpest frame\n", style="white")
     help_text.append("  • Batch processing - process entire folders\n", style="white")
     help_text.append("  • Custom output - specify output file or directory\n", style="white")
-    help_text.append("  • Saves as JPEG with maximum quality (100%)\n", style="white")
+    help_text.append("  • Saves as JPEG with maximum quality (100%), PNG or WebP\n", style="white")
+    help_text.append("  • Thumbnails in several sizes from one decode\n", style="white")
+    help_text.append("  • Several frames per video (first, 50%, top 3, ...) from one decode\n", style="white")
     help_text.append("  • Supports all major video formats (MP4, MOV, AVI, MKV, WebM, etc.)\n\n", style="white")
 
     help_text.append("OPTIONS\n", style="bold cyan")
     help_text.append("  -h, --help     Show this help message\n", style="white")
+    help_text.append("  -j, --jobs N   Videos processed in parallel in batch mode\n", style="white")
+    help_text.append(f"                 (default: {default_jobs()}, one per CPU)\n", style="dim")
+    help_text.append("  --metric NAME  Sharpness metric: laplacian, tenengrad or fft\n", style="white")
+    help_text.append("                 (default: laplacian)\n", style="dim")
+    help_text.append("  --threshold N  Minimum score for a frame to count as sharp\n", style="white")
+    help_text.append("                 (default depends on the metric, 100 for laplacian)\n", style="dim")
+    help_text.append("  --pyramid MODE Score a downscaled copy or centre crop first and only\n", style="white")
+    help_text.append("                 rescore close calls at full size: downscale or crop\n", style="dim")
+    help_text.append("  --timeout SECS Fail a video (killing its worker) if it takes longer\n", style="white")
+    help_text.append("                 than this, so a broken file can't stall a batch\n", style="dim")
+    help_text.append("  --streaming    Score frames as they are decoded and keep only the newest\n", style="white")
+    help_text.append("                 and sharpest: same frame, far less memory for 4K/8K\n", style="dim")
+    help_text.append("                 sources or a large --window\n", style="dim")
+    help_text.append("  --backend NAME Decoder: opencv (default) or pyav when PyAV is installed,\n", style="white")
+    help_text.append("                 which seeks by keyframe and decodes with threads\n", style="dim")
+    help_text.append("  --prefilter    Reject black, fade, uniform and near-duplicate frames\n", style="white")
+    help_text.append("                 from a tiny thumbnail before scoring them; the search\n", style="dim")
+    help_text.append("                 goes on past them (up to skip frames beyond --max-depth)\n", style="dim")
+    help_text.append("  --prefilter-thresholds LIST\n", style="white")
+    help_text.append("                 Implies --prefilter: black=16,fade=40,fade_contrast=10,\n", style="dim")
+    help_text.append("                 contrast=3,duplicate=1,skip=300 (duplicate=0 turns it off)\n", style="dim")
+    help_text.append("  --memory-budget SIZE\n", style="white")
+    help_text.append("                 Batch/watch mode: decode videos side by side only while\n", style="dim")
+    help_text.append("                 their estimated memory fits, e.g. 4G or 512M\n", style="dim")
+    help_text.append("  --schedule POLICY\n", style="white")
+    help_text.append("                 Batch mode: order videos are started in: discovery\n", style="dim")
+    help_text.append("                 (default), longest-first or shortest-first. The last\n", style="dim")
+    help_text.append("                 two list and open every video before starting any\n", style="dim")
+    help_text.append("  --window N     Frames decoded and scored per search step (default: 3)\n", style="white")
+    help_text.append("  --max-depth N  Keep searching backwards in steps of --window until a\n", style="white")
+    help_text.append("                 sharp frame is found or N frames from the end were\n", style="dim")
+    help_text.append("                 checked (default: same as --window)\n", style="dim")
+    help_text.append("  --targets LIST Extract several frames in one decode pass, e.g.\n", style="white")
+    help_text.append("                 last,first,at=50%,at=12.5s,top=3:10s; the first is\n", style="dim")
+    help_text.append("                 saved as the output, the others as output_<target>\n", style="dim")
+    help_text.append("  --contact-sheet\n", style="white")
+    help_text.append("                 With --targets: also save all frames on one image\n", style="dim")
+    help_text.append("                 (output_sheet)\n", style="dim")
+    help_text.append("  --image-format FORMAT\n", style="white")
+    help_text.append("                 Save frames as jpg, png or webp (default: from the\n", style="dim")
+    help_text.append("                 output filename, otherwise jpg)\n", style="dim")
+    help_text.append("  --quality N    JPEG/WebP quality 1-100 (default: 100)\n", style="white")
+    help_text.append("  --progressive  Save progressive JPEGs\n", style="white")
+    help_text.append("  --optimize     Optimize JPEG Huffman tables (smaller, slower)\n", style="white")
+    help_text.append("  --png-compression N\n", style="white")
+    help_text.append("                 PNG compression level 0-9 (default: 3)\n", style="dim")
+    help_text.append("  --sizes LIST   Sizes to save, e.g. full,1280,320 - numbers are the\n", style="white")
+    help_text.append("                 longest side in pixels (default: full)\n", style="dim")
+    help_text.append("  -r, --recursive\n", style="white")
+    help_text.append("                 Batch mode: also process videos in subfolders\n", style="dim")
+    help_text.append("  --include GLOB Batch mode: only process matching videos (repeatable)\n", style="white")
+    help_text.append("  --exclude GLOB Batch mode: skip matching videos and folders (repeatable)\n", style="white")
+    help_text.append("  --from-list FILE\n", style="white")
+    help_text.append("                 Process the video paths listed in FILE, one per line\n", style="dim")
+    help_text.append("                 ('-' reads stdin)\n", style="dim")
+    help_text.append("  --shard i/N    Only process this node's share of the inputs; the\n", style="white")
+    help_text.append("                 split is the same on every machine\n", style="dim")
+    help_text.append("  --summary-json FILE\n", style="white")
+    help_text.append("                 Write counts and failures for this run, for use with\n", style="dim")
+    help_text.append("                 lastframe merge-summaries\n", style="dim")
+    help_text.append("  --settle SECS  Watch mode: wait until a file stopped changing (default: 5)\n", style="white")
+    help_text.append("  --follow       Read a file that is still being written (e.g. a live .ts\n", style="white")
+    help_text.append("                 recording) as a stream, until it stops growing for --settle\n", style="dim")
+    help_text.append("  --poll         Watch mode: poll the folder instead of using inotify\n", style="white")
+    help_text.append("  --poll-interval SECS\n", style="white")
+    help_text.append("                 Watch mode: seconds between polls (default: 2)\n", style="dim")
+    help_text.append("  --max-pending N\n", style="white")
+    help_text.append("                 Watch mode: videos tracked at once (default: 10000)\n", style="dim")
+    help_text.append("  --host ADDR    Serve mode: address to listen on (default: 127.0.0.1)\n", style="white")
+    help_text.append("  --port N       Serve mode: port to listen on (default: 8750, 0 = any)\n", style="white")
+    help_text.append("  --queue N      Serve mode: requests that may wait for a worker before\n", style="white")
+    help_text.append("                 new ones get 429 Too Many Requests (default: 16)\n", style="dim")
+    help_text.append("  --max-upload SIZE\n", style="white")
+    help_text.append("                 Serve mode: largest video accepted in a POST (default: 2G)\n", style="dim")
+    help_text.append("  --format jsonl Print one JSON record per video to stdout as it\n", style="white")
+    help_text.append("                 finishes, instead of progress bars and tables\n", style="dim")
+    help_text.append("  -q, --quiet    Only print the path of each saved image (errors go\n", style="white")
+    help_text.append("                 to stderr), for use in shell pipelines\n", style="dim")
+    help_text.append("  --profile      Print per-stage timings (open, probe, seek, decode,\n", style="white")
+    help_text.append("                 score, encode, write) when done\n", style="dim")
+    help_text.append("  --metrics-json FILE\n", style="white")
+    help_text.append("                 Write stage histograms and per-video counters as JSON\n", style="dim")
+    help_text.append("  --metrics-prom FILE\n", style="white")
+    help_text.append("                 Write metrics as a Prometheus textfile (rewritten as\n", style="dim")
+    help_text.append("                 videos finish in watch mode)\n", style="dim")
+    help_text.append("  --no-cache     Batch mode: don't use or update the result cache\n", style="white")
+    help_text.append("  --refresh-cache\n", style="white")
+    help_text.append("                 Batch mode: forget cached results and reprocess all\n", style="dim")
+    help_text.append("  --cache-max-entries N\n", style="white")
+    help_text.append(f"                 Videos remembered in the cache (default: {DEFAULT_MAX_ENTRIES})\n", style="dim")
+    help_text.append("  --no-dedup     Batch mode: decode identical copies of a video separately\n", style="white")
+    help_text.append("                 instead of linking the first copy's images\n", style="dim")
 
     console.print(Panel(help_text, border_style="magenta", padding=(1, 2)))
 
@@ -340,11 +1274,412 @@ def show_error(title, message, suggestion=None):
     console.print(Panel(error_text, border_style="red", padding=(1, 2)))
     console.print()
 
+def show_profile(profiler):
+    """Print the per-stage timing summary collected with --profile."""
+    from rich.table import Table
+    from .profiling import STAGES
+
+    table = Table(title="⏱  Stage timings per video", show_header=True, header_style="bold cyan")
+    table.add_column("Stage", style="dim")
+    table.add_column("Count", justify="right")
+    table.add_column("Total s", justify="right")
+    table.add_column("Mean ms", justify="right")
+    table.add_column("p50 ms", justify="right")
+    table.add_column("p95 ms", justify="right")
+    table.add_column("Max ms", justify="right")
+    table.add_column("Share", justify="right")
+
+    busy = profiler.total.sum
+    rows = [(name, profiler.stages[name]) for name in STAGES] + [("total", profiler.total)]
+    for name, hist in rows:
+        if not hist.count:
+            continue
+        table.add_row(
+            f"[bold]{name}[/bold]" if name == "total" else name,
+            f"{hist.count}",
+            f"{hist.sum:.2f}",
+            f"{hist.mean * 1000:.1f}",
+            f"{hist.quantile(0.5) * 1000:.1f}",
+            f"{hist.quantile(0.95) * 1000:.1f}",
+            f"{hist.max * 1000:.1f}",
+            f"{100 * hist.sum / busy:.0f}%" if busy else "-",
+        )
+
+    results = profiler.results
+    console.print(table)
+    console.print(
+        f"[dim]{results['success']} extracted • {results['cached']} cached • "
+        + (
+            f"{results['deduplicated']} duplicates ({profiler.dedup_saved_seconds:.1f}s saved) • "
+            if results['deduplicated'] else ""
+        ) +
+        f"{results['failed']} failed • {profiler.frames_decoded} frames decoded • "
+        f"{profiler.bytes_written / 1e6:.1f} MB written • "
+        f"{profiler.wall_seconds:.2f}s wall time[/dim]"
+    )
+    console.print()
+
+class _ArgumentParser(argparse.ArgumentParser):
+    """Argument parser that reports problems with show_error."""
+
+    def error(self, message):
+        show_error(
+            "Invalid arguments",
+            f"{message[0].upper()}{message[1:]}",
+            "Use: lastframe --help"
+        )
+        sys.exit(1)
+
+def _positive_float(value):
+    """argparse type for options that need a number of seconds > 0."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number, got '{value}'")
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be more than 0, got {value}")
+    return number
+
+# Suffixes accepted by --memory-budget
+_MEMORY_UNITS = {'': 1, 'k': 10**3, 'm': 10**6, 'g': 10**9, 't': 10**12}
+
+def _memory_size(value):
+    """argparse type for a number of bytes like 4G, 512M or 2.5g."""
+    text = value.strip().lower()
+    if text.endswith('b'):
+        text = text[:-1]
+    unit = text[-1:] if text[-1:] in _MEMORY_UNITS else ''
+    try:
+        number = float(text[:len(text) - len(unit)])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a size like 4G or 512M, got '{value}'")
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be more than 0, got {value}")
+    return int(number * _MEMORY_UNITS[unit])
+
+def _positive_int(value):
+    """argparse type for options that need a number >= 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a whole number, got '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def _int_range(low, high):
+    """argparse type for options that need a number between low and high."""
+    def parse(value):
+        try:
+            number = int(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"expected a whole number, got '{value}'")
+        if not low <= number <= high:
+            raise argparse.ArgumentTypeError(f"must be between {low} and {high}, got {number}")
+        return number
+    return parse
+
+def _sizes(value):
+    """argparse type for --sizes."""
+    try:
+        return parse_sizes(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def _shard(value):
+    """argparse type for --shard i/N (1-based)."""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N like 3/20, got '{value}'")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard must be between 1/{max(count, 1)} and {count}/{count}, got {value}")
+    return index, count
+
+def parse_args(argv):
+    """Parse command line arguments (without the program name)."""
+    parser = _ArgumentParser(prog="lastframe", add_help=False)
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument("-j", "--jobs", type=_positive_int, default=default_jobs())
+    # --metric and --pyramid are checked against core in main(), after --help
+    parser.add_argument("--metric", default=None)
+    parser.add_argument("--threshold", type=float, default=None)
+    parser.add_argument("--pyramid", default=None)
+    parser.add_argument("--window", type=_positive_int, default=None)
+    parser.add_argument("--max-depth", type=_positive_int, default=None)
+    parser.add_argument("--timeout", type=_positive_float, default=None)
+    parser.add_argument("--streaming", action="store_true")
+    # --backend is checked against lastframe.backends in build_extract_options()
+    parser.add_argument("--backend", default=None)
+    parser.add_argument("--prefilter", action="store_true")
+    # --prefilter-thresholds is checked against core in build_extract_options()
+    parser.add_argument("--prefilter-thresholds", default=None)
+    parser.add_argument("--memory-budget", type=_memory_size, default=None)
+    # --targets is checked against the planner in build_extract_options()
+    parser.add_argument("--targets", default=None)
+    parser.add_argument("--contact-sheet", action="store_true")
+    parser.add_argument("--image-format", choices=sorted(IMAGE_FORMATS), default=None)
+    parser.add_argument("--quality", type=_int_range(1, 100), default=DEFAULT_OUTPUT_OPTIONS['quality'])
+    parser.add_argument("--progressive", action="store_true")
+    parser.add_argument("--optimize", action="store_true")
+    parser.add_argument("--png-compression", type=_int_range(0, 9),
+                        default=DEFAULT_OUTPUT_OPTIONS['png_compression'])
+    parser.add_argument("--sizes", type=_sizes, default=DEFAULT_OUTPUT_OPTIONS['sizes'])
+    parser.add_argument("--from-list", default=None)
+    parser.add_argument("--shard", type=_shard, default=None)
+    parser.add_argument("--summary-json", default=None)
+    parser.add_argument("--format", choices=["rich", "jsonl"], default="rich")
+    parser.add_argument("-q", "--quiet", action="store_true")
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--metrics-json", default=None)
+    parser.add_argument("--metrics-prom", default=None)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--refresh-cache", action="store_true")
+    parser.add_argument("--cache-max-entries", type=_positive_int, default=DEFAULT_MAX_ENTRIES)
+    parser.add_argument("--no-dedup", action="store_true")
+    parser.add_argument("--schedule", choices=sorted(SCHEDULE_POLICIES), default=None)
+    parser.add_argument("-r", "--recursive", action="store_true")
+    parser.add_argument("--include", action="append", default=[])
+    parser.add_argument("--exclude", action="append", default=[])
+    parser.add_argument("--settle", type=float, default=None)
+    parser.add_argument("--follow", action="store_true")
+    parser.add_argument("--poll", action="store_true")
+    parser.add_argument("--poll-interval", type=float, default=None)
+    parser.add_argument("--max-pending", type=_positive_int, default=None)
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=_int_range(0, 65535), default=None)
+    parser.add_argument("--queue", type=_int_range(0, 100000), default=None)
+    parser.add_argument("--max-upload", type=_memory_size, default=None)
+
+    return parser.parse_intermixed_args(argv)
+
+def build_extract_options(args):
+    """
+    Turn parsed arguments into extract_last_frame keyword arguments.
+
+    This is where OpenCV gets loaded, since metric names can only be checked
+    against the registry in core.
+    """
+    from .core import DEFAULT_METRIC, PYRAMID_MODES, SHARPNESS_METRICS, TAIL_WINDOW
+
+    for option, value, choices in (
+        ("--metric", args.metric, SHARPNESS_METRICS),
+        ("--pyramid", args.pyramid, PYRAMID_MODES),
+    ):
+        if value is not None and value not in choices:
+            show_error(
+                "Invalid arguments",
+                f"Argument {option}: invalid choice: '{value}' "
+                f"(choose from {', '.join(sorted(choices))})",
+                "Use: lastframe --help"
+            )
+            sys.exit(1)
+
+    extract_options = {
+        'blur_threshold': args.threshold,
+        'metric': args.metric or DEFAULT_METRIC,
+        'pyramid': args.pyramid,
+        'search_window': args.window or TAIL_WINDOW,
+        'max_depth': args.max_depth,
+    }
+
+    if args.contact_sheet and args.targets is None:
+        show_error("Invalid arguments", "--contact-sheet needs --targets", "Use: lastframe --help")
+        sys.exit(1)
+
+    # Only added when given, so results cached without them stay valid
+    if args.streaming:
+        extract_options['streaming'] = True
+    if args.backend is not None:
+        from .backends import get_backend
+        try:
+            get_backend(args.backend)
+        except ValueError as e:
+            show_error("Invalid arguments", f"Argument --backend: {e}", "Use: lastframe --help")
+            sys.exit(1)
+        extract_options['backend'] = args.backend
+    if args.prefilter or args.prefilter_thresholds is not None:
+        from .core import parse_prefilter
+        try:
+            extract_options['prefilter'] = parse_prefilter(args.prefilter_thresholds)
+        except ValueError as e:
+            show_error("Invalid arguments", f"Argument --prefilter-thresholds: {e}", "Use: lastframe --help")
+            sys.exit(1)
+    if args.targets is not None:
+        from .planner import parse_targets
+        try:
+            extract_options['targets'] = [target['spec'] for target in parse_targets(args.targets)]
+        except ValueError as e:
+            show_error("Invalid arguments", f"Argument --targets: {e}", "Use: lastframe --help")
+            sys.exit(1)
+
+    return extract_options
+
+def make_profiler(args, keep_videos=True):
+    """A Profiler if --profile or a metrics file was asked for, else None."""
+    if not (args.profile or args.metrics_json or args.metrics_prom):
+        return None
+
+    from .profiling import Profiler
+    return Profiler(args.metrics_json, args.metrics_prom, keep_videos)
+
+def finish_profile(args, profiler):
+    """Show and write what the profiler collected."""
+    if profiler is None:
+        return
+
+    if args.profile:
+        show_profile(profiler)
+
+    try:
+        profiler.export()
+    except OSError as e:
+        show_error(
+            "Failed to write metrics",
+            f"Could not write the metrics file: {str(e)}",
+            "Check that the directory exists and is writable."
+        )
+        sys.exit(1)
+
+def run_merge_summaries(args):
+    """Handle `lastframe merge-summaries <summary.json>...`."""
+    from .summary import load_summary, merge_summaries
+
+    paths = args.paths[1:]
+    if not paths:
+        show_error(
+            "No summaries given",
+            "merge-summaries needs the --summary-json files written by each shard.",
+            "Try: lastframe merge-summaries shard-*.json"
+        )
+        sys.exit(1)
+
+    try:
+        merged = merge_summaries(load_summary(path) for path in paths)
+    except (OSError, ValueError) as e:
+        show_error(
+            "Cannot read summary",
+            f"A summary file could not be read: {str(e)}",
+            "Pass the JSON files written with --summary-json."
+        )
+        sys.exit(1)
+
+    if args.format == 'jsonl':
+        import json
+        _write_line(json.dumps(merged, ensure_ascii=False))
+    else:
+        from rich.table import Table
+
+        table = Table(show_header=True, header_style="bold cyan")
+        table.add_column("Status", style="dim", width=12)
+        table.add_column("Count", justify="right")
+        table.add_row("[green]✓ Success[/green]", f"[bold]{merged['success']}[/bold]")
+        if merged['cached'] > 0:
+            table.add_row("[blue]↺ Cached[/blue]", f"{merged['cached']}")
+        if merged['deduplicated'] > 0:
+            table.add_row("[blue]⧉ Duplicates[/blue]", f"{merged['deduplicated']}")
+        if merged['failed'] > 0:
+            table.add_row("[red]✗ Failed[/red]", f"[bold]{merged['failed']}[/bold]")
+        table.add_row("Total", f"{merged['total']}")
+
+        console.print()
+        console.print(table)
+        shards = ", ".join(merged['shards']) or "unsharded"
+        if merged['complete']:
+            console.print(f"[bold green]✓[/bold green] complete [dim]• shards {shards}[/dim]")
+        else:
+            console.print(
+                f"[yellow]⚠️  incomplete:[/yellow] [dim]{merged['total']} of "
+                f"{merged['inputs_seen']} inputs processed • shards {shards}[/dim]"
+            )
+        for failure in merged['failed_videos']:
+            console.print(f"  [red]✗[/red] {failure['input']}: [dim]{failure['error']}[/dim]")
+        console.print()
+
+    sys.exit(0 if merged['complete'] and not merged['failed'] else 1)
+
+def run_watch(args, extract_options, output_options, profiler=None, emit=None):
+    """Handle `lastframe watch <dir> [output_dir]`."""
+    from .watch import DEFAULT_MAX_PENDING, DEFAULT_POLL_INTERVAL, DEFAULT_SETTLE, watch_directory
+
+    if len(args.paths) < 2 or len(args.paths) > 3:
+        show_error(
+            "Invalid watch arguments",
+            "Watch mode takes a directory to watch and an optional output directory.",
+            "Try: lastframe watch ./incoming\nOr: lastframe watch ./incoming ./frames"
+        )
+        sys.exit(1)
+
+    watch_directory(
+        args.paths[1],
+        args.paths[2] if len(args.paths) == 3 else None,
+        jobs=args.jobs,
+        extract_options=extract_options,
+        output_options=output_options,
+        recursive=args.recursive,
+        include=args.include,
+        exclude=args.exclude,
+        settle=args.settle if args.settle is not None else DEFAULT_SETTLE,
+        use_polling=args.poll,
+        poll_interval=args.poll_interval if args.poll_interval is not None else DEFAULT_POLL_INTERVAL,
+        max_pending=args.max_pending or DEFAULT_MAX_PENDING,
+        timeout=args.timeout,
+        memory_budget=args.memory_budget,
+        profiler=profiler,
+        emit=emit
+    )
+    finish_profile(args, profiler)
+
+def run_serve(args, extract_options, output_options, emit=None):
+    """Handle `lastframe serve`."""
+    from .serve import (
+        DEFAULT_HOST, DEFAULT_MAX_UPLOAD, DEFAULT_PORT, DEFAULT_QUEUE, DEFAULT_TIMEOUT, serve
+    )
+
+    if len(args.paths) > 1 or 'targets' in extract_options:
+        show_error(
+            "Invalid serve arguments",
+            "Serve mode takes no paths and returns one frame per request (no --targets).",
+            "Try: lastframe serve --port 8750 -j 4\n"
+            "Then: curl -o frame.jpg 'http://127.0.0.1:8750/extract?path=/videos/clip.mp4'"
+        )
+        sys.exit(1)
+
+    serve(
+        host=args.host or DEFAULT_HOST,
+        port=args.port if args.port is not None else DEFAULT_PORT,
+        jobs=args.jobs,
+        queue=args.queue if args.queue is not None else DEFAULT_QUEUE,
+        timeout=args.timeout or DEFAULT_TIMEOUT,
+        extract_options=extract_options,
+        output_options=output_options,
+        max_upload=args.max_upload or DEFAULT_MAX_UPLOAD,
+        emit=emit
+    )
+
 def main():
     """Main CLI entry point."""
 
     # Parse arguments
-    if len(sys.argv) == 1:
+    args = parse_args(sys.argv[1:])
+
+    # Machine-readable modes keep stdout for results; errors, warnings and
+    # any --profile table go to stderr
+    emit = emit_jsonl if args.format == 'jsonl' else emit_path if args.quiet else None
+    if emit:
+        console.file = sys.stderr
+
+    # Check for help flag
+    if args.help or args.paths[:1] == ['help']:
+        show_help()
+        sys.exit(0)
+
+    if args.paths[:1] == ['merge-summaries']:
+        run_merge_summaries(args)
+        return
+
+    if not args.paths and args.from_list is None:
         show_error(
             "No input specified",
             "You need to provide a video file or directory.",
@@ -352,7 +1687,72 @@ def main():
         )
         sys.exit(1)
 
-    if len(sys.argv) > 3:
+    extract_options = build_extract_options(args)
+
+    output_options = {
+        'format': args.image_format,
+        'quality': args.quality,
+        'progressive': args.progressive,
+        'optimize': args.optimize,
+        'png_compression': args.png_compression,
+        'sizes': args.sizes,
+    }
+    if args.contact_sheet:
+        output_options['contact_sheet'] = True
+
+    # Watch mode runs indefinitely, so it only keeps aggregate metrics
+    profiler = make_profiler(args, keep_videos=args.paths[:1] != ['watch'])
+
+    if args.paths[:1] == ['watch']:
+        run_watch(args, extract_options, output_options, profiler, emit)
+        return
+
+    if args.paths[:1] == ['serve']:
+        run_serve(args, extract_options, output_options, emit)
+        return
+
+    if args.from_list is not None:
+        if len(args.paths) > 1:
+            show_error(
+                "Too many arguments",
+                "With --from-list, the only argument is the output directory.",
+                "Try: lastframe --from-list videos.txt ./frames"
+            )
+            sys.exit(1)
+
+        output_arg = args.paths[0] if args.paths else None
+        if output_arg and Path(output_arg).is_file():
+            show_error(
+                "Invalid output for list mode",
+                f"Output must be a directory, not a file: {output_arg}",
+                "Provide a directory path, or omit it to save next to each video."
+            )
+            sys.exit(1)
+
+        process_batch(
+            None, output_arg,
+            jobs=args.jobs,
+            extract_options=extract_options,
+            use_cache=not args.no_cache,
+            dedup=not args.no_dedup,
+            schedule=args.schedule,
+            refresh_cache=args.refresh_cache,
+            cache_max_entries=args.cache_max_entries,
+            include=args.include,
+            exclude=args.exclude,
+            output_options=output_options,
+            profiler=profiler,
+            emit=emit,
+            from_list=args.from_list,
+            shard=args.shard,
+            summary_path=args.summary_json,
+            timeout=args.timeout,
+            memory_budget=args.memory_budget
+        )
+        finish_profile(args, profiler)
+        return
+
+    if len(args.paths) > 2:
         show_error(
             "Too many arguments",
             "lastframe accepts at most 2 arguments: <input> [output]",
@@ -360,18 +1760,33 @@ def main():
         )
         sys.exit(1)
 
-    # Check for help flag
-    if sys.argv[1] in ['-h', '--help', 'help']:
-        show_help()
-        sys.exit(0)
-
-    input_arg = sys.argv[1]
-    output_arg = sys.argv[2] if len(sys.argv) == 3 else None
+    input_arg = args.paths[0]
+    output_arg = args.paths[1] if len(args.paths) == 2 else None
 
     input_path = Path(input_arg)
 
+    # Standard input, FIFOs and files still being written are read front to
+    # back as streams
+    from .stream import DEFAULT_SETTLE, is_stream
+
+    stream = None
+    if args.follow or is_stream(input_arg):
+        if args.timeout or extract_options.get('targets'):
+            show_error(
+                "Invalid arguments for a stream",
+                "A stream is read once from start to end, so --timeout and --targets don't apply.",
+                f"Try: lastframe {input_arg} frame.jpg"
+            )
+            sys.exit(1)
+        stream = {
+            'follow': args.follow and input_path.is_file(),
+            'settle': args.settle if args.settle is not None else DEFAULT_SETTLE,
+        }
+        if input_arg == '-' and not output_arg:
+            output_arg = str(default_output_path(Path('stdin'), output_options))
+
     # Validate input exists
-    if not input_path.exists():
+    if input_arg != '-' and not input_path.exists():
         show_error(
             "Input not found",
             f"The specified path doesn't exist: {input_arg}",
@@ -390,10 +1805,38 @@ def main():
             )
             sys.exit(1)
 
-        process_batch(input_path, output_arg)
+        process_batch(
+            input_path, output_arg,
+            jobs=args.jobs,
+            extract_options=extract_options,
+            use_cache=not args.no_cache,
+            dedup=not args.no_dedup,
+            schedule=args.schedule,
+            refresh_cache=args.refresh_cache,
+            cache_max_entries=args.cache_max_entries,
+            recursive=args.recursive,
+            include=args.include,
+            exclude=args.exclude,
+            output_options=output_options,
+            profiler=profiler,
+            emit=emit,
+            shard=args.shard,
+            summary_path=args.summary_json,
+            timeout=args.timeout,
+            memory_budget=args.memory_budget
+        )
+        finish_profile(args, profiler)
 
-    elif input_path.is_file():
+    elif stream is not None or input_path.is_file():
         # Single file mode
+        if args.shard or args.summary_json:
+            show_error(
+                "Batch options with a single file",
+                "--shard and --summary-json only apply to directories and --from-list.",
+                f"Try: lastframe {input_arg}"
+            )
+            sys.exit(1)
+
         if output_arg and Path(output_arg).is_dir():
             show_error(
                 "Invalid output for single file",
@@ -402,8 +1845,25 @@ def main():
             )
             sys.exit(1)
 
+        if emit:
+            # Same path as batch mode, without any rich rendering
+            if args.timeout:
+                success, result = _run_killable(
+                    process_single_video, args.timeout,
+                    input_path, output_arg, extract_options, output_options
+                )
+            else:
+                success, result = process_single_video(
+                    input_path, output_arg, extract_options, output_options, stream
+                )
+            if profiler:
+                profiler.record(input_path, success, result)
+            emit(input_path, success, result)
+            finish_profile(args, profiler)
+            sys.exit(0 if success else 1)
+
         # Check file extension
-        if input_path.suffix.lower() not in VIDEO_EXTENSIONS:
+        if stream is None and input_path.suffix.lower() not in VIDEO_EXTENSIONS:
             console.print()
             console.print(f"[yellow]⚠️  Warning:[/yellow] '{input_path.suffix}' might not be a video file.")
             console.print(f"[dim]Supported formats: {', '.join(sorted(VIDEO_EXTENSIONS))}[/dim]")
@@ -415,56 +1875,108 @@ def main():
         console.print("[bold magenta]lastframe[/bold magenta] [dim]v1.1.0[/dim]")
         console.print()
 
-        # Process with progress
-        with Progress(
-            SpinnerColumn(spinner_name="dots"),
-            TextColumn("[cyan]{task.description}"),
-            console=console,
-            transient=True
-        ) as progress:
-            task = progress.add_task("analyzing video...", total=None)
-
-            try:
-                video_info = get_video_info(input_path)
-            except Exception as e:
-                console.print()
-                show_error(
-                    "Failed to analyze video",
-                    f"An error occurred while reading the video file: {str(e)}",
-                    "The file might be corrupted or in an unsupported format.\nTry converting it to MP4 using: ffmpeg -i input.mov output.mp4"
-                )
-                sys.exit(1)
+        from rich.progress import Progress, SpinnerColumn, TextColumn
+        from .core import VideoSession, extract_last_frame
+
+        if args.timeout or extract_options.get('targets') or stream:
+            # Decode in a worker process that is killed if it takes too long,
+            # extract several targets in one pass, or read a stream to its end
+            with Progress(
+                SpinnerColumn(spinner_name="dots"),
+                TextColumn("[cyan]{task.description}"),
+                console=console,
+                transient=True
+            ) as progress:
+                if stream is None:
+                    description = "extracting frame..."
+                elif stream['follow']:
+                    description = f"reading {input_path.name} until it stops growing..."
+                else:
+                    description = "reading stream..."
+                progress.add_task(description, total=None)
+                if args.timeout:
+                    success, result = _run_killable(analyze_video, args.timeout, input_path, extract_options)
+                else:
+                    success, result = analyze_video(input_path, extract_options, stream)
 
-            if not video_info:
-                console.print()
-                show_error(
-                    "Cannot open video file",
-                    "The file exists but couldn't be opened as a video.",
-                    "Possible reasons:\n• File is corrupted\n• Unsupported codec\n• File is not actually a video\n\nTry opening the file in a video player to verify it works."
-                )
-                sys.exit(1)
-
-            if video_info['total_frames'] == 0:
+            if not success:
                 console.print()
                 show_error(
-                    "Empty video",
-                    "The video file contains no frames.",
-                    "The file might be corrupted or incomplete."
+                    "No frames extracted",
+                    result,
+                    "The video might be corrupted, or need more time than --timeout allows."
                 )
                 sys.exit(1)
 
-            progress.update(task, description="extracting frame...")
-
-            try:
-                frame, frame_num, blur_score, status = extract_last_frame(input_path)
-            except Exception as e:
-                console.print()
-                show_error(
-                    "Frame extraction failed",
-                    f"An error occurred while extracting frames: {str(e)}",
-                    "The video file might have issues. Try re-encoding it with ffmpeg."
-                )
-                sys.exit(1)
+            frame = result['frame']
+            frame_num = result['frame_num']
+            blur_score = result['blur_score']
+            status = result['status']
+            video_info = result['video_info']
+            container_opens = result['container_opens']
+            frames_decoded = result['frames_decoded']
+            peak_frame_bytes = result['peak_frame_bytes']
+            prefilter_counts = result.get('prefilter')
+            stage_seconds = result['stage_seconds']
+        else:
+            # Process with progress, opening the video once for probing and extraction
+            with VideoSession(input_path, extract_options.get('backend')) as session:
+                with Progress(
+                    SpinnerColumn(spinner_name="dots"),
+                    TextColumn("[cyan]{task.description}"),
+                    console=console,
+                    transient=True
+                ) as progress:
+                    task = progress.add_task("analyzing video...", total=None)
+
+                    try:
+                        video_info = session.info
+                    except Exception as e:
+                        console.print()
+                        show_error(
+                            "Failed to analyze video",
+                            f"An error occurred while reading the video file: {str(e)}",
+                            "The file might be corrupted or in an unsupported format.\nTry converting it to MP4 using: ffmpeg -i input.mov output.mp4"
+                        )
+                        sys.exit(1)
+
+                    if not video_info:
+                        console.print()
+                        show_error(
+                            "Cannot open video file",
+                            "The file exists but couldn't be opened as a video.",
+                            "Possible reasons:\n• File is corrupted\n• Unsupported codec\n• File is not actually a video\n\nTry opening the file in a video player to verify it works."
+                        )
+                        sys.exit(1)
+
+                    if video_info['total_frames'] == 0:
+                        console.print()
+                        show_error(
+                            "Empty video",
+                            "The video file contains no frames.",
+                            "The file might be corrupted or incomplete."
+                        )
+                        sys.exit(1)
+
+                    progress.update(task, description="extracting frame...")
+
+                    try:
+                        frame, frame_num, blur_score, status = extract_last_frame(session, **extract_options)
+                    except Exception as e:
+                        console.print()
+                        show_error(
+                            "Frame extraction failed",
+                            f"An error occurred while extracting frames: {str(e)}",
+                            "The video file might have issues. Try re-encoding it with ffmpeg."
+                        )
+                        sys.exit(1)
+
+                container_opens = session.opens
+                frames_decoded = session.decode_stats['grabbed']
+                peak_frame_bytes = session.peak_frame_bytes
+                prefilter_counts = session.prefilter_counts
+                stage_seconds = session.stage_seconds()
+            result = {'frame': frame}
 
         if frame is None:
             console.print()
@@ -479,8 +1991,7 @@ def main():
         if output_arg:
             output_path = Path(output_arg)
         else:
-            output_filename = input_path.stem + "_lastframe.jpg"
-            output_path = input_path.parent / output_filename
+            output_path = default_output_path(input_path, output_options)
 
         # Check if we can write to the directory
         output_dir = output_path.parent
@@ -492,15 +2003,14 @@ def main():
             )
             sys.exit(1)
 
-        # Save frame with best quality
+        # Save the frame and any smaller renditions, atomically
         try:
-            success = cv2.imwrite(
-                str(output_path),
-                frame,
-                [cv2.IMWRITE_JPEG_QUALITY, 100]  # Maximum quality
-            )
-            if not success:
-                raise IOError("cv2.imwrite returned False")
+            start = time.perf_counter()
+            renditions = _encode_outputs(result, output_path, output_options)
+            encoded = time.perf_counter()
+            bytes_written = sum(write_atomic(rendition_file, data) for rendition_file, data in renditions)
+            stage_seconds['encode'] = encoded - start
+            stage_seconds['write'] = time.perf_counter() - encoded
         except Exception as e:
             show_error(
                 "Failed to save image",
@@ -511,7 +2021,10 @@ def main():
 
         # Show success message
         console.print(f"[bold green]✓[/bold green] extracted {status}")
-        console.print(f"[bold green]✓[/bold green] saved to [cyan]{output_path.name}[/cyan]")
+        for entry in result.get('targets', [])[1:]:
+            console.print(f"  [dim]{entry['target']}: {entry['status']}[/dim]")
+        saved = ", ".join(rendition_file.name for rendition_file, _ in renditions)
+        console.print(f"[bold green]✓[/bold green] saved to [cyan]{saved}[/cyan]")
         console.print()
 
         # Show details
@@ -522,6 +2035,21 @@ def main():
         info_text.append(f"• {video_info['fps']:.1f} fps\n", style="dim")
         info_text.append("  frame: ", style="dim")
         info_text.append(f"#{frame_num + 1} of {video_info['total_frames']}", style="bold")
+        info_text.append(f" • {container_opens} container open{'s' if container_opens != 1 else ''}", style="dim")
+        info_text.append(f" • {frames_decoded} frames decoded", style="dim")
+        info_text.append("\n  memory: ", style="dim")
+        info_text.append(f"{peak_frame_bytes / 1e6:.1f} MB", style="bold")
+        info_text.append(" of decoded frames at peak", style="dim")
+        if prefilter_counts is not None:
+            rejected = sum(count for reason, count in prefilter_counts.items() if reason != 'scored')
+            info_text.append("\n  prefilter: ", style="dim")
+            info_text.append(f"{rejected} rejected cheaply", style="bold")
+            reasons = ", ".join(
+                f"{count} {reason}" for reason, count in prefilter_counts.items() if reason != 'scored' and count
+            )
+            if reasons:
+                info_text.append(f" ({reasons})", style="dim")
+            info_text.append(f" • {prefilter_counts['scored']} scored in full", style="dim")
 
         console.print(Panel(
             info_text,
@@ -530,5 +2058,20 @@ def main():
         ))
         console.print()
 
+        if profiler:
+            profiler.record(input_path, True, {
+                'stage_seconds': stage_seconds,
+                'frames_decoded': frames_decoded,
+                'container_opens': container_opens,
+                'peak_frame_bytes': peak_frame_bytes,
+                'bytes_written': bytes_written,
+                'prefilter': prefilter_counts,
+            })
+            finish_profile(args, profiler)
+
 if __name__ == "__main__":
+    import multiprocessing
+
+    # Needed for the process pool in PyInstaller builds
+    multiprocessing.freeze_support()
     main()
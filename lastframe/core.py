@@ -0,0 +1,1161 @@
+"""
+Frame extraction without the command line interface.
+
+Everything here needs only OpenCV and numpy, so scripts and services can
+pick frames without importing rich or paying for the CLI's startup:
+
+    from lastframe.core import extract_last_frame
+
+    result = extract_last_frame("movie.mp4")
+    if result.frame is not None:
+        print(result.frame_num, result.status)
+"""
+import time
+from collections import deque
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .backends import get_backend
+from .mp4 import read_index
+from .output import DEFAULT_OUTPUT_OPTIONS, IMAGE_FORMATS, output_format, rendition_path
+
+# Number of frames at the end of the video considered as candidates
+TAIL_WINDOW = 3
+
+# Frames grabbed (but never retrieved) before the tail window. Seeking lands
+# on the previous keyframe and decodes forward anyway, so a short lead-in
+# costs nothing extra and protects against containers that seek a bit late.
+TAIL_LEAD_IN = 2
+
+# OpenCV seeks this many (average frame rate) frames before the frame asked
+# for and decodes forward from the keyframe it lands on
+OPENCV_SEEK_BACKOFF = 16
+
+# Most seeks spent looking for the last frame that still decodes
+RECOVERY_PROBES = 16
+
+def calculate_blur_score(frame):
+    """
+    Calculate blur score using Laplacian variance.
+    Higher score = sharper image. Lower score = more blurry.
+
+    The Laplacian of an 8-bit image fits in 16 bits exactly, so it is kept
+    as CV_16S (a quarter of the memory of CV_64F, which matters for 4K and
+    8K frames) and its variance computed in double precision by meanStdDev.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    depth = cv2.CV_16S if gray.dtype == np.uint8 else cv2.CV_32F
+    _, stddev = cv2.meanStdDev(cv2.Laplacian(gray, depth))
+    return float(stddev[0, 0]) ** 2
+
+def tenengrad_score(frame):
+    """
+    Calculate sharpness as the mean squared Sobel gradient magnitude.
+    Less sensitive to pixel noise than the Laplacian.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    gx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+    return float((gx * gx + gy * gy).mean())
+
+def fft_score(frame):
+    """
+    Calculate sharpness as the share of spectral energy at high frequencies.
+    Returns a percentage; blur removes high frequencies first.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY).astype(np.float32)
+    gray -= gray.mean()
+
+    # Window the image so the frame borders don't leak into high frequencies
+    height, width = gray.shape
+    gray *= cv2.createHanningWindow((width, height), cv2.CV_32F)
+
+    power = np.abs(np.fft.rfft2(gray)) ** 2
+    fy = np.fft.fftfreq(height)[:, None]
+    fx = np.fft.rfftfreq(width)[None, :]
+    high = (fx ** 2 + fy ** 2) > FFT_LOW_FREQ_RADIUS ** 2
+
+    total = power.sum()
+    if total == 0:
+        return 0.0
+    return float(100 * power[high].sum() / total)
+
+# Frequencies below this radius (in cycles per pixel) count as low frequency
+FFT_LOW_FREQ_RADIUS = 0.05
+
+# Sharpness metrics by name: (score function, default blur threshold).
+# Scores are only comparable within one metric, so each has its own threshold.
+SHARPNESS_METRICS = {
+    'laplacian': (calculate_blur_score, 100),
+    'tenengrad': (tenengrad_score, 1000),
+    'fft': (fft_score, 1.0),
+}
+
+DEFAULT_METRIC = 'laplacian'
+
+def register_metric(name, score_fn, default_threshold):
+    """
+    Register a sharpness metric.
+
+    Args:
+        name: Name used with --metric and extract_last_frame(metric=...)
+        score_fn: Function taking a BGR frame, higher = sharper
+        default_threshold: Blur threshold used when none is given
+    """
+    SHARPNESS_METRICS[name] = (score_fn, default_threshold)
+
+def get_metric(name):
+    """Look up a sharpness metric. Returns (score_fn, default_threshold)."""
+    try:
+        return SHARPNESS_METRICS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown sharpness metric '{name}' "
+            f"(available: {', '.join(sorted(SHARPNESS_METRICS))})"
+        )
+
+# Longest side of the reduced image used by the fast scoring path
+PYRAMID_SIZE = 640
+
+# Candidates whose reduced-image score is within this fraction of the best
+# one are rescored at full resolution before picking a winner
+PYRAMID_MARGIN = 0.15
+
+def _downscale(frame):
+    """Shrink a frame so its longest side is at most PYRAMID_SIZE."""
+    height, width = frame.shape[:2]
+    scale = PYRAMID_SIZE / max(height, width)
+    if scale >= 1:
+        return frame
+    size = (max(1, int(width * scale)), max(1, int(height * scale)))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+def _center_crop(frame):
+    """Cut the centre of a frame, with as many pixels as _downscale keeps."""
+    height, width = frame.shape[:2]
+    scale = PYRAMID_SIZE / max(height, width)
+    if scale >= 1:
+        return frame
+    crop_h, crop_w = max(1, int(height * scale)), max(1, int(width * scale))
+    top, left = (height - crop_h) // 2, (width - crop_w) // 2
+    return frame[top:top + crop_h, left:left + crop_w]
+
+PYRAMID_MODES = {
+    'downscale': _downscale,
+    'crop': _center_crop,
+}
+
+def _pyramid_reduce(pyramid):
+    """The reducing function of a pyramid mode, or None for full resolution."""
+    if pyramid is None:
+        return None
+    try:
+        return PYRAMID_MODES[pyramid]
+    except KeyError:
+        raise ValueError(
+            f"Unknown pyramid mode '{pyramid}' "
+            f"(available: {', '.join(sorted(PYRAMID_MODES))})"
+        )
+
+def score_frames(frames, metric=DEFAULT_METRIC, pyramid=None):
+    """
+    Score decoded frames with a sharpness metric.
+
+    With a pyramid mode every frame is first scored on a reduced copy (see
+    PYRAMID_MODES). Only the winner, and any candidate within PYRAMID_MARGIN
+    of it, is scored again at full resolution. The remaining scores are
+    scaled by the winner's full/reduced ratio so all scores stay on the
+    full-resolution scale that blur thresholds are expressed in.
+
+    Args:
+        frames: List of (frame, frame_num)
+        metric: Name of a registered sharpness metric
+        pyramid: None for full resolution, or a PYRAMID_MODES name
+
+    Returns:
+        list: (frame, frame_num, score) in the same order as frames
+    """
+    score_fn, _ = get_metric(metric)
+    reduce = _pyramid_reduce(pyramid)
+
+    if reduce is None or len(frames) == 0:
+        return [(frame, frame_num, score_fn(frame)) for frame, frame_num in frames]
+
+    return rescore_pyramid(frames, [score_fn(reduce(frame)) for frame, _ in frames], score_fn)
+
+def rescore_pyramid(frames, cheap, score_fn):
+    """
+    The full-resolution half of a pyramid score_frames, for frames whose
+    reduced scores `cheap` are already known.
+
+    Args:
+        frames: List of (frame, frame_num)
+        cheap: Reduced score of each frame
+        score_fn: The metric's score function
+
+    Returns:
+        list: (frame, frame_num, score) in the same order as frames
+    """
+    best = max(range(len(frames)), key=cheap.__getitem__)
+
+    full = {}
+    for i, score in enumerate(cheap):
+        if i == best or score >= cheap[best] * (1 - PYRAMID_MARGIN):
+            full[i] = score_fn(frames[i][0])
+
+    scale = full[best] / cheap[best] if cheap[best] else 1.0
+
+    return [
+        (frame, frame_num, full[i] if i in full else cheap[i] * scale)
+        for i, (frame, frame_num) in enumerate(frames)
+    ]
+
+# Cheap pre-filter (see Prefilter). Luma thresholds are on the 0-255 scale
+# of a tiny grayscale thumbnail, so they cost nothing next to a sharpness score
+PREFILTER_DEFAULTS = {
+    'black': 16.0,          # mean luma below this: a black frame
+    'fade': 40.0,           # mean luma below this with contrast below fade_contrast: a fade
+    'fade_contrast': 10.0,
+    'contrast': 3.0,        # luma standard deviation below this: a uniform frame
+    'duplicate': 1.0,       # mean difference to the next frame below this: a near-duplicate (0 turns it off)
+    'skip': 300,            # rejected frames the backward search may extend past max_depth
+}
+
+# Why a frame was rejected, in the order the checks run
+PREFILTER_REASONS = ('black', 'fade', 'uniform', 'duplicate')
+
+# Width of the thumbnail the pre-filter looks at. It is sampled at
+# PREFILTER_SAMPLE times that size before area averaging: resizing a 4K
+# frame straight to the thumbnail reads every pixel and costs nearly as
+# much as the Laplacian, sampling first takes a fraction of a millisecond
+PREFILTER_THUMB_WIDTH = 32
+PREFILTER_SAMPLE = 8
+
+def parse_prefilter(spec):
+    """
+    Parse pre-filter thresholds like 'black=20,duplicate=0' over PREFILTER_DEFAULTS.
+
+    An empty spec gives the defaults. Raises ValueError on unknown names
+    and bad values.
+    """
+    options = dict(PREFILTER_DEFAULTS)
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        name, sep, value = item.partition('=')
+        name = name.strip()
+        if not sep or name not in PREFILTER_DEFAULTS:
+            raise ValueError(
+                f"expected name=value with a name out of {', '.join(PREFILTER_DEFAULTS)}, got '{item}'"
+            )
+        try:
+            number = int(value) if name == 'skip' else float(value)
+        except ValueError:
+            raise ValueError(f"{name} must be a number, got '{value.strip()}'")
+        if number < 0:
+            raise ValueError(f"{name} can't be negative")
+        options[name] = number
+    return options
+
+def _thumbnail(frame):
+    """A PREFILTER_THUMB_WIDTH wide grayscale float32 copy of a frame."""
+    height, width = frame.shape[:2]
+    size = (PREFILTER_THUMB_WIDTH, max(1, round(PREFILTER_THUMB_WIDTH * height / width)))
+    sample = (size[0] * PREFILTER_SAMPLE, size[1] * PREFILTER_SAMPLE)
+    if width > sample[0] and height > sample[1]:
+        frame = cv2.resize(frame, sample, interpolation=cv2.INTER_NEAREST)
+    thumb = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    if thumb.ndim == 3:
+        thumb = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+    return thumb.astype(np.float32)
+
+class Prefilter:
+    """
+    Rejects frames that aren't worth a sharpness score, from a tiny thumbnail.
+
+    Fades to black and title cards end a lot of videos. Their frames cost
+    a full Laplacian pass each and compression noise can even make them
+    look sharp. Each frame is shrunk to a thumbnail first, and rejected as:
+
+        black      mean luma below `black`
+        fade       mean luma below `fade` and contrast below `fade_contrast`
+        uniform    contrast (luma standard deviation) below `contrast`
+        duplicate  thumbnail within `duplicate` levels of the frame after it
+
+    Of a run of near-duplicates only the newest is scored. A thumbnail
+    hardly changes when a frame is blurred, so a blurry copy of a sharp
+    frame can be folded into it: keep `duplicate` small, or 0 to turn it off.
+
+    One Prefilter follows one search, window after window. `counts` holds
+    the frames rejected per reason and those passed on to be scored;
+    `skipped` the numbers of the rejected frames (see select_frame);
+    `fallback` is (frame, frame_num, reason) of the newest rejected frame,
+    for when nothing passes.
+    """
+
+    def __init__(self, options=None):
+        self.options = dict(PREFILTER_DEFAULTS, **(options or {}))
+        self.counts = dict.fromkeys(PREFILTER_REASONS + ('scored',), 0)
+        self.skipped = deque()
+        self.fallback = None
+        # Of the frames in the last window filtered
+        self.seen = 0
+        self.newest = None
+        self.oldest = None
+
+    @property
+    def rejected(self):
+        """Frames rejected so far."""
+        return sum(self.counts[reason] for reason in PREFILTER_REASONS)
+
+    def describe(self):
+        """The rejections so far, e.g. '24 black, 6 fade'."""
+        return ', '.join(f"{self.counts[reason]} {reason}" for reason in PREFILTER_REASONS if self.counts[reason])
+
+    def classify(self, thumb):
+        """Why a thumbnail is rejected on its own ('black', 'fade', 'uniform'), or None."""
+        options = self.options
+        mean, contrast = float(thumb.mean()), float(thumb.std())
+        if mean < options['black']:
+            return 'black'
+        if mean < options['fade'] and contrast < options['fade_contrast']:
+            return 'fade'
+        if contrast < options['contrast']:
+            return 'uniform'
+        return None
+
+    def _reject(self, frame, frame_num, reason):
+        self.counts[reason] += 1
+        self.skipped.append(frame_num)
+        if self.fallback is None or frame_num > self.fallback[1]:
+            self.fallback = (frame, frame_num, reason)
+
+    def filter(self, frames):
+        """
+        Yield the frames worth scoring.
+
+        Args:
+            frames: Iterable of (frame, frame_num), oldest first
+
+        Yields:
+            (frame, frame_num), oldest first. Each frame is held back until
+            the next one has been compared with it.
+        """
+        self.seen = 0
+        self.newest = self.oldest = None
+        duplicate = self.options['duplicate']
+        held = None
+        for frame, frame_num in frames:
+            self.seen += 1
+            self.newest = frame_num
+            if self.oldest is None:
+                self.oldest = frame_num
+
+            thumb = _thumbnail(frame)
+            reason = self.classify(thumb)
+            if reason is not None:
+                self._reject(frame, frame_num, reason)
+                continue
+
+            if held is not None:
+                if duplicate and float(np.abs(thumb - held[2]).mean()) < duplicate:
+                    # The newer copy stands in for the older one
+                    self._reject(held[0], held[1], 'duplicate')
+                else:
+                    self.counts['scored'] += 1
+                    yield held[0], held[1]
+            held = (frame, frame_num, thumb)
+
+        if held is not None:
+            self.counts['scored'] += 1
+            yield held[0], held[1]
+
+    def forget_before(self, frame_num):
+        """Drop skipped frame numbers below frame_num; only for frames filtered oldest first."""
+        while self.skipped and self.skipped[0] < frame_num:
+            self.skipped.popleft()
+
+    def fallback_result(self, metric=DEFAULT_METRIC):
+        """The newest rejected frame, scored, for when no frame passed."""
+        frame, frame_num, _ = self.fallback
+        score_fn, _ = get_metric(metric)
+        score = score_fn(frame)
+        self.counts['scored'] += 1
+        return ExtractionResult(
+            frame, frame_num, score,
+            f"last frame (no frame passed the pre-filter, {self.describe()} ⚠️  score: {score:.1f})",
+            [(frame_num, score)]
+        )
+
+    def annotate(self, result):
+        """Add the frames skipped to a result's status."""
+        if self.rejected:
+            result.status += f" after skipping {self.describe()} frames"
+
+def _fourcc_name(value):
+    """The codec FourCC OpenCV reports, e.g. 'avc1' or 'hev1', or None."""
+    value = int(value)
+    if value <= 0:
+        return None
+    name = value.to_bytes(4, 'little').decode('ascii', 'replace').strip('\x00 ').lower()
+    return name or None
+
+class VideoSession:
+    """
+    A video opened once and shared between probing and frame extraction.
+
+    Opening a container and probing its codec is a large part of the per-file
+    cost on network storage and for MKV/WebM, so the capture is opened lazily
+    on first use and the metadata is cached. `opens` counts how many times
+    the container was actually opened and `decode_stats` how many seeks and
+    frame decodes extraction needed. `timings` adds up the seconds spent
+    opening, probing and scoring (see stage_seconds), and `peak_frame_bytes`
+    is the most memory decoded frames took up at any one time.
+    `prefilter_counts` is the last search's Prefilter counts, or None when
+    it ran without a pre-filter.
+
+    Frames are decoded by a backend from lastframe.backends, OpenCV unless
+    another is named. Use it as a context manager so the capture is always
+    released:
+
+        with VideoSession("movie.mp4") as session:
+            info = session.info
+            frame, frame_num, blur_score, status = extract_last_frame(session)
+    """
+
+    def __init__(self, video_path, backend=None):
+        self.video_path = Path(video_path)
+        self.backend = backend
+        self._open_capture = get_backend(backend)
+        self.cap = None
+        self.opens = 0
+        self.decode_stats = _new_decode_stats()
+        self.timings = {'open': 0.0, 'probe': 0.0, 'score': 0.0}
+        self.peak_frame_bytes = 0
+        self.prefilter_counts = None
+        self._info = None
+        self._index = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def open(self):
+        """Open the container if needed. Returns True if it is usable."""
+        if self.cap is None:
+            start = time.perf_counter()
+            self.cap = self._open_capture(str(self.video_path))
+            self.timings['open'] += time.perf_counter() - start
+            self.opens += 1
+        return self.cap.isOpened()
+
+    def release(self):
+        """Release the underlying capture."""
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    @property
+    def info(self):
+        """Basic video information, or None if the file can't be opened."""
+        if self._info is None:
+            if not self.open():
+                return None
+
+            index = self.index
+            start = time.perf_counter()
+            self._info = {
+                'total_frames': (
+                    index.frame_count if index is not None
+                    else int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                ),
+                'fps': self.cap.get(cv2.CAP_PROP_FPS),
+                'width': int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                'height': int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                'codec': _fourcc_name(self.cap.get(cv2.CAP_PROP_FOURCC))
+            }
+            self.timings['probe'] += time.perf_counter() - start
+
+        return self._info
+
+    @property
+    def index(self):
+        """
+        The container's SampleIndex (exact frame count, keyframes and
+        timestamps) for MP4/MOV files, or None for other containers.
+        """
+        if self._index is False:
+            start = time.perf_counter()
+            self._index = read_index(self.video_path)
+            self.timings['probe'] += time.perf_counter() - start
+        return self._index
+
+    def hold(self, frames):
+        """Note decoded frames that are all held at once, for peak_frame_bytes."""
+        held = {id(frame): frame.nbytes for frame in frames}
+        self.peak_frame_bytes = max(self.peak_frame_bytes, sum(held.values()))
+
+    def stage_seconds(self):
+        """Seconds spent so far per stage: open, probe, seek, decode and score."""
+        return {
+            'open': self.timings['open'],
+            'probe': self.timings['probe'],
+            'seek': self.decode_stats['seek_seconds'],
+            'decode': self.decode_stats['decode_seconds'],
+            'score': self.timings['score'],
+        }
+
+def get_video_info(video_path, backend=None):
+    """Get basic video information."""
+    with VideoSession(video_path, backend) as session:
+        return session.info
+
+# Frames FFmpeg keeps inside the decoder (references and reordering), as YUV 4:2:0
+DECODER_FRAMES = 8
+
+def estimate_peak_bytes(width, height, search_window=TAIL_WINDOW, streaming=False):
+    """
+    Rough peak memory of extracting a frame from a width x height video.
+
+    Counts the BGR frames held for scoring (the whole window, or only the
+    newest, the best and the one being decoded when streaming), the
+    decoder's own frames and the grayscale and Laplacian buffers of a score.
+    """
+    pixels = width * height
+    held = 3 if streaming else search_window + 1
+    return pixels * (3 * held + DECODER_FRAMES * 3 // 2 + 3)
+
+def _new_decode_stats():
+    """Counters filled in by decode_range, with the seconds spent seeking and decoding."""
+    return {
+        'seeks': 0, 'grabbed': 0, 'retrieved': 0, 'probes': 0,
+        'seek_seconds': 0.0, 'decode_seconds': 0.0,
+    }
+
+def _seek_indexed(cap, index, frame_num, stats):
+    """
+    Seek so that the next frame is `frame_num` or an earlier one, and grab it.
+
+    OpenCV maps frame numbers to timestamps with the average frame rate, so
+    in variable frame rate videos a seek can land late or past the end.
+    Where it really landed is read back from the grabbed frame's timestamp,
+    and the seek is retried further back until it lands in time.
+
+    Returns:
+        int: Frame number of the grabbed frame, or None if nothing could be
+        grabbed
+    """
+    target = frame_num
+    backoff = OPENCV_SEEK_BACKOFF
+
+    while True:
+        # A freshly opened capture already sits at frame 0
+        if target > 0 or int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            stats['seeks'] += 1
+
+        if cap.grab():
+            landed = index.frame_at(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000)
+            if landed <= frame_num or target == 0:
+                return landed
+            stats['grabbed'] += 1
+        elif target == 0:
+            return None
+
+        target = max(0, target - backoff)
+        backoff *= 2
+
+def iter_range(cap, start, stop=None, lead_in=TAIL_LEAD_IN, stats=None, index=None,
+               wanted=None):
+    """
+    Decode frames [start, stop) of an open capture with a single seek,
+    yielding (frame, frame_num) oldest first.
+
+    Every CAP_PROP_POS_FRAMES seek restarts decoding from the previous
+    keyframe, so seeking once per frame pays for the whole GOP again each
+    time. Instead we seek once to just before the range, walk forward with
+    grab() and only retrieve() frames inside the range. Frames are handed
+    over one at a time, so a long range never sits in memory; only the time
+    spent seeking and decoding is counted in stats, not the caller's.
+
+    Args:
+        cap: An opened cv2.VideoCapture, or a capture from another backend
+        start: First frame number to retrieve
+        stop: Frame number to stop at, or None to read until the end of the
+            video. Reading to the end means a frame count that is a little
+            short still yields the real last frames.
+        lead_in: Frames to grab before the range starts
+        stats: Optional dict of counters (seeks, grabbed, retrieved,
+            seek_seconds, decode_seconds) to add to
+        index: The video's SampleIndex, if it has one. Frames are then
+            numbered from their timestamps instead of OpenCV's estimate,
+            and no lead-in is needed.
+        wanted: Optional callable taking a frame number; frames it rejects
+            are only grabbed, never retrieved (converted to BGR) or yielded
+    """
+    if stats is None:
+        stats = _new_decode_stats()
+
+    start_time = time.perf_counter()
+    if index is not None:
+        # The seek grabs the frame it landed on to find out which one it is
+        frame_num = _seek_indexed(cap, index, start, stats)
+        grabbed = frame_num is not None
+    else:
+        frame_num = max(0, start - lead_in)
+        grabbed = False
+
+        # A freshly opened capture already sits at frame 0
+        if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != frame_num:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+            stats['seeks'] += 1
+    stats['seek_seconds'] += time.perf_counter() - start_time
+
+    while frame_num is not None and (stop is None or frame_num < stop):
+        decode_start = time.perf_counter()
+        if grabbed:
+            grabbed = False
+        elif not cap.grab():
+            stats['decode_seconds'] += time.perf_counter() - decode_start
+            return
+        stats['grabbed'] += 1
+
+        ret = False
+        if frame_num >= start and (wanted is None or wanted(frame_num)):
+            ret, frame = cap.retrieve()
+            if ret:
+                stats['retrieved'] += 1
+        stats['decode_seconds'] += time.perf_counter() - decode_start
+
+        if ret:
+            yield frame, frame_num
+        frame_num += 1
+
+def decode_range(cap, start, stop=None, lead_in=TAIL_LEAD_IN, keep=None, stats=None,
+                 index=None):
+    """
+    Decode frames [start, stop) of an open capture with a single seek.
+
+    Takes the same arguments as iter_range, plus `keep` to hold only the
+    newest `keep` frames in a ring buffer.
+
+    Returns:
+        tuple: (frames, stats) where frames is a list of (frame, frame_num)
+        ordered newest first
+    """
+    if stats is None:
+        stats = _new_decode_stats()
+
+    ring = deque(iter_range(cap, start, stop, lead_in, stats, index), maxlen=keep)
+    return list(reversed(ring)), stats
+
+def decode_tail(cap, total_frames, window=TAIL_WINDOW, lead_in=TAIL_LEAD_IN, stats=None,
+                index=None):
+    """
+    Decode the last `window` frames of an open capture with a single seek.
+
+    Returns:
+        tuple: (frames, stats) where frames is a list of (frame, frame_num)
+        ordered newest first
+    """
+    if total_frames <= 0 or window <= 0:
+        return [], stats if stats is not None else _new_decode_stats()
+
+    return decode_range(
+        cap, max(0, total_frames - window), None,
+        lead_in=lead_in, keep=window, stats=stats, index=index
+    )
+
+def find_last_decodable(cap, before, stats=None, max_probes=RECOVERY_PROBES):
+    """
+    Find the last frame before `before` that actually decodes.
+
+    Truncated uploads often claim more frames than they contain. Probes
+    step back 1, 2, 4, ... frames from `before` until one decodes, then
+    bisect between that frame and the nearest one that didn't. Each probe
+    decodes a single frame, and at most `max_probes` are made, so a file
+    that is broken far back costs a bounded number of seeks. Probes use
+    plain frame seeks: past the end of a truncated file, retrying a seek
+    the way an indexed decode_range does would only cost more.
+
+    Returns:
+        int: The frame number, or None if no probe decoded
+    """
+    if stats is None:
+        stats = _new_decode_stats()
+
+    def decodes(frame_num):
+        stats['probes'] += 1
+        frames, _ = decode_range(cap, frame_num, frame_num + 1, stats=stats)
+        return bool(frames)
+
+    good, bad = None, before
+    step = 1
+    probes = 0
+
+    while good is None and bad > 0 and probes < max_probes:
+        frame_num = max(0, bad - step)
+        probes += 1
+        if decodes(frame_num):
+            good = frame_num
+        else:
+            bad = frame_num
+            step *= 2
+
+    if good is None:
+        return None
+
+    while bad - good > 1 and probes < max_probes:
+        middle = (good + bad) // 2
+        probes += 1
+        if decodes(middle):
+            good = middle
+        else:
+            bad = middle
+
+    return good
+
+def _ordinal(n):
+    """1 -> '1st', 2 -> '2nd', 11 -> '11th', ..."""
+    if 10 <= n % 100 <= 20:
+        suffix = 'th'
+    else:
+        suffix = {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+    return f"{n}{suffix}"
+
+class ExtractionResult:
+    """
+    The frame picked from a video.
+
+    Unpacks like the (frame, frame_num, blur_score, status) tuple that
+    extract_last_frame returned before, so existing callers keep working.
+    frame is None when nothing could be extracted and status says why.
+    candidates lists (frame_num, score) for every frame that was scored,
+    newest first.
+    """
+
+    __slots__ = ('frame', 'frame_num', 'blur_score', 'status', 'candidates')
+
+    def __init__(self, frame, frame_num, blur_score, status, candidates=()):
+        self.frame = frame
+        self.frame_num = frame_num
+        self.blur_score = blur_score
+        self.status = status
+        self.candidates = candidates
+
+    def __iter__(self):
+        return iter((self.frame, self.frame_num, self.blur_score, self.status))
+
+    def __repr__(self):
+        return (
+            f"ExtractionResult(frame_num={self.frame_num!r}, "
+            f"blur_score={self.blur_score!r}, status={self.status!r})"
+        )
+
+def select_frame(candidates, blur_threshold, skipped=None):
+    """
+    Pick the frame to use from scored candidates.
+
+    Args:
+        candidates: List of (frame, frame_num, blur_score), newest first
+        blur_threshold: Minimum blur score to consider a frame sharp
+        skipped: Numbers of the frames a pre-filter rejected. The status
+            then counts the picked frame's place from the real last frame,
+            but only the frames that were scored as blurry
+
+    Returns:
+        ExtractionResult
+    """
+    if not candidates:
+        return ExtractionResult(None, None, None, "No frames could be extracted")
+
+    scores = [(frame_num, score) for _, frame_num, score in candidates]
+
+    # Candidates come newest first, remember the actual last frame
+    last_candidate = candidates[0]
+    last_frame_num = last_candidate[1]
+
+    # Sort by blur score (highest first)
+    candidates = sorted(candidates, key=lambda x: x[2], reverse=True)
+
+    # Get the sharpest frame
+    best_frame, best_frame_num, best_blur_score = candidates[0]
+
+    # Determine which frame we used
+    frame_position = last_frame_num - best_frame_num
+    rejected = 0
+    if skipped:
+        frame_position = max(last_frame_num, max(skipped)) - best_frame_num
+        rejected = sum(1 for frame_num in skipped if frame_num > best_frame_num)
+    blurry = frame_position - rejected
+
+    if best_blur_score < blur_threshold:
+        # All frames are blurry, use last by default
+        best_frame, best_frame_num, best_blur_score = last_candidate
+        status = f"last frame (all frames blurry ⚠️  score: {best_blur_score:.1f})"
+    elif frame_position == 0:
+        status = f"last frame (sharp ✨ score: {best_blur_score:.1f})"
+    elif rejected and not blurry:
+        status = f"{_ordinal(frame_position + 1)} last frame (sharp ✨ score: {best_blur_score:.1f})"
+    elif rejected:
+        # The frames after it that weren't skipped
+        status = (
+            f"{_ordinal(frame_position + 1)} last frame "
+            f"({blurry} later {'one was' if blurry == 1 else 'ones were'} blurry 🔍 "
+            f"score: {best_blur_score:.1f})"
+        )
+    elif frame_position == 1:
+        status = f"2nd last frame (last was blurry 🔍 score: {best_blur_score:.1f})"
+    else:
+        status = (
+            f"{_ordinal(frame_position + 1)} last frame "
+            f"(last {frame_position} were blurry 🔍 score: {best_blur_score:.1f})"
+        )
+
+    return ExtractionResult(best_frame, best_frame_num, best_blur_score, status, scores)
+
+def _timed_score(session, frames, metric, pyramid):
+    """score_frames, with the time added to the session's timings."""
+    start = time.perf_counter()
+    scored = score_frames(frames, metric, pyramid)
+    session.timings['score'] += time.perf_counter() - start
+    return scored
+
+def _score_stream(session, frames, metric, pyramid, held=()):
+    """
+    Score frames as they are decoded, keeping only the ones that can still win.
+
+    The streaming counterpart of score_frames: `frames` is an iterable of
+    (frame, frame_num), oldest first, and every frame is dropped as soon as
+    a sharper one arrives. With a pyramid, the frames within PYRAMID_MARGIN
+    of the best reduced score are kept to be rescored at full resolution,
+    exactly the ones score_frames would rescore.
+
+    Returns:
+        tuple: (candidates, scores) where candidates holds just the newest
+        and the sharpest frame as (frame, frame_num, score), newest first,
+        and scores is (frame_num, score) for every frame, newest first.
+        select_frame picks the same frame from candidates as it would from
+        score_frames' output.
+    """
+    score_fn, _ = get_metric(metric)
+    reduce = _pyramid_reduce(pyramid)
+
+    newest = None
+    kept = []
+    top = None
+    scores = []
+    for frame, frame_num in frames:
+        session.hold([frame] + [entry[0] for entry in kept] + ([newest[0]] if newest else []) + list(held))
+
+        start = time.perf_counter()
+        score = score_fn(frame if reduce is None else reduce(frame))
+        session.timings['score'] += time.perf_counter() - start
+        scores.append((frame_num, score))
+        newest = (frame, frame_num, score)
+
+        # On ties the newer frame wins, as in select_frame
+        top = score if top is None else max(top, score)
+        if reduce is None:
+            if not kept or score >= kept[0][2]:
+                kept = [newest]
+        else:
+            kept = [entry for entry in kept + [newest] if entry[2] >= top * (1 - PYRAMID_MARGIN)]
+
+    if newest is None:
+        return [], []
+
+    scale = 1.0
+    if reduce is not None:
+        # Rescore the close calls at full size and bring the rest to that scale
+        start = time.perf_counter()
+        full = {frame_num: score_fn(frame) for frame, frame_num, _ in kept}
+        session.timings['score'] += time.perf_counter() - start
+        best_cheap = [entry for entry in kept if entry[2] == top][-1]
+        if top:
+            scale = full[best_cheap[1]] / top
+        kept = [(frame, frame_num, full[frame_num]) for frame, frame_num, _ in kept]
+        scores = [(n, full[n] if n in full else score * scale) for n, score in scores]
+        newest = (newest[0], newest[1], scores[-1][1])
+
+    best = None
+    for entry in kept:
+        if best is None or entry[2] >= best[2]:
+            best = entry
+
+    candidates = [newest] if best[1] == newest[1] else [newest, best]
+    return candidates, scores[::-1]
+
+def _decode_window(session, start, stop, streaming):
+    """
+    Frames [start, stop) of a session: a list newest first, or when
+    streaming an iterator oldest first that decodes as it goes.
+    """
+    if streaming:
+        return iter_range(session.cap, start, stop, stats=session.decode_stats, index=session.index)
+    frames, _ = decode_range(session.cap, start, stop, stats=session.decode_stats, index=session.index)
+    return frames
+
+def _score_window(session, frames, metric, pyramid, streaming, held=(), prefilter=None):
+    """
+    Score one window of frames from _decode_window, less any a Prefilter rejects.
+
+    Returns:
+        tuple: (candidates, scores), candidates as (frame, frame_num, score)
+        and scores as (frame_num, score), both newest first. Streaming keeps
+        only the newest and sharpest candidates, otherwise all of them.
+    """
+    if prefilter is not None:
+        if streaming:
+            frames = prefilter.filter(frames)
+        else:
+            start = time.perf_counter()
+            frames = list(prefilter.filter(reversed(frames)))[::-1]
+            session.timings['score'] += time.perf_counter() - start
+
+    if streaming:
+        return _score_stream(session, frames, metric, pyramid, held)
+
+    session.hold([frame for frame, _ in frames] + list(held))
+    scored = _timed_score(session, frames, metric, pyramid)
+    return scored, [(frame_num, score) for _, frame_num, score in scored]
+
+def _window_span(prefilter, scores):
+    """
+    (frames decoded, (newest, oldest frame_num)) of the window just scored,
+    counting the frames a Prefilter rejected.
+    """
+    if prefilter is not None:
+        return prefilter.seen, (prefilter.newest, prefilter.oldest)
+    if not scores:
+        return 0, (None, None)
+    return len(scores), (scores[0][0], scores[-1][0])
+
+def extract_last_frame(video_path, blur_threshold=None, metric=DEFAULT_METRIC, pyramid=None,
+                       search_window=TAIL_WINDOW, max_depth=None, streaming=False, prefilter=None,
+                       backend=None):
+    """
+    Extract the last non-blurry frame from a video.
+
+    The last `search_window` frames are decoded and scored first. If none of
+    them passes `blur_threshold`, the search walks backwards one window at a
+    time, decoding each window in a single forward pass, and stops at the
+    first window that contains a sharp frame or once `max_depth` frames from
+    the end have been searched.
+
+    Args:
+        video_path: Path to the video file, or an open VideoSession to reuse
+        blur_threshold: Minimum blur score to consider a frame sharp.
+            Defaults to the metric's own threshold (100 for Laplacian).
+        metric: Name of the sharpness metric (see SHARPNESS_METRICS)
+        pyramid: Score reduced copies first ('downscale' or 'crop'),
+            or None to score every candidate at full resolution
+        search_window: Number of frames decoded and scored per step
+        max_depth: Maximum number of frames from the end to search.
+            Defaults to search_window, i.e. no backward search.
+        streaming: Score frames as they are decoded and keep only the
+            newest and the sharpest, instead of a whole window of frames.
+            Picks the same frame with far less memory for 4K/8K sources and
+            large windows. When the container's frame count is short, the
+            tail window also takes in the frames it missed, rather than
+            only the last search_window of them.
+        prefilter: Pre-filter thresholds (see PREFILTER_DEFAULTS, {} for
+            the defaults) to reject black, fade, uniform and near-duplicate
+            frames from a thumbnail before they are scored. Rejected frames
+            don't count towards max_depth, up to `skip` of them. None scores
+            every frame.
+        backend: Decoder backend to open video_path with (see
+            lastframe.backends), None for OpenCV. A VideoSession keeps its own.
+
+    Returns:
+        ExtractionResult, which also unpacks as (frame, frame_number,
+        blur_score, status_message). When given a VideoSession, its
+        decode_stats tell how many frames were decoded.
+    """
+    if not isinstance(video_path, VideoSession):
+        with VideoSession(video_path, backend) as session:
+            return extract_last_frame(
+                session, blur_threshold, metric, pyramid, search_window, max_depth, streaming,
+                prefilter
+            )
+
+    if blur_threshold is None:
+        blur_threshold = get_metric(metric)[1]
+
+    if max_depth is None:
+        max_depth = search_window
+    search_window = min(search_window, max_depth)
+
+    session = video_path
+    info = session.info
+
+    if info is None:
+        return ExtractionResult(None, None, None, "Failed to open video file")
+
+    # Decode the last window in one forward pass
+    window = min(search_window, info['total_frames'])
+    if streaming:
+        frames = _decode_window(session, info['total_frames'] - window, None, True) if window > 0 else iter(())
+    else:
+        frames, _ = decode_tail(
+            session.cap, info['total_frames'], window=window,
+            stats=session.decode_stats, index=session.index
+        )
+    return select_last_frame(
+        session, frames, blur_threshold, metric, pyramid, search_window, max_depth, streaming,
+        prefilter
+    )
+
+def select_last_frame(session, frames, blur_threshold, metric=DEFAULT_METRIC, pyramid=None,
+                      search_window=TAIL_WINDOW, max_depth=None, streaming=False, prefilter=None):
+    """
+    Pick the last sharp frame, given the decoded tail window.
+
+    The second half of extract_last_frame, for callers that decoded the
+    tail themselves (see lastframe.planner): recovers truncated tails,
+    scores the window and searches backwards while it is all blurry.
+
+    Args:
+        session: The open VideoSession the frames came from
+        frames: (frame, frame_num) of the last search_window frames, newest
+            first, or when streaming an iterable of them oldest first
+        blur_threshold, metric, pyramid, search_window, max_depth, streaming,
+        prefilter:
+            As for extract_last_frame, with blur_threshold and max_depth resolved
+
+    Returns:
+        ExtractionResult
+    """
+    total_frames = session.info['total_frames']
+    expected = min(search_window, total_frames)
+    screen = Prefilter(prefilter) if prefilter is not None else None
+    candidates, scores = _score_window(session, frames, metric, pyramid, streaming, prefilter=screen)
+    decoded, span = _window_span(screen, scores)
+
+    if decoded < expected:
+        # The video ends earlier than the container says: find the real last
+        # frame and decode the window before it
+        if decoded:
+            last = span[0]
+        else:
+            last = find_last_decodable(
+                session.cap, total_frames - expected, session.decode_stats
+            )
+        if last is not None and last + 1 > decoded:
+            frames = _decode_window(session, max(0, last + 1 - expected), last + 1, streaming)
+            if screen is not None:
+                # The window is filtered again, count its frames only once
+                screen = Prefilter(prefilter)
+            candidates, scores = _score_window(
+                session, frames, metric, pyramid, streaming, prefilter=screen
+            )
+            decoded, span = _window_span(screen, scores)
+
+    if not decoded:
+        return select_frame(candidates, blur_threshold)
+
+    newest = candidates[0] if candidates else None
+    window_start = span[1]
+    searched = span[0] - window_start + 1
+
+    def depth():
+        # Frames the pre-filter rejected don't use up the search depth
+        return max_depth + (min(screen.rejected, screen.options['skip']) if screen else 0)
+
+    # Walk backwards until a window contains a sharp frame
+    while (
+        (newest is None or max(score for _, _, score in candidates) < blur_threshold)
+        and searched < depth()
+        and window_start > 0
+    ):
+        window_end = window_start
+        window_start = max(0, window_end - min(search_window, depth() - searched))
+
+        frames = _decode_window(session, window_start, window_end, streaming)
+        searched += window_end - window_start
+
+        # Blurry windows are dropped as we go, only the newest frame is kept
+        # as the fallback, so memory stays at one window of frames
+        scored, window_scores = _score_window(
+            session, frames, metric, pyramid, streaming,
+            held=[newest[0]] if newest else [], prefilter=screen
+        )
+        if not (screen.seen if screen else scored):
+            break
+        scores += window_scores
+        if newest is None:
+            newest = scored[0] if scored else None
+            candidates = scored
+        else:
+            candidates = [newest] + scored
+
+    if screen is not None:
+        session.prefilter_counts = screen.counts
+
+    if not candidates:
+        # Every frame searched was rejected
+        return screen.fallback_result(metric)
+
+    result = select_frame(candidates, blur_threshold, screen.skipped if screen else None)
+    result.candidates = scores
+    if screen is not None:
+        screen.annotate(result)
+    return result
+
+def _encode_params(fmt, output_options):
+    """OpenCV imencode parameters for a format."""
+    if fmt == 'jpg':
+        params = [cv2.IMWRITE_JPEG_QUALITY, output_options['quality']]
+        if output_options['progressive']:
+            params += [cv2.IMWRITE_JPEG_PROGRESSIVE, 1]
+        if output_options['optimize']:
+            params += [cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+        return params
+    if fmt == 'png':
+        return [cv2.IMWRITE_PNG_COMPRESSION, output_options['png_compression']]
+    if fmt == 'webp':
+        return [cv2.IMWRITE_WEBP_QUALITY, output_options['quality']]
+    return []
+
+def encode_frame(frame, fmt='jpg', output_options=None):
+    """
+    Encode a frame to image bytes in memory.
+
+    Returns a numpy byte buffer, or raises IOError if OpenCV can't encode it.
+    """
+    options = dict(DEFAULT_OUTPUT_OPTIONS, **(output_options or {}))
+
+    success, buffer = cv2.imencode(IMAGE_FORMATS[fmt], frame, _encode_params(fmt, options))
+    if not success:
+        raise IOError(f"cv2.imencode could not encode {fmt}")
+    return buffer
+
+def resize_frame(frame, size):
+    """Shrink a frame so its longest side is `size` pixels ('full' keeps it)."""
+    if size == 'full':
+        return frame
+
+    height, width = frame.shape[:2]
+    scale = size / max(height, width)
+    if scale >= 1:
+        return frame
+
+    new_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(frame, new_size, interpolation=cv2.INTER_AREA)
+
+def encode_renditions(frame, output_file, output_options=None):
+    """
+    Encode every requested size of a frame.
+
+    All renditions come from the one frame already in memory, so the video
+    is never decoded again. Returns a list of (path, encoded_bytes).
+    """
+    options = dict(DEFAULT_OUTPUT_OPTIONS, **(output_options or {}))
+    fmt = output_format(options, output_file)
+
+    return [
+        (rendition_path(output_file, size), encode_frame(resize_frame(frame, size), fmt, options))
+        for size in options['sizes']
+    ]
@@ -0,0 +1,151 @@
+"""
+Content fingerprints, so a batch decodes each distinct video once.
+
+Ingest folders collect the same video under many names: re-uploads,
+copies across folders, the same clip attached to several records. A
+fingerprint of the file's size, its first bytes and its last few MB is
+read before any decoder is opened; videos with equal fingerprints are
+extracted once and the other copies get hardlinks to (or, across file
+systems, copies of) the first one's images.
+
+Size, header and tail cover the container metadata (the moov or cues
+that describe every sample) and the frames lastframe actually looks at,
+so two files that differ only somewhere in the middle of their media
+data would be treated as one. For this tool that's the same answer
+anyway unless --targets reaches into the middle.
+
+Separately, every extracted frame gets a 64-bit difference hash (dHash).
+Frames whose hashes differ in only a few bits look alike, which flags
+re-encodes and trims of the same video that the byte fingerprint can't.
+"""
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+# Bytes hashed from the start and the end of each file
+FINGERPRINT_HEAD = 64 * 1024
+FINGERPRINT_TAIL = 4 * 1024 * 1024
+
+# Frames at most this many bits apart in their dHash count as near-duplicates
+NEAR_DUPLICATE_BITS = 3
+
+
+def fingerprint(video_path):
+    """
+    Fingerprint of a video's content: size, first 64 KB and last 4 MB.
+
+    Returns a hex string, or None if the file can't be read.
+    """
+    try:
+        with open(video_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+            digest.update(f.read(FINGERPRINT_HEAD))
+            tail = max(FINGERPRINT_HEAD, size - FINGERPRINT_TAIL)
+            if tail < size:
+                f.seek(tail)
+                digest.update(f.read())
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def frame_hash(frame):
+    """
+    64-bit difference hash of a frame, as 16 hex digits.
+
+    The frame is shrunk to 9x8 gray pixels and each bit says whether a
+    pixel is brighter than its right neighbour, so the hash survives
+    scaling, recompression and small colour changes.
+    """
+    import cv2
+
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return f"{int(''.join('1' if bit else '0' for bit in bits), 2):016x}"
+
+
+def hash_distance(a, b):
+    """Number of bits in which two frame hashes differ."""
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def near_duplicates(hashes, max_bits=NEAR_DUPLICATE_BITS):
+    """
+    Group items whose frame hashes are at most max_bits apart.
+
+    Args:
+        hashes: (item, frame hash) pairs
+        max_bits: Largest distance still counted as a near-duplicate
+
+    Returns:
+        list: Groups (lists of items, in input order) of two or more
+        items, each linked to the others by a chain of close hashes.
+
+    Hashes are split into max_bits + 1 bands; two hashes within max_bits
+    of each other agree on at least one band, so only items sharing a band
+    are compared instead of every pair.
+    """
+    items = list(hashes)
+    bands = max_bits + 1
+    width = -(-64 // bands)
+    parent = list(range(len(items)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets = {}
+    for i, (_, value) in enumerate(items):
+        bits = int(value, 16)
+        for band in range(bands):
+            key = (band, (bits >> (band * width)) & ((1 << width) - 1))
+            for j in buckets.setdefault(key, []):
+                if root(i) != root(j) and hash_distance(value, items[j][1]) <= max_bits:
+                    parent[root(i)] = root(j)
+            buckets[key].append(i)
+
+    groups = {}
+    for i, (item, _) in enumerate(items):
+        groups.setdefault(root(i), []).append(item)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def duplicate_path(path, source_output, output_file):
+    """
+    Where a copy's image goes: `path` was saved for source_output (a
+    rendition or --targets image named after it), renamed after output_file.
+    """
+    path, source_output, output_file = Path(path), Path(source_output), Path(output_file)
+    if path == source_output:
+        return output_file
+    return output_file.with_name(output_file.stem + path.name[len(source_output.stem):])
+
+
+def link_output(source, target):
+    """
+    Give `target` the content of the finished image `source`: a hardlink,
+    or a copy where linking isn't possible (another file system, FAT, ...).
+    Replaces target atomically. Returns True if it was linked.
+    """
+    target = Path(target)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.link")
+    try:
+        os.link(source, tmp)
+        linked = True
+    except OSError:
+        shutil.copyfile(source, tmp)
+        linked = False
+    try:
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return linked
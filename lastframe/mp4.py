@@ -0,0 +1,206 @@
+"""
+Sample tables of MP4/MOV files, read without decoding.
+
+OpenCV works out frame numbers from timestamps and the average frame rate,
+which is only an estimate for variable frame rate videos. The sample tables
+in an MP4/MOV `moov` box list every frame of a track: how many there are
+(stsz), which are keyframes (stss) and when each is shown (stts, ctts).
+The file is memory-mapped, so only the few boxes that are read are paged
+in, wherever `moov` sits in the file.
+
+Other containers, and fragmented MP4s whose samples live in `moof` boxes,
+return None so callers can fall back to OpenCV's estimates.
+"""
+import mmap
+import os
+import struct
+
+import numpy as np
+
+# Box types an ISO base media file can start with
+_FIRST_BOXES = {b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide', b'pnot'}
+
+
+class SampleIndex:
+    """
+    Frames of a video track, from its sample tables.
+
+    Frame numbers are in presentation order, counting from 0 like
+    OpenCV's CAP_PROP_POS_FRAMES.
+
+    Attributes:
+        frame_count: Exact number of frames in the track
+        keyframes: Sorted frame numbers of the keyframes
+        times: Presentation time of each frame in seconds, relative to
+            the first frame (what OpenCV reports as CAP_PROP_POS_MSEC)
+    """
+
+    __slots__ = ('frame_count', 'keyframes', 'times')
+
+    def __init__(self, keyframes, times):
+        self.frame_count = len(times)
+        self.keyframes = keyframes
+        self.times = times
+
+    @property
+    def last_keyframe(self):
+        return int(self.keyframes[-1])
+
+    def keyframe_before(self, frame_num):
+        """The last keyframe at or before frame_num."""
+        i = np.searchsorted(self.keyframes, frame_num, side='right')
+        return int(self.keyframes[max(0, i - 1)])
+
+    def frame_at(self, seconds):
+        """The frame shown closest to `seconds`."""
+        i = int(np.searchsorted(self.times, seconds))
+        if i >= self.frame_count:
+            return self.frame_count - 1
+        if i > 0 and seconds - self.times[i - 1] < self.times[i] - seconds:
+            return i - 1
+        return i
+
+    def __repr__(self):
+        return f"SampleIndex(frame_count={self.frame_count}, keyframes={len(self.keyframes)})"
+
+
+def _boxes(buf, start, end):
+    """Yield (type, payload_start, box_end) for the boxes in buf[start:end]."""
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from('>I4s', buf, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                return
+            size = struct.unpack_from('>Q', buf, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+
+        # A box running past its parent means a truncated file
+        if size < header or pos + size > end:
+            return
+
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def _child(buf, start, end, *path):
+    """(payload_start, box_end) of the first box along `path`, or None."""
+    for kind in path:
+        for child, child_start, child_end in _boxes(buf, start, end):
+            if child == kind:
+                start, end = child_start, child_end
+                break
+        else:
+            return None
+    return start, end
+
+
+def _table(buf, box, dtype, columns=1, skip=0):
+    """The entries of a full box with an entry count (stts, ctts, stss, ...)."""
+    start, end = box
+    count = struct.unpack_from('>I', buf, start + 4 + skip)[0]
+    offset = start + 8 + skip
+    if offset + count * columns * 4 > end:
+        raise ValueError("sample table runs past its box")
+    table = np.frombuffer(buf, dtype, count * columns, offset).astype(np.int64)
+    return table.reshape(-1, columns) if columns > 1 else table
+
+
+def _track_index(buf, trak):
+    """SampleIndex for a video trak box, or None for other tracks."""
+    hdlr = _child(buf, *trak, b'mdia', b'hdlr')
+    if hdlr is None or buf[hdlr[0] + 8:hdlr[0] + 12] != b'vide':
+        return None
+
+    stbl = _child(buf, *trak, b'mdia', b'minf', b'stbl')
+    if stbl is None:
+        return None
+
+    stsz = _child(buf, *stbl, b'stsz') or _child(buf, *stbl, b'stz2')
+    stts = _child(buf, *stbl, b'stts')
+    if stsz is None or stts is None:
+        return None
+
+    # stsz and stz2 both keep the sample count at the same offset
+    sample_count = struct.unpack_from('>I', buf, stsz[0] + 8)[0]
+    if not sample_count:
+        return None
+
+    # Decode times from (count, delta) runs
+    runs = _table(buf, stts, '>u4', columns=2)
+    deltas = np.repeat(runs[:, 1], runs[:, 0])[:sample_count]
+    if len(deltas) < sample_count:
+        return None
+    times = np.concatenate(([0], np.cumsum(deltas[:-1])))
+
+    # Composition offsets turn decode order into presentation order
+    ctts = _child(buf, *stbl, b'ctts')
+    if ctts is not None:
+        runs = _table(buf, ctts, '>i4', columns=2)
+        offsets = np.repeat(runs[:, 1], runs[:, 0])[:sample_count]
+        if len(offsets) == sample_count:
+            times = times + offsets
+
+    order = np.argsort(times, kind='stable')
+    frame_of_sample = np.empty(sample_count, dtype=np.int64)
+    frame_of_sample[order] = np.arange(sample_count)
+
+    # No stss means every sample is a keyframe
+    stss = _child(buf, *stbl, b'stss')
+    if stss is None:
+        keyframes = np.arange(sample_count)
+    else:
+        samples = _table(buf, stss, '>u4') - 1
+        keyframes = np.sort(frame_of_sample[samples[(samples >= 0) & (samples < sample_count)]])
+        if not len(keyframes):
+            keyframes = np.zeros(1, dtype=np.int64)
+
+    mdhd = _child(buf, *trak, b'mdia', b'mdhd')
+    if mdhd is None:
+        return None
+    version = buf[mdhd[0]]
+    timescale = struct.unpack_from('>I', buf, mdhd[0] + (20 if version == 1 else 12))[0]
+    if not timescale:
+        return None
+
+    presented = times[order]
+    return SampleIndex(keyframes, (presented - presented[0]) / timescale)
+
+
+def parse_index(buf):
+    """SampleIndex of the first video track in an MP4/MOV held in `buf`, or None."""
+    first = next(_boxes(buf, 0, len(buf)), None)
+    if first is None or first[0] not in _FIRST_BOXES:
+        return None
+
+    moov = _child(buf, 0, len(buf), b'moov')
+    # Fragmented files keep their samples in moof boxes
+    if moov is None or _child(buf, *moov, b'mvex') is not None:
+        return None
+
+    for kind, start, end in _boxes(buf, *moov):
+        if kind == b'trak':
+            index = _track_index(buf, (start, end))
+            if index is not None:
+                return index
+    return None
+
+
+def read_index(path):
+    """
+    SampleIndex of the first video track of an MP4/MOV file.
+
+    Returns None for other containers and for files that can't be read or
+    parsed, so the caller can use OpenCV's own frame count instead.
+    """
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < 8:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return parse_index(buf)
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
@@ -0,0 +1,150 @@
+"""
+Naming and writing of the images lastframe saves.
+
+Only the standard library is used here, so the CLI can work out output
+paths and validate output options without loading OpenCV. Encoding lives
+in core.
+"""
+import os
+from pathlib import Path
+
+# Image formats for saved frames, by --image-format name
+IMAGE_FORMATS = {
+    'jpg': '.jpg',
+    'png': '.png',
+    'webp': '.webp',
+}
+
+EXTENSION_FORMATS = {'.jpg': 'jpg', '.jpeg': 'jpg', '.png': 'png', '.webp': 'webp'}
+
+# Defaults for saved frames: maximum quality JPEG at full resolution
+DEFAULT_OUTPUT_OPTIONS = {
+    'format': None,
+    'quality': 100,
+    'progressive': False,
+    'optimize': False,
+    'png_compression': 3,
+    'sizes': ['full'],
+}
+
+def output_format(output_options=None, output_file=None):
+    """
+    The image format to save in.
+
+    An explicit format wins, then the output file's extension, then JPEG.
+    """
+    fmt = (output_options or {}).get('format')
+    if fmt:
+        return fmt
+    if output_file is not None:
+        return EXTENSION_FORMATS.get(Path(output_file).suffix.lower(), 'jpg')
+    return 'jpg'
+
+def default_output_path(video_path, output_options=None):
+    """Where the frame of a video goes when no output is given."""
+    video_path = Path(video_path)
+    extension = IMAGE_FORMATS[output_format(output_options)]
+    return video_path.parent / f"{video_path.stem}_lastframe{extension}"
+
+def batch_output_path(video_file, input_dir, output_dir=None, output_options=None):
+    """
+    Where the frame of a video found under input_dir goes.
+
+    With an output directory, subfolders of the input are mirrored in it so
+    videos with the same name in different folders don't collide.
+    """
+    if not output_dir:
+        return default_output_path(video_file, output_options)
+
+    relative_dir = Path(video_file).parent.relative_to(input_dir)
+    return Path(output_dir) / relative_dir / default_output_path(video_file, output_options).name
+
+def list_output_path(video_file, output_dir=None, output_options=None):
+    """
+    Where the frame of a video named in a --from-list manifest goes.
+
+    Without an output directory the image goes next to the video. With one,
+    the video's path is mirrored inside it: relative paths as written,
+    absolute paths from the root down. Names never collide, and every node
+    of a sharded run agrees on them.
+    """
+    if not output_dir:
+        return default_output_path(video_file, output_options)
+
+    parent = Path(os.path.normpath(Path(video_file).parent))
+    parts = [part for part in parent.parts if part not in (parent.anchor, '..', '.')]
+    return Path(output_dir, *parts) / default_output_path(video_file, output_options).name
+
+def rendition_path(output_file, size):
+    """
+    Name of one rendition: the full-size image keeps the output name, other
+    sizes get the size appended, e.g. movie_lastframe_320.jpg.
+    """
+    output_file = Path(output_file)
+    if size == 'full':
+        return output_file
+    return output_file.with_name(f"{output_file.stem}_{size}{output_file.suffix}")
+
+def target_output_path(output_file, label):
+    """
+    Name of the image for one extra --targets frame, e.g.
+    movie_lastframe_at50pct.jpg, or movie_lastframe_sheet.jpg for the
+    contact sheet.
+    """
+    output_file = Path(output_file)
+    return output_file.with_name(f"{output_file.stem}_{label}{output_file.suffix}")
+
+def primary_output_path(output_file, output_options=None):
+    """The first rendition saved for an output name, which the cache checks."""
+    sizes = (output_options or {}).get('sizes') or DEFAULT_OUTPUT_OPTIONS['sizes']
+    return rendition_path(output_file, sizes[0])
+
+def parse_sizes(value):
+    """Parse a --sizes list like 'full,1280,320' into ['full', 1280, 320]."""
+    sizes = []
+    for part in value.split(','):
+        part = part.strip().lower()
+        if part == 'full':
+            sizes.append('full')
+        elif part.isdigit() and int(part) > 0:
+            sizes.append(int(part))
+        else:
+            raise ValueError(f"invalid size '{part}', use 'full' or a pixel count like 1280")
+
+    if not sizes:
+        raise ValueError("no sizes given")
+    return list(dict.fromkeys(sizes))
+
+# Read once at import: os.umask can only be queried by setting it, which
+# isn't safe while writer threads are creating files
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def write_atomic(output_file, data):
+    """
+    Write bytes to a file so readers never see a partial file.
+
+    The data goes to a hidden temporary file in the same directory first and
+    is renamed over the target when complete, so a killed batch never leaves
+    a truncated image behind. Returns the number of bytes written.
+    """
+    import tempfile
+
+    output_file = Path(output_file)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=str(output_file.parent), prefix=f".{output_file.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # mkstemp creates the file as 0600, give it the usual umask permissions
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, output_file)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    return len(data)
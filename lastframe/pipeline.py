@@ -0,0 +1,157 @@
+"""
+A small staged pipeline built on threads and bounded queues.
+
+Each stage has its own pool of worker threads, and stages are connected by
+bounded queues so a slow stage applies backpressure instead of letting work
+pile up in memory. OpenCV releases the GIL while decoding, encoding and
+writing, so threads are enough to overlap CPU work with disk I/O.
+"""
+import queue
+import threading
+import time
+
+# Items waiting between two stages
+DEFAULT_QUEUE_SIZE = 4
+
+_STOP = object()
+
+
+class StageStats:
+    """Busy time, item count and bytes for one pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds, nbytes=0):
+        with self._lock:
+            self.items += 1
+            self.seconds += seconds
+            self.bytes += nbytes
+
+    @property
+    def items_per_second(self):
+        """Throughput of one worker of this stage while it was busy."""
+        return self.items / self.seconds if self.seconds else 0.0
+
+
+class Stage:
+    """
+    One step of a Pipeline.
+
+    Args:
+        name: Stage name used in the stats
+        func: Called with an item dict, updates it in place. Set
+            item['error'] to skip the remaining stages for that item and
+            item['bytes'] to account bytes to this stage.
+        workers: Number of threads running this stage
+    """
+
+    def __init__(self, name, func, workers=1):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.stats = StageStats(name)
+
+
+class Pipeline:
+    """
+    Push items through a list of stages.
+
+    Items are dicts. Results come out in completion order, so callers that
+    need input order should carry an index in the item.
+    """
+
+    def __init__(self, stages, queue_size=DEFAULT_QUEUE_SIZE):
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def _worker(self, stage, inbox, outbox):
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                return
+
+            if not item.get('error'):
+                item.pop('bytes', None)
+                start = time.perf_counter()
+                try:
+                    stage.func(item)
+                except Exception as e:
+                    item['error'] = f"{stage.name} failed: {str(e)}"
+                stage.stats.add(time.perf_counter() - start, item.pop('bytes', 0) or 0)
+
+            outbox.put(item)
+
+    def run(self, items):
+        """
+        Run items through the pipeline, yielding each item once it is done.
+
+        `items` is consumed on the calling thread, so it may be a generator
+        that isn't thread-safe.
+        """
+        queues = [queue.Queue(self.queue_size) for _ in self.stages]
+        # The last queue only ever holds finished items, which the caller drains
+        queues.append(queue.Queue())
+
+        # Worker threads per stage
+        threads = []
+        for i, stage in enumerate(self.stages):
+            stage_threads = []
+            for _ in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker, args=(stage, queues[i], queues[i + 1]), daemon=True
+                )
+                thread.start()
+                stage_threads.append(thread)
+            threads.append(stage_threads)
+
+        done = queues[-1]
+        source = iter(items)
+        next_item = None
+        exhausted = False
+        in_flight = 0
+
+        try:
+            while not exhausted or in_flight:
+                # Hand back everything that has finished so far
+                try:
+                    while True:
+                        item = done.get_nowait()
+                        in_flight -= 1
+                        yield item
+                except queue.Empty:
+                    pass
+
+                if exhausted:
+                    if in_flight:
+                        item = done.get()
+                        in_flight -= 1
+                        yield item
+                    continue
+
+                if next_item is None:
+                    try:
+                        next_item = next(source)
+                    except StopIteration:
+                        exhausted = True
+                        continue
+
+                # Wait briefly for room so finished items keep flowing back
+                try:
+                    queues[0].put(next_item, timeout=0.05)
+                    in_flight += 1
+                    next_item = None
+                except queue.Full:
+                    pass
+        finally:
+            # Stop one stage at a time so nothing is still being pushed into
+            # a stage whose workers have already left
+            for inbox, stage_threads in zip(queues, threads):
+                for _ in stage_threads:
+                    inbox.put(_STOP)
+                for thread in stage_threads:
+                    thread.join()
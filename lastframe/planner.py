@@ -0,0 +1,344 @@
+"""
+Several frames from one video, decoded in as few passes as possible.
+
+extract_last_frame answers one question per decode. A contact sheet or a
+set of poster alternatives needs several: the last sharp frame, a sharp
+frame near the start, one at 50%, the sharpest few of the last ten
+seconds. Instead of decoding the video once per question, extract_targets
+works out the frame range every target needs, merges ranges that overlap
+or sit so close that decoding through the gap is cheaper than seeking, and
+decodes the merged ranges front to back with one seek each. Every frame is
+scored once, however many targets want it, and only the frames a target
+may still pick are kept in memory.
+
+Targets:
+    last         The last sharp frame, exactly like extract_last_frame
+    first        The sharpest of the first --window frames
+    at=50%       The sharpest of --window frames around 50% of the video
+    at=12.5s     The same around a timestamp
+    top=3        The 3 sharpest frames of the whole video
+    top=3:10s    The 3 sharpest frames of the last 10 seconds
+"""
+import cv2
+import numpy as np
+
+from .core import (
+    DEFAULT_METRIC, OPENCV_SEEK_BACKOFF, TAIL_WINDOW, ExtractionResult, VideoSession,
+    get_metric, iter_range, select_last_frame,
+)
+
+# Frames picked by one top=K target are at least this many seconds apart,
+# so they aren't K copies of the same moment. A span too short for K frames
+# that far apart gets them spread evenly over it instead
+TOP_SPACING = 0.5
+
+# Contact sheet tile width in pixels and caption bar height
+SHEET_TILE_WIDTH = 320
+SHEET_CAPTION = 22
+
+
+def parse_target(spec):
+    """
+    Parse one target such as 'last', 'at=50%' or 'top=3:10s' into a dict.
+
+    Raises:
+        ValueError: If the target isn't understood
+    """
+    spec = spec.strip()
+    kind, _, value = spec.partition('=')
+
+    try:
+        if spec in ('last', 'first'):
+            return {'spec': spec, 'kind': spec}
+
+        if kind == 'at' and value.endswith('%'):
+            percent = float(value[:-1])
+            if 0 <= percent <= 100:
+                return {'spec': spec, 'kind': 'at', 'percent': percent}
+
+        elif kind == 'at' and value:
+            seconds = float(value[:-1] if value.endswith('s') else value)
+            if seconds >= 0:
+                return {'spec': spec, 'kind': 'at', 'seconds': seconds}
+
+        elif kind == 'top' and value:
+            count, _, span = value.partition(':')
+            target = {'spec': spec, 'kind': 'top', 'count': int(count), 'seconds': None}
+            if span:
+                target['seconds'] = float(span[:-1] if span.endswith('s') else span)
+            if target['count'] >= 1 and (target['seconds'] is None or target['seconds'] > 0):
+                return target
+    except ValueError:
+        pass
+
+    raise ValueError(
+        f"unknown target '{spec}' (expected last, first, at=50%, at=12.5s, top=3 or top=3:10s)"
+    )
+
+
+def parse_targets(text):
+    """Parse a comma-separated target list, e.g. 'last,first,at=50%'."""
+    targets = [parse_target(spec) for spec in text.split(',') if spec.strip()]
+    if not targets:
+        raise ValueError("expected at least one target")
+    return targets
+
+
+def target_label(target, rank=1):
+    """File name suffix for a target's frame, e.g. 'at50pct' or 'top2'."""
+    if target['kind'] == 'at':
+        if 'percent' in target:
+            return f"at{target['percent']:g}pct"
+        return f"at{target['seconds']:g}s"
+    if target['kind'] == 'top':
+        return f"top{rank}"
+    return target['kind']
+
+
+def _frame_at(session, seconds):
+    """Frame number shown at `seconds`, exact with a sample index."""
+    index = session.index
+    if index is not None:
+        return index.frame_at(seconds)
+    fps = session.info['fps']
+    return int(round(seconds * fps)) if fps > 0 else 0
+
+
+def _duration(session):
+    index = session.index
+    if index is not None:
+        return float(index.times[-1])
+    info = session.info
+    return info['total_frames'] / info['fps'] if info['fps'] > 0 else 0.0
+
+
+def target_span(session, target, window=TAIL_WINDOW):
+    """The (start, stop) frame range a target needs decoded."""
+    total_frames = session.info['total_frames']
+    window = min(window, total_frames)
+
+    if target['kind'] == 'last':
+        return total_frames - window, total_frames
+    if target['kind'] == 'first':
+        return 0, window
+    if target['kind'] == 'at':
+        if 'percent' in target:
+            center = int(round(target['percent'] / 100 * (total_frames - 1)))
+        else:
+            center = _frame_at(session, target['seconds'])
+        start = min(max(0, center - window // 2), total_frames - window)
+        return start, start + window
+
+    # top=K, over the last N seconds or the whole video
+    if target['seconds'] is None:
+        return 0, total_frames
+    return max(0, _frame_at(session, _duration(session) - target['seconds'])), total_frames
+
+
+def plan_regions(spans, index=None):
+    """
+    Merge (start, stop) spans into the sorted regions to decode, one seek each.
+
+    A seek restarts decoding at the keyframe before its target, so when that
+    keyframe comes before the end of the previous region it is cheaper to
+    keep decoding through the gap. Without a sample index, OpenCV's own
+    seek back-off is used as the gap worth decoding through.
+    """
+    regions = []
+    for start, stop in sorted(spans):
+        if regions:
+            region_start, region_stop = regions[-1]
+            if index is not None:
+                near = index.keyframe_before(start) <= region_stop
+            else:
+                near = start - region_stop <= OPENCV_SEEK_BACKOFF
+            if near:
+                regions[-1] = (region_start, max(region_stop, stop))
+                continue
+        regions.append((start, stop))
+    return regions
+
+
+def _keep_top(kept, frame, frame_num, score, count, spacing):
+    """
+    Add a scored frame to a top-K list, at most `count` long, in which
+    frames are at least `spacing` frames apart. A frame replaces the close
+    neighbours it beats, and otherwise the weakest entry once the list is full.
+    """
+    close = [entry for entry in kept if abs(entry[1] - frame_num) < spacing]
+    if close:
+        if score <= max(entry[2] for entry in close):
+            return
+        dropped = close
+    elif len(kept) >= count:
+        weakest = min(kept, key=lambda entry: entry[2])
+        if score <= weakest[2]:
+            return
+        dropped = [weakest]
+    else:
+        dropped = []
+
+    # Entries hold numpy frames, so compare by identity rather than ==
+    kept[:] = [entry for entry in kept if not any(entry is d for d in dropped)]
+    kept.append((frame, frame_num, score))
+
+
+def extract_targets(video_path, targets, blur_threshold=None, metric=DEFAULT_METRIC, pyramid=None,
+                    search_window=TAIL_WINDOW, max_depth=None, streaming=False, prefilter=None,
+                    backend=None):
+    """
+    Extract the frames for several targets from one video.
+
+    Args:
+        video_path: Path to the video file, or an open VideoSession to reuse
+        targets: Target specs ('last', 'at=50%', ...) or parsed target dicts
+        blur_threshold, metric, pyramid, search_window, max_depth, streaming:
+            As for extract_last_frame. The pyramid only applies to 'last';
+            every other frame is scored once at full resolution. Other
+            targets always keep only their best frames; streaming applies
+            to the backward search of 'last'.
+        prefilter: Pre-filter thresholds for 'last', as for extract_last_frame
+        backend: Decoder backend, as for extract_last_frame
+
+    Returns:
+        list: (target, results) pairs in the order given, where target is
+        the parsed dict and results a list of ExtractionResult (one, or up
+        to K for top=K, best first). A result's frame is None when nothing
+        could be extracted for it.
+    """
+    if not isinstance(video_path, VideoSession):
+        with VideoSession(video_path, backend) as session:
+            return extract_targets(
+                session, targets, blur_threshold, metric, pyramid, search_window, max_depth,
+                streaming, prefilter
+            )
+
+    session = video_path
+    targets = [parse_target(t) if isinstance(t, str) else t for t in targets]
+    score_frame, default_threshold = get_metric(metric)
+    if blur_threshold is None:
+        blur_threshold = default_threshold
+    if max_depth is None:
+        max_depth = search_window
+    search_window = min(search_window, max_depth)
+
+    info = session.info
+    if info is None or info['total_frames'] <= 0:
+        status = "Failed to open video file" if info is None else "Empty video file"
+        return [(target, [ExtractionResult(None, None, None, status)]) for target in targets]
+
+    spans = [target_span(session, target, search_window) for target in targets]
+    fps = info['fps'] if info['fps'] > 0 else 30.0
+    total_frames = info['total_frames']
+    spacings = [
+        max(1, min(int(round(TOP_SPACING * fps)), (min(stop, total_frames) - start) // target['count']))
+        if target['kind'] == 'top' else 1
+        for target, (start, stop) in zip(targets, spans)
+    ]
+
+    # What each target has seen so far: raw tail frames for 'last', the
+    # best scored frames for the others
+    picked = [[] for _ in targets]
+    scores = [[] for _ in targets]
+
+    def wanted(frame_num):
+        # Spans that reach the end also take frames past a short frame count
+        return any(
+            start <= frame_num and (frame_num < stop or stop >= total_frames)
+            for start, stop in spans
+        )
+
+    for region_start, region_stop in plan_regions(spans, session.index):
+        # Reading the region that holds the tail to the end of the file
+        # also picks up frames a slightly short frame count missed
+        stop = None if region_stop >= total_frames else region_stop
+        for frame, frame_num in iter_range(
+            session.cap, region_start, stop, stats=session.decode_stats, index=session.index,
+            wanted=wanted
+        ):
+            score = None
+            for i, (target, (start, span_stop)) in enumerate(zip(targets, spans)):
+                if frame_num < start or frame_num >= span_stop < total_frames:
+                    continue
+
+                if target['kind'] == 'last':
+                    picked[i].insert(0, (frame, frame_num))
+                    del picked[i][search_window:]
+                    continue
+
+                if score is None:
+                    score = score_frame(frame)
+                scores[i].append((frame_num, score))
+                if target['kind'] == 'top':
+                    _keep_top(picked[i], frame, frame_num, score, target['count'], spacings[i])
+                elif not picked[i] or score > picked[i][0][2]:
+                    picked[i] = [(frame, frame_num, score)]
+
+            session.hold([frame] + [entry[0] for kept in picked for entry in kept])
+
+    results = []
+    for target, frames, target_scores in zip(targets, picked, scores):
+        if target['kind'] == 'last':
+            if streaming:
+                frames = reversed(frames)
+            result = select_last_frame(
+                session, frames, blur_threshold, metric, pyramid, search_window, max_depth,
+                streaming, prefilter
+            )
+            results.append((target, [result]))
+            continue
+
+        if not frames:
+            results.append((target, [ExtractionResult(None, None, None, "No frames could be extracted")]))
+            continue
+
+        ranked = sorted(frames, key=lambda entry: entry[2], reverse=True)
+        target_results = []
+        for rank, (frame, frame_num, score) in enumerate(ranked, 1):
+            if target['kind'] == 'top':
+                where = f"last {target['seconds']:g}s" if target['seconds'] else "video"
+                status = f"#{rank} sharpest in the {where} (score: {score:.1f})"
+                if len(ranked) < target['count']:
+                    # Only when the span holds fewer frames than asked for
+                    status += f", only {len(ranked)} of {target['count']} found"
+            elif target['kind'] == 'first':
+                status = f"sharpest of the first frames (score: {score:.1f})"
+            else:
+                status = f"sharpest frame around {target['spec'][3:]} (score: {score:.1f})"
+            target_results.append(ExtractionResult(frame, frame_num, score, status, target_scores))
+        results.append((target, target_results))
+
+    return results
+
+
+def contact_sheet(tiles, columns=4, tile_width=SHEET_TILE_WIDTH):
+    """
+    Lay frames out in a grid with a caption under each.
+
+    Args:
+        tiles: (caption, frame) pairs
+        columns: Tiles per row
+        tile_width: Width of every tile in pixels
+
+    Returns:
+        numpy.ndarray: The sheet as a BGR image
+    """
+    columns = max(1, min(columns, len(tiles)))
+    rows = (len(tiles) + columns - 1) // columns
+
+    height, width = tiles[0][1].shape[:2]
+    tile_height = max(1, int(round(tile_width * height / width)))
+    cell_height = tile_height + SHEET_CAPTION
+
+    sheet = np.zeros((rows * cell_height, columns * tile_width, 3), dtype=np.uint8)
+    for i, (caption, frame) in enumerate(tiles):
+        y = (i // columns) * cell_height
+        x = (i % columns) * tile_width
+        sheet[y:y + tile_height, x:x + tile_width] = cv2.resize(
+            frame, (tile_width, tile_height), interpolation=cv2.INTER_AREA
+        )
+        cv2.putText(
+            sheet, caption, (x + 6, y + tile_height + SHEET_CAPTION - 7),
+            cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1, cv2.LINE_AA
+        )
+    return sheet
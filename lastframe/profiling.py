@@ -0,0 +1,249 @@
+"""
+Per-stage timing for batches, single files and watch mode.
+
+Every processed video already reports the seconds it spent in each stage
+(container open, probe, seek, decode, scoring, encode and write) in its
+result's 'stage_seconds', measured with a handful of clock reads per video.
+A Profiler only exists when --profile or a metrics file is asked for; it
+folds those per-video numbers into latency histograms and totals, which
+can be shown as a table or written as JSON or a Prometheus textfile.
+"""
+import json
+import time
+
+# Stages in processing order
+STAGES = ('open', 'probe', 'seek', 'decode', 'score', 'encode', 'write')
+
+# Histogram bucket upper bounds in seconds, Prometheus style
+HISTOGRAM_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+class Histogram:
+    """Latency histogram with fixed buckets, plus count, sum and max."""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        # One extra bucket for values above the last bound (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = 0
+        while index < len(self.buckets) and seconds > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """
+        Estimate a quantile by interpolating inside its bucket, the way
+        Prometheus' histogram_quantile does. Capped at the observed max.
+        """
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets + (self.max,), self.counts):
+            if count and seen + count >= rank:
+                upper = min(bound, self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+            'buckets': dict(zip([f"{b:g}" for b in self.buckets] + ['+Inf'], self.counts)),
+        }
+
+
+class Profiler:
+    """
+    Collects stage timings and per-video counters from processed videos.
+
+    Args:
+        json_path: Where export() writes a JSON report, or None
+        prom_path: Where export() writes a Prometheus textfile, or None
+        keep_videos: Keep a per-video record for the JSON report
+    """
+
+    def __init__(self, json_path=None, prom_path=None, keep_videos=True):
+        self.json_path = json_path
+        self.prom_path = prom_path
+        self.keep_videos = keep_videos
+        self.stages = {name: Histogram() for name in STAGES}
+        self.total = Histogram()
+        self.results = {'success': 0, 'cached': 0, 'deduplicated': 0, 'failed': 0}
+        self.frames_decoded = 0
+        self.container_opens = 0
+        self.bytes_written = 0
+        self.peak_frame_bytes = 0
+        self.dedup_saved_seconds = 0.0
+        self.frames_prefiltered = 0
+        self.videos = []
+        self.started = time.time()
+        self._wall_start = time.perf_counter()
+
+    @property
+    def wall_seconds(self):
+        return time.perf_counter() - self._wall_start
+
+    def record(self, video_path, success, result):
+        """Add the outcome of one video (a process_single_video result)."""
+        if not success:
+            self.results['failed'] += 1
+            if self.keep_videos:
+                self.videos.append({'video': str(video_path), 'status': 'failed', 'error': result})
+            return
+
+        if result.get('cached'):
+            self.results['cached'] += 1
+            if self.keep_videos:
+                self.videos.append({'video': str(video_path), 'status': 'cached'})
+            return
+
+        if result.get('duplicate_of'):
+            self.results['deduplicated'] += 1
+            self.dedup_saved_seconds += result['saved_seconds']
+            if self.keep_videos:
+                self.videos.append({
+                    'video': str(video_path), 'status': 'duplicate',
+                    'duplicate_of': result['duplicate_of'],
+                })
+            return
+
+        self.results['success'] += 1
+        stage_seconds = result.get('stage_seconds', {})
+        for name, seconds in stage_seconds.items():
+            if name in self.stages:
+                self.stages[name].observe(seconds)
+        self.total.observe(sum(stage_seconds.values()))
+
+        frames_decoded = result.get('frames_decoded', 0)
+        bytes_written = result.get('bytes_written', 0)
+        self.frames_decoded += frames_decoded
+        self.container_opens += result.get('container_opens', 0)
+        self.bytes_written += bytes_written
+        peak_frame_bytes = result.get('peak_frame_bytes', 0)
+        self.peak_frame_bytes = max(self.peak_frame_bytes, peak_frame_bytes)
+        prefilter = result.get('prefilter')
+        if prefilter:
+            self.frames_prefiltered += sum(count for reason, count in prefilter.items() if reason != 'scored')
+
+        if self.keep_videos:
+            self.videos.append({
+                'video': str(video_path),
+                'status': 'success',
+                'frames_decoded': frames_decoded,
+                'peak_frame_bytes': peak_frame_bytes,
+                'bytes_written': bytes_written,
+                'stage_seconds': stage_seconds,
+            })
+            if prefilter:
+                self.videos[-1]['prefilter'] = prefilter
+
+    def to_dict(self):
+        report = {
+            'started': self.started,
+            'wall_seconds': self.wall_seconds,
+            'results': dict(self.results),
+            'frames_decoded': self.frames_decoded,
+            'container_opens': self.container_opens,
+            'bytes_written': self.bytes_written,
+            'peak_frame_bytes': self.peak_frame_bytes,
+            'dedup_saved_seconds': self.dedup_saved_seconds,
+            'frames_prefiltered': self.frames_prefiltered,
+            'stages': {name: hist.to_dict() for name, hist in self.stages.items()},
+            'video_seconds': self.total.to_dict(),
+        }
+        if self.keep_videos:
+            report['videos'] = self.videos
+        return report
+
+    def to_prometheus(self):
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP lastframe_stage_seconds Seconds one video spent in a processing stage.",
+            "# TYPE lastframe_stage_seconds histogram",
+        ]
+        for name, hist in self.stages.items():
+            lines.extend(_prometheus_histogram("lastframe_stage_seconds", hist, f'stage="{name}"'))
+
+        lines += [
+            "# HELP lastframe_video_seconds Seconds spent on one video across all stages.",
+            "# TYPE lastframe_video_seconds histogram",
+        ]
+        lines.extend(_prometheus_histogram("lastframe_video_seconds", self.total))
+
+        lines += [
+            "# HELP lastframe_videos_total Videos handled, by result.",
+            "# TYPE lastframe_videos_total counter",
+        ]
+        for result, count in self.results.items():
+            lines.append(f'lastframe_videos_total{{result="{result}"}} {count}')
+
+        for name, value, help_text in (
+            ("frames_decoded", self.frames_decoded, "Frames decoded."),
+            ("container_opens", self.container_opens, "Video containers opened."),
+            ("bytes_written", self.bytes_written, "Bytes of images written."),
+            ("dedup_saved_seconds", self.dedup_saved_seconds,
+             "Seconds of extraction skipped by linking identical copies."),
+            ("frames_prefiltered", self.frames_prefiltered,
+             "Frames the pre-filter rejected before sharpness scoring."),
+        ):
+            lines += [
+                f"# HELP lastframe_{name}_total {help_text}",
+                f"# TYPE lastframe_{name}_total counter",
+                f"lastframe_{name}_total {value}",
+            ]
+
+        lines += [
+            "# HELP lastframe_peak_frame_bytes Most memory decoded frames of one video took up.",
+            "# TYPE lastframe_peak_frame_bytes gauge",
+            f"lastframe_peak_frame_bytes {self.peak_frame_bytes}",
+        ]
+
+        lines += [
+            "# HELP lastframe_last_run_timestamp_seconds When this run started.",
+            "# TYPE lastframe_last_run_timestamp_seconds gauge",
+            f"lastframe_last_run_timestamp_seconds {self.started:.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        """Write the configured JSON and Prometheus files, atomically."""
+        from .output import write_atomic
+
+        if self.json_path:
+            write_atomic(self.json_path, json.dumps(self.to_dict(), indent=2, default=str).encode())
+        if self.prom_path:
+            write_atomic(self.prom_path, self.to_prometheus().encode())
+
+
+def _prometheus_histogram(metric, hist, labels=""):
+    prefix = f"{labels}," if labels else ""
+    cumulative = 0
+    lines = []
+    for bound, count in zip([f"{b:g}" for b in hist.buckets] + ["+Inf"], hist.counts):
+        cumulative += count
+        lines.append(f'{metric}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{metric}_sum{suffix} {hist.sum:.6f}")
+    lines.append(f"{metric}_count{suffix} {hist.count}")
+    return lines
@@ -0,0 +1,146 @@
+"""
+Batch scheduling: the order videos are handed to workers in.
+
+By default a batch starts each video as soon as discovery finds it. With
+several workers that is fine until one video costs far more than the rest:
+a 4K HEVC master found last starts when the others are nearly done, and
+the whole batch waits for it while every other worker sits idle. Handing
+the most expensive videos out first (longest processing time first, LPT)
+lets the cheap ones fill in around them.
+
+That needs a cost for every video before any is started, so a scheduled
+batch first collects the whole input list and probes each video's
+metadata (frame count, frame rate, resolution, codec and, for MP4/MOV,
+the keyframe index) on a few threads. Nothing starts until the scan and
+the probes are done, and every video is opened once more, so scheduling
+is opt-in (--schedule) rather than the default. The estimate is the number of
+pixels that have to be decoded for the frames extraction needs, weighted
+by how expensive the codec is to decode.
+
+Policies are named functions from (cost, job) pairs to the job order;
+register_policy adds one.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+# Relative decoding cost per pixel by codec FourCC, H.264 = 1.0
+CODEC_COST = {
+    'avc1': 1.0, 'avc3': 1.0, 'h264': 1.0, 'x264': 1.0,
+    'hev1': 2.0, 'hvc1': 2.0, 'hevc': 2.0, 'h265': 2.0,
+    'av01': 2.5,
+    'vp09': 1.5, 'vp90': 1.5,
+    'vp08': 1.0, 'vp80': 1.0,
+    'fmp4': 0.6, 'mp4v': 0.6, 'xvid': 0.6, 'divx': 0.6,
+    'mjpg': 0.5,
+}
+
+# Frames decoded ahead of a seek target when the container has no keyframe
+# index: FFmpeg restarts at the keyframe before it, about a second earlier
+# for typical encodes
+SEEK_LEAD_SECONDS = 1.0
+
+# Threads probing metadata before a scheduled batch starts
+PROBE_THREADS = 8
+
+
+def by_discovery(entries):
+    """Start videos in the order they were found."""
+    return [job for _, job in entries]
+
+
+def longest_first(entries):
+    """Most expensive videos first, so none is left running alone at the end."""
+    return [job for _, job in sorted(entries, key=lambda entry: -entry[0])]
+
+
+def shortest_first(entries):
+    """Cheapest videos first: the most results soonest, at the cost of a long tail."""
+    return [job for _, job in sorted(entries, key=lambda entry: entry[0])]
+
+
+# Scheduling policies by name. 'discovery' is None: nothing is probed and
+# videos start while the scan is still running.
+SCHEDULE_POLICIES = {
+    'discovery': None,
+    'longest-first': longest_first,
+    'shortest-first': shortest_first,
+}
+
+DEFAULT_POLICY = 'discovery'
+
+
+def register_policy(name, order):
+    """
+    Register a scheduling policy.
+
+    Args:
+        name: Name used with --schedule and process_batch(schedule=...)
+        order: Function taking a list of (estimated cost, job) pairs in
+            discovery order and returning the jobs in the order to start them
+    """
+    SCHEDULE_POLICIES[name] = order
+
+
+def get_policy(name):
+    """Look up a scheduling policy. Returns its order function, or None for 'discovery'."""
+    try:
+        return SCHEDULE_POLICIES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown schedule '{name}' "
+            f"(available: {', '.join(sorted(SCHEDULE_POLICIES))})"
+        )
+
+
+def estimate_cost(video_file, extract_options=None):
+    """
+    Estimated cost of extracting from one video, in megapixels decoded
+    (times the codec's relative cost). Videos that can't be probed cost 0:
+    their worker fails them straight away.
+    """
+    from .core import TAIL_WINDOW, VideoSession
+    from .planner import parse_target, plan_regions, target_span
+
+    extract_options = extract_options or {}
+    window = extract_options.get('search_window') or TAIL_WINDOW
+    window = min(window, extract_options.get('max_depth') or window)
+
+    with VideoSession(video_file, extract_options.get('backend')) as session:
+        try:
+            info = session.info
+        except Exception:
+            info = None
+        if not info or info['total_frames'] <= 0:
+            return 0.0
+
+        targets = [parse_target(spec) for spec in extract_options.get('targets') or ['last']]
+        index = session.index
+        lead = int(info['fps'] * SEEK_LEAD_SECONDS) if info['fps'] > 0 else 0
+
+        frames = 0
+        for start, stop in plan_regions([target_span(session, t, window) for t in targets], index):
+            seek_from = index.keyframe_before(start) if index is not None else max(0, start - lead)
+            frames += stop - seek_from
+
+    megapixels = info['width'] * info['height'] / 1e6
+    return frames * megapixels * CODEC_COST.get(info.get('codec'), 1.0)
+
+
+def schedule_jobs(jobs, order, extract_options=None, video_file=lambda job: job[1]):
+    """
+    Put batch jobs in the order a policy wants them.
+
+    Args:
+        jobs: Jobs in discovery order, e.g. (index, video_file, output_file)
+        order: A policy's order function (see SCHEDULE_POLICIES)
+        extract_options: Extraction settings, which decide what is decoded
+        video_file: Picks the video path out of a job
+
+    Returns:
+        list: The jobs in the order to start them
+    """
+    jobs = list(jobs)
+    with ThreadPoolExecutor(PROBE_THREADS) as executor:
+        costs = list(executor.map(
+            lambda job: estimate_cost(video_file(job), extract_options), jobs
+        ))
+    return order(list(zip(costs, jobs)))
@@ -0,0 +1,419 @@
+"""
+Serve mode: extract frames over local HTTP from a pool of warm workers.
+
+Calling the lastframe command once per upload pays for starting Python,
+importing OpenCV and rich, and forking a process, every time. `lastframe
+serve` pays that once: it starts its worker processes up front, imports
+OpenCV in each of them, and hands every request to the pool.
+
+    GET  /extract?path=/videos/clip.mp4   extract from a file on this machine
+    POST /extract                         extract from the video in the body
+    GET  /metrics                         Prometheus metrics
+    GET  /healthz                         "ok" once the workers are warm
+
+/extract answers with the image (format as with --image-format, with the
+frame number and score in X-Lastframe-* headers), or with JSON metadata
+when asked for ?format=json or Accept: application/json.
+
+Requests beyond the workers plus --queue are turned away with 429 rather
+than piling up, and a request that takes longer than --timeout gets 504
+while its worker is killed and replaced. The server only speaks enough
+HTTP/1.1 for local clients (Content-Length bodies, keep-alive) and binds
+to 127.0.0.1 unless told otherwise.
+"""
+import asyncio
+import json
+import os
+import tempfile
+import time
+from collections import Counter
+from http import HTTPStatus
+from importlib import import_module
+from urllib.parse import parse_qs, urlsplit
+
+from .cli import _init_worker, _write_line, analyze_video, console, show_error
+from .output import IMAGE_FORMATS, output_format
+from .profiling import Histogram, Profiler, _prometheus_histogram
+from .workers import KillablePool, TaskTimeout
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8750
+
+# Requests that may wait for a worker; more than that are answered with 429
+DEFAULT_QUEUE = 16
+
+# Seconds a request may take, waiting for a worker included
+DEFAULT_TIMEOUT = 60.0
+
+# Largest video accepted as a request body
+DEFAULT_MAX_UPLOAD = 2 * 10**9
+
+# Longest request line and headers, and the size of upload reads
+MAX_HEADER_BYTES = 64 * 1024
+UPLOAD_CHUNK = 1 << 20
+
+CONTENT_TYPES = {'jpg': 'image/jpeg', 'png': 'image/png', 'webp': 'image/webp'}
+
+
+def _warm():
+    """Runs once in every worker at startup so the first request finds OpenCV loaded."""
+    import_module('.core', __package__)
+    return True
+
+
+def extract_request(video_path, extract_options, fmt, output_options):
+    """
+    Extract (and unless fmt is 'json', encode) a video's frame in a worker.
+
+    Returns (True, result) with the encoded image under 'image' (None for
+    JSON), or (False, error_message).
+    """
+    from .core import encode_frame
+
+    success, result = analyze_video(video_path, extract_options)
+    if not success:
+        return False, result
+
+    frame = result.pop('frame')
+    result['image'] = None
+    if fmt != 'json':
+        start = time.perf_counter()
+        result['image'] = encode_frame(frame, fmt, output_options).tobytes()
+        result['stage_seconds']['encode'] = time.perf_counter() - start
+        result['bytes_written'] = len(result['image'])
+    return True, result
+
+
+class HTTPError(Exception):
+    """A request that gets an error response instead of a frame."""
+
+    def __init__(self, status, message, close=False):
+        super().__init__(message)
+        self.status = status
+        self.close = close
+
+
+def _response(status, body=b'', content_type='text/plain; charset=utf-8', headers=None,
+              close=False):
+    """Serialize one HTTP/1.1 response."""
+    lines = [
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'close' if close else 'keep-alive'}",
+    ]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body
+
+
+def _json(data):
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+class ExtractionServer:
+    """
+    Accepts HTTP connections and runs /extract requests on a KillablePool.
+
+    Args:
+        jobs: Worker processes, all started before the first request
+        queue: Requests that may wait for a worker on top of the running ones
+        timeout: Seconds a request may take before it fails with 504
+        extract_options: Keyword arguments for extract_last_frame
+        output_options: Image format and quality (see DEFAULT_OUTPUT_OPTIONS)
+        max_upload: Largest request body accepted, in bytes
+    """
+
+    def __init__(self, jobs, queue=DEFAULT_QUEUE, timeout=DEFAULT_TIMEOUT, extract_options=None,
+                 output_options=None, max_upload=DEFAULT_MAX_UPLOAD):
+        self.jobs = jobs
+        self.capacity = jobs + queue
+        self.timeout = timeout
+        self.extract_options = extract_options or {}
+        self.output_options = output_options or {}
+        self.max_upload = max_upload
+        self.pool = KillablePool(jobs, timeout, initializer=_init_worker)
+        self.profiler = Profiler(keep_videos=False)
+        self.latency = Histogram()
+        self.responses = Counter()
+        # Requests holding a place in the pool, running or waiting. A request
+        # that timed out keeps its place until its task has really stopped
+        self.admitted = 0
+        self.ready = False
+
+    async def warm_up(self):
+        """Start every worker and load OpenCV in it."""
+        await asyncio.gather(*(asyncio.wrap_future(self.pool.submit(_warm)) for _ in range(self.jobs)))
+        self.ready = True
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+    def _hold(self, future, upload=None):
+        """
+        Keep a request's place in the pool, and its uploaded video, until
+        its task is done, even after the request has been answered with 504.
+        """
+        loop = asyncio.get_running_loop()
+
+        def release():
+            self.admitted -= 1
+            if upload:
+                os.unlink(upload)
+
+        def done(_):
+            try:
+                loop.call_soon_threadsafe(release)
+            except RuntimeError:
+                # The event loop has closed: the server is shutting down
+                pass
+
+        future.add_done_callback(done)
+
+    async def handle(self, reader, writer):
+        """Serve the requests of one connection until it is closed."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    return
+                except asyncio.LimitOverrunError:
+                    writer.write(_response(431, b"Request headers too large\n", close=True))
+                    await writer.drain()
+                    return
+
+                start = time.perf_counter()
+                status, response, close = await self._respond(head, reader)
+                self.responses[status] += 1
+                self.latency.observe(time.perf_counter() - start)
+
+                writer.write(response)
+                await writer.drain()
+                if close:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, head, reader):
+        """(status, response bytes, close connection) for one request."""
+        try:
+            request_line, *header_lines = head.decode('latin-1').split("\r\n")
+            method, target, version = request_line.split(" ")
+        except ValueError:
+            return 400, _response(400, b"Malformed request\n", close=True), True
+
+        headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            if name:
+                headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get('connection', '').lower()
+        close = connection == 'close' or (version == 'HTTP/1.0' and connection != 'keep-alive')
+
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        try:
+            if url.path == '/extract':
+                status, body, content_type, extra = await self._extract(method, headers, query, reader)
+            elif url.path == '/metrics' and method == 'GET':
+                status, body, content_type, extra = 200, self.metrics().encode(), 'text/plain; version=0.0.4', {}
+            elif url.path == '/healthz' and method == 'GET':
+                status = 200 if self.ready else 503
+                body, content_type, extra = b"ok\n" if self.ready else b"warming up\n", 'text/plain', {}
+            else:
+                raise HTTPError(404, f"No such endpoint: {method} {url.path}")
+        except HTTPError as e:
+            close = close or e.close
+            status, body, content_type, extra = (
+                e.status, _json({'ok': False, 'error': str(e)}), 'application/json', {}
+            )
+            if e.status == 429:
+                extra = {'Retry-After': '1'}
+
+        return status, _response(status, body, content_type, extra, close), close
+
+    async def _extract(self, method, headers, query, reader):
+        """Run one /extract request. Returns (status, body, content type, headers)."""
+        fmt = query.get('format') or (
+            'json' if 'application/json' in headers.get('accept', '') else
+            output_format(self.output_options)
+        )
+        if fmt != 'json' and fmt not in IMAGE_FORMATS:
+            raise HTTPError(400, f"Unknown format '{fmt}' (json, {', '.join(sorted(IMAGE_FORMATS))})")
+
+        if method == 'GET':
+            video_path = query.get('path')
+            if not video_path:
+                raise HTTPError(400, "GET /extract needs ?path=/path/to/video")
+            if not os.path.isfile(video_path):
+                raise HTTPError(404, f"File not found: {video_path}")
+        elif method != 'POST':
+            raise HTTPError(405, f"Method {method} not allowed")
+        elif 'content-length' not in headers:
+            raise HTTPError(411, "POST /extract needs a Content-Length", close=True)
+
+        # Turn work away before reading an upload the pool has no room for
+        if self.admitted >= self.capacity:
+            raise HTTPError(429, f"Busy: {self.admitted} requests in progress", close=method == 'POST')
+
+        self.admitted += 1
+        upload = None
+        future = None
+        try:
+            if method == 'POST':
+                upload = await self._receive(headers, reader, query.get('name', ''))
+                video_path = upload
+
+            future = self.pool.submit(
+                extract_request, video_path, self.extract_options, fmt, self.output_options
+            )
+            # The pool's timeout only starts once a worker picks the task up,
+            # so one that waited can still be running when this one expires.
+            # A task that hasn't started yet is cancelled along with the wait.
+            self._hold(future, upload)
+            # A video that can't be extracted is the client's problem (422),
+            # one that is too slow or crashes the decoder is ours
+            status = 422
+            try:
+                success, result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+            except (asyncio.TimeoutError, TaskTimeout):
+                success, result, status = False, f"Timed out after {self.timeout:g}s", 504
+            except RuntimeError as e:
+                success, result, status = False, f"Worker failed: {e}", 500
+        finally:
+            if future is None:
+                self.admitted -= 1
+                if upload:
+                    os.unlink(upload)
+
+        self.profiler.record(video_path, success, result)
+        if not success:
+            raise HTTPError(status, result)
+
+        if fmt == 'json':
+            return 200, _json({
+                'ok': True,
+                'frame_num': result['frame_num'],
+                'blur_score': result['blur_score'],
+                'status': result['status'],
+                'candidate_scores': result['candidate_scores'],
+                'video_info': result['video_info'],
+                'timings': result['stage_seconds'],
+                'frames_decoded': result['frames_decoded'],
+                'peak_frame_bytes': result['peak_frame_bytes'],
+                'prefilter': result.get('prefilter'),
+            }), 'application/json', {}
+
+        return 200, result['image'], CONTENT_TYPES[fmt], {
+            'X-Lastframe-Frame': str(result['frame_num']),
+            'X-Lastframe-Score': f"{result['blur_score']:.3f}",
+        }
+
+    async def _receive(self, headers, reader, name):
+        """Write the request body to a temporary file and return its path."""
+        try:
+            length = int(headers['content-length'])
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length", close=True)
+        if length <= 0:
+            raise HTTPError(400, "Empty upload", close=True)
+        if length > self.max_upload:
+            raise HTTPError(413, f"Upload larger than {self.max_upload} bytes", close=True)
+
+        # FFmpeg probes the content, the extension only helps it guess
+        fd, path = tempfile.mkstemp(prefix='lastframe-', suffix=os.path.splitext(name)[1])
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while length:
+                    chunk = await reader.readexactly(min(length, UPLOAD_CHUNK))
+                    f.write(chunk)
+                    length -= len(chunk)
+        except BaseException:
+            os.unlink(path)
+            raise
+        return path
+
+    def metrics(self):
+        """Extraction metrics plus the server's own, in Prometheus text format."""
+        lines = [
+            "# HELP lastframe_http_requests_total HTTP requests answered, by status code.",
+            "# TYPE lastframe_http_requests_total counter",
+        ]
+        for status, count in sorted(self.responses.items()):
+            lines.append(f'lastframe_http_requests_total{{code="{status}"}} {count}')
+
+        lines += [
+            "# HELP lastframe_http_request_seconds Seconds from request to response.",
+            "# TYPE lastframe_http_request_seconds histogram",
+        ]
+        lines.extend(_prometheus_histogram("lastframe_http_request_seconds", self.latency))
+
+        for name, value, help_text in (
+            ("requests_in_progress", self.admitted, "Requests running or waiting, timed-out ones until their task stops."),
+            ("request_capacity", self.capacity, "Requests accepted at once before answering 429."),
+            ("workers", self.jobs, "Worker processes."),
+        ):
+            lines += [
+                f"# HELP lastframe_{name} {help_text}",
+                f"# TYPE lastframe_{name} gauge",
+                f"lastframe_{name} {value}",
+            ]
+        return self.profiler.to_prometheus() + "\n".join(lines) + "\n"
+
+
+async def _serve(server, host, port, emit):
+    async def accepted(reader, writer):
+        await server.handle(reader, writer)
+
+    listener = await asyncio.start_server(accepted, host, port, limit=MAX_HEADER_BYTES)
+    await server.warm_up()
+
+    address = listener.sockets[0].getsockname()
+    url = f"http://{address[0]}:{address[1]}"
+    if emit:
+        _write_line(url)
+    else:
+        console.print(f"[cyan]🌐 Listening:[/cyan] [bold]{url}[/bold]")
+        console.print(
+            f"[cyan]🧵 Workers:[/cyan] {server.jobs} warm • queue {server.capacity - server.jobs} "
+            f"• timeout {server.timeout:g}s"
+        )
+        console.print("[dim]Press Ctrl+C to stop[/dim]")
+        console.print()
+
+    async with listener:
+        await listener.serve_forever()
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, jobs=1, queue=DEFAULT_QUEUE, timeout=DEFAULT_TIMEOUT,
+          extract_options=None, output_options=None, max_upload=DEFAULT_MAX_UPLOAD, emit=None):
+    """
+    Run the HTTP extraction service until interrupted with Ctrl+C.
+
+    With emit (a machine-readable --format), only the URL is printed once
+    the workers are warm.
+    """
+    if emit is None:
+        console.print()
+        console.print("[bold magenta]lastframe[/bold magenta] [dim]v1.1.0[/dim] [yellow]• serve mode[/yellow]")
+        console.print()
+
+    server = ExtractionServer(jobs, queue, timeout, extract_options, output_options, max_upload)
+    try:
+        asyncio.run(_serve(server, host, port, emit))
+    except KeyboardInterrupt:
+        if emit is None:
+            console.print("[yellow]Stopping serve mode...[/yellow]")
+    except OSError as e:
+        show_error(
+            "Cannot listen",
+            f"Could not listen on {host}:{port}: {e.strerror or str(e)}",
+            "Pick another port with --port, or stop the process using this one."
+        )
+        raise SystemExit(1)
+    finally:
+        server.close()
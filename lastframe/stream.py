@@ -0,0 +1,299 @@
+"""
+The last sharp frame of a stream: a pipe, a FIFO or a file still being written.
+
+extract_last_frame seeks to the tail of a file whose frame count it knows.
+A stream can't be seeked and doesn't know its length until it ends, so
+here the video is decoded front to back instead. Every frame is scored as
+it arrives and kept in a ring buffer of the last max_depth frames; older
+ones are dropped, so memory stays at max_depth frames however long the
+stream runs. When the stream ends, the buffer holds exactly the windows
+extract_last_frame would have searched, and the same rules pick the frame.
+
+Sources:
+    -             Standard input, e.g. `ffmpeg ... -f mpegts - | lastframe - out.jpg`
+    a FIFO        Read like standard input
+    follow=True   A regular file that is still growing, e.g. a live .ts
+                  recording: read to the end, then wait for more until the
+                  file hasn't grown for `settle` seconds
+
+Only containers that can be read without seeking work: MPEG-TS, Matroska
+and WebM, fragmented MP4. A plain MP4 keeps its index at the end and can't
+be decoded from a pipe.
+"""
+import os
+import stat
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from .core import (
+    DEFAULT_METRIC, TAIL_WINDOW, ExtractionResult, Prefilter, VideoSession, _fourcc_name,
+    _pyramid_reduce, get_metric, rescore_pyramid, select_frame,
+)
+
+# A followed file counts as finished once it hasn't grown for this many seconds
+DEFAULT_SETTLE = 5.0
+
+# How often a followed file is checked for new data, and how much is read at once
+FOLLOW_POLL = 0.25
+FOLLOW_CHUNK = 1024 * 1024
+
+
+def is_stream(path):
+    """True for '-' (standard input) and FIFOs, which can only be read front to back."""
+    if str(path) == '-':
+        return True
+    try:
+        return stat.S_ISFIFO(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+def _follow(path, write_fd, settle, stop):
+    """Copy a growing file into a pipe until it hasn't grown for `settle` seconds."""
+    try:
+        with open(path, 'rb') as f, os.fdopen(write_fd, 'wb') as out:
+            idle_since = None
+            while not stop.is_set():
+                chunk = f.read(FOLLOW_CHUNK)
+                if chunk:
+                    out.write(chunk)
+                    idle_since = None
+                    continue
+                if idle_since is None:
+                    idle_since = time.monotonic()
+                elif time.monotonic() - idle_since >= settle:
+                    break
+                stop.wait(FOLLOW_POLL)
+    except OSError:
+        # The decoder stopped reading (or the file went away): end the stream
+        pass
+
+
+class StreamSession(VideoSession):
+    """
+    A stream opened for one front-to-back read.
+
+    Keeps VideoSession's counters (opens, decode_stats, timings,
+    peak_frame_bytes) so results report the same way. info is None until
+    the stream has been read to the end by extract_stream_frame, since only
+    then is the frame count known.
+
+    Args:
+        source: '-' for standard input, or a path (a FIFO, or with follow a
+            file that is still being written)
+        follow: Keep reading a regular file as it grows
+        settle: With follow, seconds without growth that end the stream
+        backend: Decoder backend (see lastframe.backends), None for OpenCV
+    """
+
+    def __init__(self, source, follow=False, settle=DEFAULT_SETTLE, backend=None):
+        super().__init__(source, backend)
+        self.source = str(source)
+        self.follow = follow
+        self.settle = settle
+        self._pipe = None
+        self._feeder = None
+        self._stop = threading.Event()
+
+    def open(self):
+        if self.cap is None:
+            start = time.perf_counter()
+            if self.source == '-':
+                url = 'pipe:0'
+            elif self.follow:
+                read_fd, write_fd = os.pipe()
+                self._pipe = read_fd
+                self._feeder = threading.Thread(
+                    target=_follow, args=(self.source, write_fd, self.settle, self._stop), daemon=True
+                )
+                self._feeder.start()
+                url = f'pipe:{read_fd}'
+            else:
+                url = self.source
+            self.cap = self._open_capture(url, stream=True)
+            self.timings['open'] += time.perf_counter() - start
+            self.opens += 1
+        return self.cap.isOpened()
+
+    def release(self):
+        super().release()
+        self._stop.set()
+        if self._pipe is not None:
+            # Closing our end makes a feeder blocked on a full pipe give up
+            try:
+                os.close(self._pipe)
+            except OSError:
+                pass
+            self._pipe = None
+        if self._feeder is not None:
+            self._feeder.join()
+            self._feeder = None
+
+    @property
+    def info(self):
+        return self._info
+
+    @property
+    def index(self):
+        return None
+
+
+def _read_forward(session):
+    """Yield (frame, frame_num) from the start of the stream to its end."""
+    cap = session.cap
+    stats = session.decode_stats
+    frame_num = 0
+    while True:
+        start = time.perf_counter()
+        ok, frame = cap.read()
+        stats['decode_seconds'] += time.perf_counter() - start
+        if not ok:
+            return
+        stats['grabbed'] += 1
+        stats['retrieved'] += 1
+        yield frame, frame_num
+        frame_num += 1
+
+
+def select_stream_frame(tail, blur_threshold, metric=DEFAULT_METRIC, pyramid=None,
+                        search_window=TAIL_WINDOW, skipped=None):
+    """
+    Pick the last sharp frame from the end of a stream.
+
+    Searches the buffered tail in windows of search_window from the end,
+    stopping at the first window with a sharp frame, like extract_last_frame's
+    backward search.
+
+    Args:
+        tail: (frame, frame_num, score) of the last frames, oldest first;
+            with a pyramid the scores are those of the reduced copies
+        blur_threshold, metric, pyramid, search_window: As for extract_last_frame
+        skipped: Frames the pre-filter rejected, as for select_frame
+
+    Returns:
+        ExtractionResult
+    """
+    score_fn, _ = get_metric(metric)
+    reduce = _pyramid_reduce(pyramid)
+    newest_first = list(reversed(tail))
+
+    def score_window(window):
+        if reduce is None:
+            return window
+        # Rescore this window's close calls at full size, as score_frames would
+        return rescore_pyramid(
+            [(frame, frame_num) for frame, frame_num, _ in window],
+            [score for _, _, score in window], score_fn
+        )
+
+    candidates = score_window(newest_first[:search_window])
+    scores = [(frame_num, score) for _, frame_num, score in candidates]
+    if not candidates:
+        return select_frame(candidates, blur_threshold)
+
+    newest = candidates[0]
+    for start in range(search_window, len(newest_first), search_window):
+        if max(score for _, _, score in candidates) >= blur_threshold:
+            break
+        scored = score_window(newest_first[start:start + search_window])
+        scores += [(frame_num, score) for _, frame_num, score in scored]
+        candidates = [newest] + scored
+
+    result = select_frame(candidates, blur_threshold, skipped)
+    result.candidates = scores
+    return result
+
+
+def extract_stream_frame(source, blur_threshold=None, metric=DEFAULT_METRIC, pyramid=None,
+                         search_window=TAIL_WINDOW, max_depth=None, streaming=False,
+                         follow=False, settle=DEFAULT_SETTLE, prefilter=None, backend=None):
+    """
+    Extract the last non-blurry frame from a stream.
+
+    Args:
+        source: '-', a path, or an open StreamSession (whose info is filled
+            in once the stream has ended)
+        blur_threshold, metric, pyramid, search_window, max_depth:
+            As for extract_last_frame. The last max_depth frames are held
+            in memory while the stream is read.
+        streaming: Accepted for extract_last_frame compatibility; frames
+            from a stream are always scored as they are decoded
+        follow, settle, backend: See StreamSession
+        prefilter: Pre-filter thresholds, as for extract_last_frame. Rejected
+            frames never enter the buffer, so the last max_depth frames that
+            passed are searched however many were rejected (`skip` is unused)
+
+    Returns:
+        ExtractionResult
+    """
+    if not isinstance(source, StreamSession):
+        with StreamSession(source, follow, settle, backend) as session:
+            return extract_stream_frame(
+                session, blur_threshold, metric, pyramid, search_window, max_depth,
+                prefilter=prefilter
+            )
+
+    session = source
+    score_fn, default_threshold = get_metric(metric)
+    if blur_threshold is None:
+        blur_threshold = default_threshold
+    if max_depth is None:
+        max_depth = search_window
+    search_window = min(search_window, max_depth)
+    reduce = _pyramid_reduce(pyramid)
+
+    if not session.open():
+        return ExtractionResult(None, None, None, "Failed to open stream")
+
+    screen = Prefilter(prefilter) if prefilter is not None else None
+    frames = _read_forward(session)
+    if screen is not None:
+        frames = screen.filter(frames)
+
+    tail = deque(maxlen=max_depth)
+    for frame, frame_num in frames:
+        session.hold([frame] + [entry[0] for entry in tail])
+        start = time.perf_counter()
+        score = score_fn(frame if reduce is None else reduce(frame))
+        session.timings['score'] += time.perf_counter() - start
+        tail.append((frame, frame_num, score))
+        if screen is not None:
+            # Only rejections within the buffered tail can matter
+            screen.forget_before(tail[0][1])
+
+    cap = session.cap
+    count = session.decode_stats['grabbed']
+    if tail:
+        height, width = tail[-1][0].shape[:2]
+    elif screen is not None and screen.fallback is not None:
+        height, width = screen.fallback[0].shape[:2]
+    else:
+        height, width = 0, 0
+    session._info = {
+        'total_frames': count,
+        'fps': cap.get(cv2.CAP_PROP_FPS),
+        'width': width,
+        'height': height,
+        'codec': _fourcc_name(cap.get(cv2.CAP_PROP_FOURCC)),
+    }
+
+    if screen is not None:
+        session.prefilter_counts = screen.counts
+        if not tail and screen.fallback is not None:
+            return screen.fallback_result(metric)
+
+    if not tail:
+        return ExtractionResult(None, None, None, "No frames in the stream")
+
+    start = time.perf_counter()
+    result = select_stream_frame(
+        list(tail), blur_threshold, metric, pyramid, search_window,
+        screen.skipped if screen is not None else None
+    )
+    session.timings['score'] += time.perf_counter() - start
+    if screen is not None:
+        screen.annotate(result)
+    return result
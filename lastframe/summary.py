@@ -0,0 +1,86 @@
+"""
+Batch summaries that can be added up across shards.
+
+A sharded run (--shard i/N) leaves one summary per node. Every count in a
+summary is a plain total, so merging is a sum, and each summary records
+how many inputs its node saw in total so the merged result can tell
+whether every shard has reported.
+"""
+import json
+
+# Counters that are summed when merging
+SUMMARY_COUNTS = (
+    'total', 'success', 'cached', 'deduplicated', 'failed', 'container_opens', 'frames_decoded',
+    'frames_prefiltered',
+)
+
+
+def build_summary(results, shard=None, inputs_seen=0, failed_videos=()):
+    """
+    Summary of one process_batch run.
+
+    Args:
+        results: process_batch's counters (success, failed, cached, ...)
+        shard: (index, count) for a sharded run, or None
+        inputs_seen: Inputs discovered, including those of other shards
+        failed_videos: (video, error) pairs
+    """
+    summary = {key: results.get(key, 0) for key in SUMMARY_COUNTS}
+    summary.update({
+        'shard': f"{shard[0]}/{shard[1]}" if shard else None,
+        'inputs_seen': inputs_seen,
+        'failed_videos': [{'input': str(video), 'error': error} for video, error in failed_videos],
+        'near_duplicates': results.get('near_duplicates', []),
+    })
+    return summary
+
+
+def merge_summaries(summaries):
+    """
+    Add up summaries from several shards (or runs).
+
+    'complete' is True when the summaries cover every shard 1..N exactly
+    once and together processed every input the shards saw.
+    """
+    merged = {key: 0 for key in SUMMARY_COUNTS}
+    merged['failed_videos'] = []
+    merged['near_duplicates'] = []
+    shards = []
+    inputs_seen = set()
+
+    for summary in summaries:
+        for key in SUMMARY_COUNTS:
+            merged[key] += summary.get(key, 0)
+        merged['failed_videos'].extend(summary.get('failed_videos', []))
+        # Only within each shard: videos on different nodes are never compared
+        merged['near_duplicates'].extend(summary.get('near_duplicates', []))
+        if summary.get('shard'):
+            shards.append(summary['shard'])
+        inputs_seen.add(summary.get('inputs_seen', 0))
+
+    counts = {int(shard.split('/')[1]) for shard in shards}
+    expected = {f"{i}/{n}" for n in counts for i in range(1, n + 1)}
+
+    merged['shards'] = sorted(shards, key=lambda s: int(s.split('/')[0]))
+    merged['inputs_seen'] = max(inputs_seen) if inputs_seen else 0
+    merged['complete'] = (
+        len(counts) == 1
+        and len(shards) == len(set(shards))
+        and set(shards) == expected
+        and len(inputs_seen) == 1
+        and merged['total'] == merged['inputs_seen']
+    ) if shards else merged['total'] == merged['inputs_seen']
+    return merged
+
+
+def load_summary(path):
+    """Read a summary written with --summary-json."""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_summary(path, summary):
+    """Write a summary atomically, so a merge never reads half a file."""
+    from .output import write_atomic
+
+    write_atomic(path, json.dumps(summary, indent=2, ensure_ascii=False).encode('utf-8'))
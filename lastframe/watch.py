@@ -0,0 +1,377 @@
+"""
+Watch-folder mode: keep one warm process and extract frames from videos as
+they arrive in an ingest directory.
+
+New or modified videos are noticed with inotify on Linux, or by polling the
+directory elsewhere. A video is only processed once its size and
+modification time have stopped changing for a while, so half-uploaded files
+are left alone. Ready videos go through the usual process_single_video path
+on a worker pool, and results are recorded in the same result cache that
+batch mode uses, so restarts don't redo finished work.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import sqlite3
+import struct
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+
+from .cache import ResultCache
+from .cli import (
+    VIDEO_EXTENSIONS, _future_outcome, _matches_any, _memory_cost, _process_pool, console,
+    iter_videos, process_single_video, show_error
+)
+from .output import batch_output_path, primary_output_path
+from .workers import MemoryBudget
+
+# Seconds a file's size and mtime must stay unchanged before it's processed
+DEFAULT_SETTLE = 5.0
+
+# Seconds between directory scans when inotify isn't available
+DEFAULT_POLL_INTERVAL = 2.0
+
+# Videos tracked while waiting to settle or for a worker. When more arrive
+# at once the extra events are dropped and picked up by a rescan later.
+DEFAULT_MAX_PENDING = 10000
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Report changed files under a directory using Linux inotify."""
+
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, directory, recursive=False):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.recursive = recursive
+        self._dirs = {}
+        self._add_watch(Path(directory))
+
+        if recursive:
+            for root, dirs, _ in os.walk(directory):
+                for name in dirs:
+                    self._add_watch(Path(root) / name)
+
+    def _add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self._dirs[wd] = directory
+
+    def poll(self, timeout):
+        """
+        Wait up to `timeout` seconds for changes.
+
+        Returns:
+            tuple: (paths, overflowed) - changed file paths, and whether the
+            kernel queue overflowed so events were lost
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return [], False
+
+        paths = []
+        overflowed = False
+
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    overflowed = True
+                    continue
+
+                directory = self._dirs.get(wd)
+                if directory is None or not name:
+                    continue
+
+                path = directory / os.fsdecode(name)
+                if mask & IN_ISDIR:
+                    if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                        try:
+                            self._add_watch(path)
+                        except OSError:
+                            pass
+                        # Files may have landed before the watch existed
+                        overflowed = True
+                    continue
+
+                paths.append(path)
+
+        return paths, overflowed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Report changed files by rescanning the directory periodically."""
+
+    def __init__(self, directory, recursive=False, interval=DEFAULT_POLL_INTERVAL):
+        self.directory = Path(directory)
+        self.recursive = recursive
+        self.interval = interval
+        self._snapshot = {}
+        self._next_scan = 0.0
+
+    def poll(self, timeout):
+        delay = self._next_scan - time.monotonic()
+        if delay > 0:
+            time.sleep(min(timeout, delay))
+            return [], False
+
+        self._next_scan = time.monotonic() + self.interval
+
+        snapshot = {}
+        changed = []
+        for path in iter_videos(self.directory, self.recursive):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            key = (st.st_size, st.st_mtime_ns)
+            snapshot[path] = key
+            if self._snapshot.get(path) != key:
+                changed.append(path)
+
+        self._snapshot = snapshot
+        return changed, False
+
+    def close(self):
+        pass
+
+
+def _open_watcher(directory, recursive, use_polling, poll_interval):
+    """Prefer inotify, fall back to polling where it isn't available."""
+    if not use_polling and hasattr(os, "O_CLOEXEC"):
+        try:
+            return InotifyWatcher(directory, recursive), "inotify"
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directory, recursive, poll_interval), "polling"
+
+
+def watch_directory(input_dir, output_dir=None, jobs=1, extract_options=None,
+                    output_options=None, recursive=False, include=None, exclude=None,
+                    settle=DEFAULT_SETTLE, use_polling=False,
+                    poll_interval=DEFAULT_POLL_INTERVAL, max_pending=DEFAULT_MAX_PENDING,
+                    profiler=None, emit=None, timeout=None, memory_budget=None):
+    """
+    Watch a directory and extract the last frame of every video that lands in it.
+
+    Runs until interrupted with Ctrl+C. Returns (success, failed) counts.
+    With a profiler, every video is recorded and its metrics files are
+    rewritten as videos finish, so a scraper always sees current numbers.
+    With emit, emit(path, success, result) reports each video instead of
+    the log lines (see cli.emit_jsonl). With timeout, a video still being
+    processed after that many seconds is killed and reported as failed.
+    With memory_budget (bytes), videos wait for a worker until their
+    estimated memory fits next to the ones being processed.
+    """
+    input_path = Path(input_dir)
+
+    if not input_path.is_dir():
+        show_error(
+            "Not a directory",
+            f"Watch mode needs a directory to watch: {input_dir}",
+            "Try: lastframe watch ./incoming"
+        )
+        raise SystemExit(1)
+
+    output_path = Path(output_dir) if output_dir else input_path
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    try:
+        cache = ResultCache(output_path, {'extract': extract_options, 'output': output_options})
+    except (sqlite3.Error, OSError) as e:
+        console.print(f"[yellow]⚠️  Result cache disabled:[/yellow] [dim]{str(e)}[/dim]")
+        cache = None
+
+    watcher, method = _open_watcher(input_path, recursive, use_polling, poll_interval)
+
+    if emit is None:
+        console.print()
+        console.print("[bold magenta]lastframe[/bold magenta] [dim]v1.1.0[/dim] [yellow]• watch mode[/yellow]")
+        console.print()
+        console.print(f"[cyan]👀 Watching:[/cyan] {input_path}{' (recursive)' if recursive else ''} [dim]via {method}[/dim]")
+        console.print(f"[cyan]📤 Output:[/cyan]   {output_path}")
+        console.print(f"[cyan]🧵 Workers:[/cyan]  {jobs}")
+        console.print("[dim]Press Ctrl+C to stop[/dim]")
+        console.print()
+
+    # path -> [size, mtime_ns, detected_at, stable_since]
+    pending = OrderedDict()
+    # (path, detected_at, memory_cost) waiting for a worker
+    ready = deque()
+    in_flight = {}
+    budget = MemoryBudget(memory_budget or 0)
+    # Paths that are ready or being processed
+    active = set()
+    max_in_flight = jobs * 2
+    needs_rescan = True
+    counts = {'success': 0, 'failed': 0}
+
+    def wanted(path):
+        relative = path.relative_to(input_path).as_posix()
+        if path.suffix.lower() not in VIDEO_EXTENSIONS:
+            return False
+        if include and not _matches_any(relative, include):
+            return False
+        if exclude and _matches_any(relative, exclude):
+            return False
+        return True
+
+    def track(path, now):
+        """Start (or restart) the settle timer for a file. False if full."""
+        if path in pending or path in active:
+            return True
+        if len(pending) + len(ready) >= max_pending:
+            return False
+        output_file = batch_output_path(path, input_path, output_dir, output_options)
+        if cache and cache.lookup(path, primary_output_path(output_file, output_options)):
+            return True
+        pending[path] = [None, None, now, now]
+        return True
+
+    def report(path, detected_at, started_at, success, result):
+        active.discard(path)
+        now = time.monotonic()
+        depth = len(pending) + len(ready) + len(in_flight)
+        timing = f"{now - detected_at:.1f}s since detected, {now - started_at:.1f}s processing"
+
+        if success:
+            counts['success'] += 1
+            if cache:
+                cache.store(path, result)
+        else:
+            counts['failed'] += 1
+
+        if profiler:
+            profiler.record(path, success, result)
+            try:
+                profiler.export()
+            except OSError as e:
+                console.print(f"[yellow]⚠️  Could not write metrics:[/yellow] [dim]{str(e)}[/dim]")
+
+        if emit:
+            emit(path, success, result)
+        elif success:
+            console.print(
+                f"[bold green]✓[/bold green] {path.name} → [cyan]{result['output_file'].name}[/cyan] "
+                f"[dim]• {timing} • queue {depth}[/dim]"
+            )
+        else:
+            console.print(
+                f"[red]✗[/red] {path.name}: [dim]{result} • {timing} • queue {depth}[/dim]"
+            )
+
+    executor = _process_pool(jobs, timeout)
+
+    try:
+        while True:
+            now = time.monotonic()
+
+            # Pick up files we may have missed: at startup, after an
+            # overflow, and once a burst has drained
+            if needs_rescan and len(pending) + len(ready) < max_pending // 2:
+                needs_rescan = False
+                for path in iter_videos(input_path, recursive, include, exclude):
+                    if not track(path, now):
+                        needs_rescan = True
+                        break
+
+            # Wake up more often while workers are busy so latency stays low
+            changed, overflowed = watcher.poll(0.1 if in_flight or ready else 0.5)
+            needs_rescan = needs_rescan or overflowed
+
+            now = time.monotonic()
+            for path in changed:
+                if not wanted(path):
+                    continue
+                if path in pending:
+                    # Still being written, restart the settle timer
+                    pending[path][3] = now
+                elif not track(path, now):
+                    needs_rescan = True
+
+            # Move files whose size and mtime stopped changing to the ready queue
+            for path in list(pending):
+                entry = pending[path]
+                try:
+                    st = path.stat()
+                except OSError:
+                    del pending[path]
+                    continue
+
+                key = (st.st_size, st.st_mtime_ns)
+                if (entry[0], entry[1]) != key:
+                    entry[0], entry[1], entry[3] = key[0], key[1], now
+                elif now - entry[3] >= settle and st.st_size > 0:
+                    del pending[path]
+                    cost = _memory_cost(path, extract_options) if memory_budget else 0
+                    ready.append((path, entry[2], cost))
+                    active.add(path)
+
+            # Hand ready files to the workers without queueing them all at once
+            while ready and len(in_flight) < max_in_flight and budget.fits(ready[0][2]):
+                path, detected_at, cost = ready.popleft()
+                budget.acquire(cost)
+                output_file = batch_output_path(path, input_path, output_dir, output_options)
+                output_file.parent.mkdir(parents=True, exist_ok=True)
+                future = executor.submit(
+                    process_single_video, path, output_file, extract_options, output_options
+                )
+                in_flight[future] = (path, detected_at, time.monotonic(), cost)
+
+            for future in [f for f in in_flight if f.done()]:
+                path, detected_at, started_at, cost = in_flight.pop(future)
+                budget.release(cost)
+                success, result = _future_outcome(future)
+                report(path, detected_at, started_at, success, result)
+
+    except KeyboardInterrupt:
+        if emit is None:
+            console.print()
+            console.print("[yellow]Stopping watch mode...[/yellow]")
+    finally:
+        # At most jobs * 2 videos are in flight, so this doesn't wait long
+        executor.shutdown(wait=True)
+        watcher.close()
+        if cache:
+            cache.close()
+
+    if emit is None:
+        summary = f"[bold green]✓[/bold green] {counts['success']} extracted"
+        if counts['failed']:
+            summary += f", [red]{counts['failed']} failed[/red]"
+        console.print(summary)
+        console.print()
+
+    return counts['success'], counts['failed']
@@ -0,0 +1,220 @@
+"""
+A process pool that can kill a task which runs too long.
+
+OpenCV can't be interrupted in the middle of a decode, and
+ProcessPoolExecutor has no way to stop one task without breaking the whole
+pool. A broken file that makes the decoder grind would hold its worker
+forever. KillablePool gives every task a wall-clock deadline; past it the
+worker process is killed, the task's future fails with TaskTimeout, and a
+fresh worker takes its place.
+
+It implements the parts of the Executor interface lastframe uses (submit,
+shutdown and the context manager), so it can stand in for a
+ProcessPoolExecutor.
+
+MemoryBudget is the admission control in front of either pool: videos are
+only handed to the workers while their estimated memory fits.
+"""
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+
+
+class TaskTimeout(Exception):
+    """A task ran longer than the pool's timeout and its worker was killed."""
+
+
+def _worker_main(conn, initializer):
+    """Run tasks received on conn until the pipe is closed."""
+    if initializer is not None:
+        initializer()
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+
+        fn, args = task
+        try:
+            outcome = (True, fn(*args))
+        except Exception as e:
+            # The exception itself may not pickle, its message always does
+            outcome = (False, f"{type(e).__name__}: {e}")
+        conn.send(outcome)
+
+
+class MemoryBudget:
+    """
+    Bytes of memory shared by the tasks in flight.
+
+    A task is admitted while its estimate fits in what is left. One that
+    is bigger than the whole budget still runs once nothing else does, so
+    it is slowed down rather than never run.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.used = 0
+
+    def fits(self, cost):
+        return self.used == 0 or self.used + cost <= self.budget
+
+    def acquire(self, cost):
+        self.used += cost
+
+    def release(self, cost):
+        self.used -= cost
+
+
+class _Worker:
+    """One worker process and the task it is running."""
+
+    def __init__(self, context, initializer):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, initializer), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.future = None
+        self.deadline = None
+
+    def run(self, future, fn, args, timeout):
+        self.future = future
+        self.deadline = time.monotonic() + timeout
+        self.conn.send((fn, args))
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class KillablePool:
+    """
+    Run callables in worker processes, failing any that exceed `timeout`.
+
+    Args:
+        max_workers: Number of worker processes, started as work arrives
+        timeout: Seconds one task may run before its worker is killed
+        initializer: Called once in every worker process
+    """
+
+    def __init__(self, max_workers, timeout, initializer=None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.initializer = initializer
+        self._context = multiprocessing.get_context()
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._closing = False
+        # Wakes the manager thread when work is submitted or the pool closes
+        self._wake_recv, self._wake_send = self._context.Pipe(duplex=False)
+        self._thread = threading.Thread(target=self._manage, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(wait=True)
+
+    def submit(self, fn, *args):
+        """Schedule fn(*args); fn and args must be picklable."""
+        future = Future()
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("cannot submit after shutdown")
+            self._queue.append((future, fn, args))
+        self._wake_send.send(None)
+        return future
+
+    def shutdown(self, wait=True):
+        """Finish queued and running tasks (each still bounded by the timeout), then stop."""
+        with self._lock:
+            if not self._closing:
+                self._closing = True
+                self._wake_send.send(None)
+        if wait:
+            self._thread.join()
+
+    def _manage(self):
+        idle = []
+        busy = {}
+        started = 0
+
+        try:
+            while True:
+                # Hand queued tasks to idle workers, starting workers as needed
+                with self._lock:
+                    while self._queue and (idle or started < self.max_workers):
+                        future, fn, args = self._queue.popleft()
+                        if not future.set_running_or_notify_cancel():
+                            continue
+                        if not idle:
+                            idle.append(_Worker(self._context, self.initializer))
+                            started += 1
+                        worker = idle.pop()
+                        worker.run(future, fn, args, self.timeout)
+                        busy[worker.conn] = worker
+
+                    if self._closing and not self._queue and not busy:
+                        return
+
+                now = time.monotonic()
+                next_deadline = min((w.deadline for w in busy.values()), default=None)
+                ready = wait(
+                    [self._wake_recv] + list(busy),
+                    None if next_deadline is None else max(0.0, next_deadline - now)
+                )
+
+                for conn in ready:
+                    if conn is self._wake_recv:
+                        self._wake_recv.recv()
+                        continue
+
+                    worker = busy.pop(conn)
+                    try:
+                        ok, value = conn.recv()
+                    except (EOFError, OSError):
+                        # The worker died mid-task (e.g. the decoder crashed)
+                        worker.kill()
+                        started -= 1
+                        worker.future.set_exception(
+                            RuntimeError(f"worker exited with code {worker.process.exitcode}")
+                        )
+                        continue
+
+                    if ok:
+                        worker.future.set_result(value)
+                    else:
+                        worker.future.set_exception(RuntimeError(value))
+                    idle.append(worker)
+
+                now = time.monotonic()
+                for conn, worker in list(busy.items()):
+                    if worker.deadline <= now:
+                        del busy[conn]
+                        worker.kill()
+                        started -= 1
+                        worker.future.set_exception(TaskTimeout(f"Timed out after {self.timeout:g}s"))
+        finally:
+            for worker in idle:
+                worker.stop()
+            for worker in busy.values():
+                worker.kill()
+                if not worker.future.done():
+                    worker.future.set_exception(RuntimeError("pool stopped"))
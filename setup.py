@@ -25,6 +25,10 @@ setup(
         "numpy>=1.24.0",
         "rich>=13.0.0",
     ],
+    extras_require={
+        # Optional decoder backend: lastframe --backend pyav
+        "pyav": ["av>=12.0"],
+    },
     entry_points={
         "console_scripts": [
             "lastframe=lastframe.cli:main",